@@ -1,42 +1,39 @@
 # ai_optimizer.py
 
-import json
-import re
+from json_stream import stream_chat_events
+from llm_cache import cached_generate, cached_stream
 from openai_helper import get_azure_openai_client
-
-
-def _extract_json(text: str) -> str:
-    """
-    Extract JSON object from a string safely.
-    Handles cases where model returns extra text around JSON.
-    """
-    text = text.strip()
-    text = text.replace("```json", "").replace("```", "").strip()
-
-    # Try direct JSON first
-    if text.startswith("{") and text.endswith("}"):
-        return text
-
-    # Extract JSON object using regex
-    match = re.search(r"\{.*\}", text, re.DOTALL)
-    if match:
-        return match.group(0)
-
-    return text  # fallback
-
-
-def generate_seo_optimization(page: dict) -> dict:
-    """
-    Uses Azure OpenAI to generate SEO improved versions for:
-    - title
-    - intro
-    - meta description
-    - long-tail keywords
-    - CTA
-    """
-
-    client, deployment = get_azure_openai_client()
-
+from structured_output import (
+    create_chat,
+    finish_structured,
+    request_kwargs,
+    response_text,
+    response_tokens,
+)
+
+
+# bump when the prompt or the expected JSON changes (invalidates cached responses)
+SEO_PROMPT_VERSION = "2"
+SEO_TEMPERATURE = 0.6
+SEO_SYSTEM_PROMPT = "You are a helpful AI SEO assistant."
+
+# expected output (also sent as the response schema when OPENAI_RESPONSE_FORMAT=json_schema)
+SEO_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "optimized_title": {"type": "string"},
+        "optimized_meta_description": {"type": "string"},
+        "optimized_intro": {"type": "string"},
+        "long_tail_keywords": {"type": "array", "items": {"type": "string"}},
+        "ctas": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["optimized_title", "optimized_meta_description", "optimized_intro", "long_tail_keywords", "ctas"],
+    "additionalProperties": False
+}
+
+
+def build_seo_messages(page: dict) -> list[dict]:
+    """Chat messages for one page's SEO optimization request."""
     page_name = page.get("page_name", "")
     primary_keyword = page.get("primary_keyword", "")
     content = page.get("content", "")
@@ -67,28 +64,75 @@ Return ONLY valid JSON (no explanation, no extra text) in this format:
 }}
 """
 
-    response = client.chat.completions.create(
-        model=deployment,
-        temperature=0.6,
-        messages=[
-            {"role": "system", "content": "You are a helpful AI SEO assistant."},
-            {"role": "user", "content": prompt}
-        ]
-    )
-
-    raw_text = response.choices[0].message.content or ""
-    raw_text = _extract_json(raw_text)
-
-    try:
-        return json.loads(raw_text)
-    except json.JSONDecodeError:
-        # fallback output so Streamlit doesn't crash
-        return {
-            "optimized_title": "",
-            "optimized_meta_description": "",
-            "optimized_intro": "",
-            "long_tail_keywords": [],
-            "ctas": [],
-            "error": "Model did not return valid JSON",
-            "raw_response": raw_text
-        }
+    return [
+        {"role": "system", "content": SEO_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def seo_fallback(error: str, raw_text: str = "") -> dict:
+    """Empty result with an error, so Streamlit doesn't crash."""
+    return {
+        "optimized_title": "",
+        "optimized_meta_description": "",
+        "optimized_intro": "",
+        "long_tail_keywords": [],
+        "ctas": [],
+        "error": error,
+        "raw_response": raw_text
+    }
+
+
+SEO_OUTPUT = {
+    "name": "seo_optimization",
+    "schema": SEO_SCHEMA,
+    "fallback": seo_fallback,
+    "error": "Model did not return valid JSON"
+}
+
+
+def generate_seo_optimization(page: dict, force: bool = False) -> dict:
+    """
+    Uses Azure OpenAI to generate SEO improved versions for:
+    - title
+    - intro
+    - meta description
+    - long-tail keywords
+    - CTA
+    """
+
+    client, deployment = get_azure_openai_client()
+    messages = build_seo_messages(page)
+
+    def generate():
+        response = create_chat(client, request_kwargs(deployment, SEO_TEMPERATURE, messages, SEO_OUTPUT))
+        text = response_text(response)
+        # repairs what it can and asks again only for missing fields
+        return finish_structured(
+            client, deployment, SEO_TEMPERATURE, messages, text, response_tokens(response, messages, text), SEO_OUTPUT
+        )
+
+    # cached per page + prompt; force=True regenerates
+    return cached_generate("seo", messages, deployment, SEO_TEMPERATURE, SEO_PROMPT_VERSION, generate, force=force)
+
+
+def stream_seo_optimization(page: dict, force: bool = False):
+    """
+    Streaming version of generate_seo_optimization: yields fields as soon as
+    the model has written them (optimized_title, meta description, each CTA...):
+      ("item", key, value)   one list element
+      ("field", key, value)  a complete field
+    and finally ("result", dict), the dict generate_seo_optimization returns.
+    """
+
+    client, deployment = get_azure_openai_client()
+    messages = build_seo_messages(page)
+
+    def stream():
+        return stream_chat_events(client, request_kwargs(deployment, SEO_TEMPERATURE, messages, SEO_OUTPUT))
+
+    def parse(raw_text: str, tokens: int) -> dict:
+        return finish_structured(client, deployment, SEO_TEMPERATURE, messages, raw_text, tokens, SEO_OUTPUT)
+
+    return cached_stream("seo", messages, deployment, SEO_TEMPERATURE, SEO_PROMPT_VERSION, stream,
+                         parse, force=force)
@@ -7,9 +7,12 @@ from pages_data import dreamit_pages
 from seo_audit import audit_page
 from scoring import compute_seo_score
 
-from keyword_engine import keyword_strategy_for_page
-from ai_optimizer import generate_seo_optimization
-from engagement_plan import generate_engagement_boost_plan
+from keyword_engine import get_keyword_index, keyword_strategy_for_page, related_keywords
+from ai_optimizer import stream_seo_optimization
+from engagement_plan import stream_engagement_boost_plan
+from combined_generation import split_combined, stream_combined
+from llm_cache import get_llm_cache
+from structured_output import output_stats
 
 from report_generator import generate_html_report
 
@@ -82,11 +85,88 @@ def run_keyword_strategy(page: dict) -> dict:
 
 
 # NOTE: Do not cache AI calls with cache_data permanently unless you want the same results.
-# We'll store AI results in session_state instead.
+# We'll store AI results in session_state instead (llm_cache keeps them across refreshes;
+# "Force regenerate" asks Azure for a new version).
 def get_session_key(prefix: str, page_id: str) -> str:
     return f"{prefix}_{page_id}"
 
 
+def collect_stream(events, render):
+    """
+    Consume a stream_* generator: render(partial) after every field / list item,
+    return the final result dict.
+    """
+    partial = {}
+    result = {}
+    live = st.empty()
+    for event in events:
+        if event[0] == "item":
+            partial.setdefault(event[1], []).append(event[2])
+        elif event[0] == "field":
+            partial[event[1]] = event[2]
+        else:
+            result = event[1]
+            continue
+        with live.container():
+            render(partial)
+    live.empty()
+    return result
+
+
+def render_seo_preview(partial: dict):
+    """Fields of the AI optimization as they stream in."""
+    if partial.get("optimized_title"):
+        st.markdown(f"### 🏷 {partial['optimized_title']}")
+    if partial.get("optimized_meta_description"):
+        st.write(partial["optimized_meta_description"])
+    if partial.get("optimized_intro"):
+        st.write(partial["optimized_intro"])
+    if partial.get("long_tail_keywords"):
+        show_keyword_chips(partial["long_tail_keywords"])
+    show_list(partial.get("ctas", []), icon="🎯")
+
+
+def render_engagement_preview(partial: dict):
+    """Sections of the engagement plan as they stream in."""
+    if partial.get("search_topics"):
+        st.markdown("**🔎 Topics users are searching for**")
+        show_list(partial["search_topics"], icon="🔍")
+    if partial.get("emotional_blog_titles"):
+        st.markdown("**🧠 Emotional Trigger Blog Titles**")
+        show_list(partial["emotional_blog_titles"], icon="🧠")
+    if partial.get("two_week_posting_schedule"):
+        st.markdown("**📅 2-Week Posting Schedule**")
+        st.dataframe(pd.DataFrame(partial["two_week_posting_schedule"]), use_container_width=True, hide_index=True)
+    if partial.get("engagement_hooks"):
+        st.markdown("**🎣 Engagement Hooks**")
+        show_list(partial["engagement_hooks"], icon="🎣")
+    if partial.get("conversion_ctas"):
+        st.markdown("**✅ Conversion CTAs**")
+        show_list(partial["conversion_ctas"], icon="✅")
+
+
+def render_combined_preview(partial: dict):
+    """Both results as they stream in from one request."""
+    render_seo_preview(partial)
+    render_engagement_preview(partial)
+
+
+def show_llm_cache_stats():
+    cache = get_llm_cache()
+    if cache is not None:
+        stats = cache.stats()
+        st.caption(
+            f"💾 Response cache: {stats['hits']} hits / {stats['misses']} misses "
+            f"({stats['entries']} saved responses)"
+        )
+    usage = output_stats.snapshot()
+    if usage["responses"]:
+        st.caption(
+            f"🧩 JSON output: {usage['repaired']} repaired, {usage['followups']} follow-ups, "
+            f"{usage['failed']} failed - {usage['wasted_rate']:.1%} of tokens wasted"
+        )
+
+
 # -----------------------------
 # Sidebar - Page Selection
 # -----------------------------
@@ -323,6 +403,25 @@ with tab3:
                 else:
                     st.write("—")
 
+        if get_keyword_index() is not None and extracted:
+            with st.container(border=True):
+                st.markdown("### 🔗 Related Keywords Across the Site")
+                chosen = st.selectbox("Keyword", [k["keyword"] for k in extracted], key="related_kw")
+                related = related_keywords(chosen, k=10)
+                if related:
+                    st.dataframe(
+                        pd.DataFrame(
+                            [
+                                {"Keyword": r["keyword"], "Similarity": r["similarity"], "Pages": ", ".join(r["pages"])}
+                                for r in related
+                            ]
+                        ),
+                        use_container_width=True,
+                        hide_index=True,
+                    )
+                else:
+                    st.info("No related keywords indexed yet.")
+
 
 # ============================================================
 # TAB 4: AI Optimization
@@ -334,10 +433,21 @@ with tab4:
     ai_key = get_session_key("ai_opt", page_id)
 
     # Generate button
+    force_ai = st.checkbox("♻️ Force regenerate (skip cached result)", key="force_ai_opt")
     if st.button("✨ Generate AI SEO Optimization"):
+        # fields are shown as the model writes them, then replaced by the full layout below
         with st.spinner("Generating optimized content..."):
-            st.session_state[ai_key] = generate_seo_optimization(selected_page)
+            st.session_state[ai_key] = collect_stream(
+                stream_seo_optimization(selected_page, force=force_ai), render_seo_preview
+            )
         st.success("AI optimization generated ✅")
+    if st.button("⚡ Generate optimization + engagement plan (one request)"):
+        # one prompt with the page context sent once; fills this tab and the Engagement Boost Plan tab
+        with st.spinner("Generating optimized content and engagement plan..."):
+            combined = collect_stream(stream_combined(selected_page, force=force_ai), render_combined_preview)
+        st.session_state[ai_key], st.session_state[get_session_key("eng_plan", page_id)] = split_combined(combined)
+        st.success("AI optimization and engagement plan generated ✅")
+    show_llm_cache_stats()
 
     # Display
     if ai_key in st.session_state:
@@ -348,6 +458,8 @@ with tab4:
             st.write(ai_result.get("raw_response", ""))
 
         else:
+            if ai_result.get("missing_fields"):
+                st.warning("Incomplete AI response, missing: " + ", ".join(ai_result["missing_fields"]))
             col1, col2 = st.columns([1.2, 1])
 
             # LEFT column: Title + Meta + Intro
@@ -393,9 +505,13 @@ with tab5:
 
     engage_key = get_session_key("eng_plan", page_id)
 
+    force_plan = st.checkbox("♻️ Force regenerate (skip cached result)", key="force_eng_plan")
     if st.button("🔥 Generate Engagement Plan"):
         with st.spinner("Generating engagement plan..."):
-            st.session_state[engage_key] = generate_engagement_boost_plan(selected_page)
+            st.session_state[engage_key] = collect_stream(
+                stream_engagement_boost_plan(selected_page, force=force_plan), render_engagement_preview
+            )
+    show_llm_cache_stats()
 
     if engage_key in st.session_state:
         plan = st.session_state[engage_key]
@@ -404,6 +520,8 @@ with tab5:
             st.error(plan["error"])
             st.write(plan.get("raw_response", ""))
         else:
+            if plan.get("missing_fields"):
+                st.warning("Incomplete AI response, missing: " + ", ".join(plan["missing_fields"]))
             col1, col2 = st.columns(2)
 
             with col1:
@@ -0,0 +1,109 @@
+# batch_audit.py
+# Batch SEO audit + scoring over many pages using a process pool
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+
+from seo_audit import audit_page
+from scoring import compute_seo_score
+
+
+def _audit_one(page: dict) -> tuple:
+    """
+    Audit + score a single page.
+    Errors are captured per page so one bad page doesn't stop the run.
+    """
+    page_id = page.get("page_id", "unknown") if isinstance(page, dict) else "unknown"
+    try:
+        audit = audit_page(page)
+        score = compute_seo_score(page, audit)
+        return page_id, audit, score
+    except Exception as e:
+        error = {"error": f"{type(e).__name__}: {e}"}
+        return page_id, error, error
+
+
+def _audit_chunk(pages: list) -> list:
+    """Worker entry point: one chunk of pages per task."""
+    return [_audit_one(page) for page in pages]
+
+
+def _chunks(items, size: int):
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def map_chunks(task, items, workers: int = None, chunk_size: int = 64, ordered: bool = True,
+               max_pending: int = None, initializer=None, initargs: tuple = ()):
+    """
+    Run task(chunk) -> list over items in chunks on a process pool and yield
+    the results one by one, streaming: only max_pending chunks are in flight.
+
+    - workers: number of processes (default: all cores). workers=1 runs in-process.
+    - chunk_size: items sent to a worker per task.
+    - ordered: yield in input order (deterministic). False yields as chunks finish.
+    - max_pending: chunks in flight at once (default: 2 x workers), keeps memory flat.
+    - initializer / initargs: run once per worker process (and once in-process
+      for workers=1), e.g. to receive a large shared object.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(items, max(1, chunk_size))
+
+    if workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for chunk in chunks:
+            yield from task(chunk)
+        return
+
+    max_pending = max_pending or workers * 2
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+        pending = deque()
+
+        # fill the window
+        for chunk in islice(chunks, max_pending):
+            pending.append(pool.submit(task, chunk))
+
+        try:
+            while pending:
+                if ordered:
+                    future = pending.popleft()
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    future = done.pop()
+                    pending.remove(future)
+                results = future.result()
+
+                # top up before yielding so workers stay busy
+                for chunk in islice(chunks, 1):
+                    pending.append(pool.submit(task, chunk))
+
+                yield from results
+        finally:
+            # caller stopped early: don't run the rest of the window
+            for future in pending:
+                future.cancel()
+
+
+def audit_pages(pages, workers: int = None, chunk_size: int = 64, ordered: bool = True,
+                max_pending: int = None):
+    """
+    Audit and score many pages.
+    Yields (page_id, audit, score) tuples as results come back.
+
+    - workers: number of processes (default: all cores). workers=1 runs in-process.
+    - chunk_size: pages sent to a worker per task.
+    - ordered: yield in input order (deterministic). False yields as chunks finish.
+    - max_pending: chunks in flight at once (default: 2 x workers), keeps memory flat.
+
+    If a page fails, audit and score are both {"error": "..."} for that page.
+    """
+    yield from map_chunks(_audit_chunk, pages, workers=workers, chunk_size=chunk_size, ordered=ordered,
+                          max_pending=max_pending)
@@ -0,0 +1,322 @@
+# bulk_generation.py
+# Async bulk generation of SEO optimizations / engagement plans under Azure OpenAI rate limits
+#
+# All requests of a run go through one RateLimiter: token buckets for requests
+# per minute and tokens per minute (a request is charged its estimated prompt +
+# expected completion tokens before it is sent, then settled with the real
+# usage), a concurrency cap, and a shared pause when the service answers 429
+# with Retry-After. Results come back in page order, as the same dicts the
+# one-page functions return.
+
+import asyncio
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import openai
+from dotenv import load_dotenv
+
+from ai_optimizer import SEO_OUTPUT, SEO_PROMPT_VERSION, SEO_TEMPERATURE, build_seo_messages
+from combined_generation import (
+    COMBINED_OUTPUT,
+    COMBINED_PROMPT_VERSION,
+    COMBINED_TEMPERATURE,
+    build_combined_messages,
+    split_combined,
+)
+from engagement_plan import (
+    ENGAGEMENT_OUTPUT,
+    ENGAGEMENT_PROMPT_VERSION,
+    ENGAGEMENT_TEMPERATURE,
+    build_engagement_messages,
+)
+from llm_cache import cache_key, cacheable, get_llm_cache
+from openai_helper import estimate_tokens, get_async_azure_openai_client
+from structured_output import acreate_chat, afinish_structured, request_kwargs, response_text, response_tokens
+
+load_dotenv()
+
+# budgets of the deployment (Azure quota) and client-side limits
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "300"))
+OPENAI_TPM = int(os.getenv("OPENAI_TPM", "50000"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "6"))
+
+# Azure checks quota over short windows, so the buckets only hold ~10 s worth
+BURST_SECONDS = 10
+
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+
+TASKS = {
+    "seo": {
+        "build": build_seo_messages,
+        "temperature": SEO_TEMPERATURE,
+        "version": SEO_PROMPT_VERSION,
+        "output": SEO_OUTPUT,
+        "output_tokens": 500,
+    },
+    "engagement": {
+        "build": build_engagement_messages,
+        "temperature": ENGAGEMENT_TEMPERATURE,
+        "version": ENGAGEMENT_PROMPT_VERSION,
+        "output": ENGAGEMENT_OUTPUT,
+        "output_tokens": 1200,
+    },
+    # both of the above in one request (split_combined() gives the two dicts)
+    "combined": {
+        "build": build_combined_messages,
+        "temperature": COMBINED_TEMPERATURE,
+        "version": COMBINED_PROMPT_VERSION,
+        "output": COMBINED_OUTPUT,
+        "output_tokens": 1700,
+    },
+}
+
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+
+# -----------------------------
+# Scheduler
+# -----------------------------
+class TokenBucket:
+    """Refills at per_minute / 60 per second, holds at most BURST_SECONDS worth."""
+
+    def __init__(self, per_minute: float, burst_seconds: float = BURST_SECONDS):
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount is available (amounts above capacity wait for a full bucket)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+    def give(self, amount: float):
+        """Return (or, if negative, charge) budget after the real usage is known."""
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    RPM + TPM budgets, a concurrency cap and a shared Retry-After pause.
+    Requests are admitted in arrival order. Create one per event loop and
+    share it between all runs against the same deployment.
+    """
+
+    def __init__(self, rpm: float = OPENAI_RPM, tpm: float = OPENAI_TPM,
+                 max_concurrency: int = OPENAI_MAX_CONCURRENCY):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._admission = asyncio.Lock()
+        self._paused_until = 0.0
+        self.stats = {
+            "requests": 0,
+            "cached": 0,
+            "retries": 0,
+            "throttled": 0,
+            "failed": 0,
+            "wait_seconds": 0.0,
+            "estimated_tokens": 0,
+            "used_tokens": 0,
+        }
+
+    async def acquire(self, tokens: int):
+        """Wait for a concurrency slot and for budget for one request of ~tokens."""
+        await self._slots.acquire()
+        try:
+            async with self._admission:
+                started = time.monotonic()
+                while True:
+                    now = time.monotonic()
+                    wait = max(
+                        self._paused_until - now,
+                        self.requests.wait_time(1, now),
+                        self.tokens.wait_time(tokens, now),
+                    )
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+                self.requests.take(1)
+                self.tokens.take(tokens)
+                self.stats["requests"] += 1
+                self.stats["wait_seconds"] += time.monotonic() - started
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, estimated: int, used: int = None):
+        """Free the slot; settle the token budget with the real usage when known."""
+        if used is not None:
+            self.tokens.give(estimated - used)
+            self.stats["estimated_tokens"] += estimated
+            self.stats["used_tokens"] += used
+        self._slots.release()
+
+    def pause(self, seconds: float):
+        """Hold every request back for seconds (429 / Retry-After)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def retry_after(error: Exception) -> float:
+    """Seconds from the Retry-After(-ms) headers of an API error, or None."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    return None
+
+
+def backoff(attempt: int) -> float:
+    """Exponential backoff with jitter."""
+    return min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+# -----------------------------
+# Bulk generation
+# -----------------------------
+async def _request(client, kwargs: dict, estimate: int, limiter: RateLimiter, max_retries: int) -> tuple:
+    """One chat request through the limiter, with retries. Returns (response, None) or (None, error)."""
+    error = None
+    for attempt in range(max_retries + 1):
+        await limiter.acquire(estimate)
+        used = None
+        try:
+            response = await acreate_chat(client, kwargs)
+            used = response.usage.total_tokens if response.usage else None
+            return response, None
+        except RETRYABLE_ERRORS as e:
+            error = e
+        except Exception as e:
+            # bad request, content filter, auth...: retrying won't help
+            return None, f"{type(e).__name__}: {e}"
+        finally:
+            limiter.release(estimate, used)
+
+        if attempt == max_retries:
+            break
+        limiter.stats["retries"] += 1
+        delay = retry_after(error)
+        if isinstance(error, openai.RateLimitError):
+            # the whole deployment is over quota: everyone waits
+            limiter.stats["throttled"] += 1
+            limiter.pause(delay if delay is not None else backoff(attempt))
+        else:
+            await asyncio.sleep(delay if delay is not None else backoff(attempt))
+
+    return None, f"Gave up after {max_retries + 1} attempts: {type(error).__name__}: {error}"
+
+
+async def _generate_one(client, deployment: str, page: dict, task: str, limiter: RateLimiter, max_retries: int,
+                        force: bool) -> dict:
+    spec = TASKS[task]
+    output = spec["output"]
+    messages = spec["build"](page)
+
+    cache = get_llm_cache()
+    key = cache_key(messages, deployment, spec["temperature"], spec["version"]) if cache is not None else None
+    if cache is not None and not force:
+        hit = cache.get(key)
+        if hit is not None:
+            limiter.stats["cached"] += 1
+            return hit
+
+    async def send(kwargs: dict):
+        response, _ = await _request(
+            client, kwargs, estimate_tokens(kwargs["messages"], spec["output_tokens"]), limiter, max_retries
+        )
+        return response
+
+    kwargs = request_kwargs(deployment, spec["temperature"], messages, output)
+    response, error = await _request(
+        client, kwargs, estimate_tokens(messages, spec["output_tokens"]), limiter, max_retries
+    )
+    if response is None:
+        limiter.stats["failed"] += 1
+        return output["fallback"](error)
+
+    # malformed output is repaired locally; only missing fields are requested again
+    text = response_text(response)
+    result = await afinish_structured(
+        send, deployment, spec["temperature"], messages, text, response_tokens(response, messages, text), output
+    )
+    if cache is not None and cacheable(result):
+        cache.put(key, task, result)
+    return result
+
+
+async def agenerate_bulk(pages: list[dict], task: str = "seo", limiter: RateLimiter = None, client=None,
+                         deployment: str = None, max_retries: int = OPENAI_MAX_RETRIES, on_result=None,
+                         force: bool = False) -> list[dict]:
+    """
+    Generate task ("seo", "engagement" or "combined") for every page concurrently.
+    Returns results in page order; a page that fails gets the usual fallback
+    dict with "error". on_result(index, page, result) is called as pages finish.
+    Pages with a cached result (llm_cache) are not sent unless force=True.
+    client / deployment default to a new AsyncAzureOpenAI client (closed at the end).
+    """
+    if task not in TASKS:
+        raise ValueError(f"Unknown task {task!r} (expected one of {sorted(TASKS)})")
+
+    limiter = limiter or RateLimiter()
+    own_client = client is None
+    if own_client:
+        client, deployment = get_async_azure_openai_client()
+
+    async def run(index: int, page: dict) -> dict:
+        result = await _generate_one(client, deployment, page, task, limiter, max_retries, force)
+        if on_result is not None:
+            on_result(index, page, result)
+        return result
+
+    try:
+        return list(await asyncio.gather(*(run(i, page) for i, page in enumerate(pages))))
+    finally:
+        if own_client:
+            await client.close()
+
+
+def generate_bulk(pages: list[dict], task: str = "seo", **options) -> list[dict]:
+    """Blocking wrapper around agenerate_bulk (for scripts; not inside a running loop)."""
+    return asyncio.run(agenerate_bulk(pages, task, **options))
+
+
+def bulk_seo_optimization(pages: list[dict], **options) -> list[dict]:
+    """generate_seo_optimization() for many pages."""
+    return generate_bulk(pages, "seo", **options)
+
+
+def bulk_engagement_boost_plans(pages: list[dict], **options) -> list[dict]:
+    """generate_engagement_boost_plan() for many pages."""
+    return generate_bulk(pages, "engagement", **options)
+
+
+def bulk_combined_generation(pages: list[dict], **options) -> list[tuple]:
+    """generate_combined() for many pages: (seo_result, engagement_plan) per page."""
+    return [split_combined(result) for result in generate_bulk(pages, "combined", **options)]
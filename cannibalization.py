@@ -0,0 +1,123 @@
+# cannibalization.py
+# Keyword cannibalization detector: which pages compete for the same keywords
+#
+# Pages are compared pairwise in row blocks, so memory stays bounded however
+# many pages there are (the full N x N matrix is never built):
+# - keyword overlap: sparse page x keyword matrix times its transpose
+# - intent similarity: cosine of page embeddings (title, primary + target keywords)
+
+import numpy as np
+from scipy import sparse
+
+# max bytes of one dense similarity block (rows x pages float32)
+MAX_BLOCK_BYTES = 64 * 1024 * 1024
+
+# a pair is reported when it shares this many keywords...
+MIN_SHARED_KEYWORDS = 1
+# ...or when the page embeddings are at least this similar
+SIMILARITY_THRESHOLD = 0.85
+
+
+def page_keywords(page: dict) -> set:
+    """Normalized primary + target keywords of a page."""
+    keywords = list(page.get("target_keywords", []) or [])
+    if page.get("primary_keyword"):
+        keywords.append(page["primary_keyword"])
+    return {" ".join(kw.lower().split()) for kw in keywords if kw and kw.strip()}
+
+
+def page_intent_text(page: dict) -> str:
+    """Short text that says what the page wants to rank for."""
+    parts = [page.get("title", ""), page.get("primary_keyword", ""), ", ".join(page.get("target_keywords", []) or [])]
+    return ". ".join(p for p in parts if p)
+
+
+def _keyword_matrix(keyword_sets: list[set]) -> sparse.csr_matrix:
+    vocab = {}
+    indptr = [0]
+    indices = []
+    for kws in keyword_sets:
+        indices.extend(vocab.setdefault(kw, len(vocab)) for kw in sorted(kws))
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.int32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(keyword_sets), len(vocab)))
+
+
+def _page_embeddings(pages: list[dict]) -> np.ndarray:
+    from keyword_engine import embed_texts
+
+    vectors = embed_texts([page_intent_text(p) for p in pages])
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def iter_competing_pairs(
+    pages: list[dict],
+    use_embeddings: bool = True,
+    min_shared: int = MIN_SHARED_KEYWORDS,
+    similarity_threshold: float = SIMILARITY_THRESHOLD,
+    max_block_bytes: int = MAX_BLOCK_BYTES,
+):
+    """
+    Yield competing page pairs, one row block at a time:
+    {"page_a", "page_b", "shared_keywords", "keyword_overlap", "similarity", "same_primary"}
+    keyword_overlap is the Jaccard index of the two keyword sets;
+    similarity is None when use_embeddings is False.
+    """
+    n = len(pages)
+    if n < 2:
+        return
+
+    ids = [p.get("page_id", str(i)) for i, p in enumerate(pages)]
+    keyword_sets = [page_keywords(p) for p in pages]
+    primaries = [" ".join((p.get("primary_keyword", "") or "").lower().split()) for p in pages]
+    sizes = [len(k) for k in keyword_sets]
+
+    matrix = _keyword_matrix(keyword_sets)
+    matrix_t = matrix.T.tocsc()
+    vectors = _page_embeddings(pages) if use_embeddings else None
+
+    block = max(1, max_block_bytes // (4 * n))
+    for start in range(0, n, block):
+        stop = min(n, start + block)
+        candidates = set()
+
+        # shared keywords (sparse: only pairs that share something)
+        shared = (matrix[start:stop] @ matrix_t).tocoo()
+        rows = shared.row + start
+        upper = (shared.col > rows) & (shared.data >= min_shared)
+        candidates.update(zip(rows[upper].tolist(), shared.col[upper].tolist()))
+
+        # similar intent (dense, upper triangle of this block only)
+        if vectors is not None:
+            sims = vectors[start:stop] @ vectors[start:].T
+            local_rows, cols = np.nonzero(sims >= similarity_threshold)
+            cols = cols + start
+            rows = local_rows + start
+            upper = cols > rows
+            candidates.update(zip(rows[upper].tolist(), cols[upper].tolist()))
+
+        for a, b in sorted(candidates):
+            common = keyword_sets[a] & keyword_sets[b]
+            count = len(common)
+            union = sizes[a] + sizes[b] - count
+            yield {
+                "page_a": ids[a],
+                "page_b": ids[b],
+                "shared_keywords": sorted(common),
+                "keyword_overlap": round(count / union, 4) if union else 0.0,
+                "similarity": round(float(vectors[a] @ vectors[b]), 4) if vectors is not None else None,
+                "same_primary": bool(primaries[a]) and primaries[a] == primaries[b],
+            }
+
+
+def find_cannibalization(pages: list[dict], use_embeddings: bool = True, top: int = None, **options) -> list[dict]:
+    """
+    Competing page pairs, worst first (same primary keyword, then most shared
+    keywords, then highest similarity). See iter_competing_pairs for options.
+    """
+    pairs = list(iter_competing_pairs(pages, use_embeddings=use_embeddings, **options))
+    pairs.sort(
+        key=lambda p: (p["same_primary"], len(p["shared_keywords"]), p["keyword_overlap"], p["similarity"] or 0),
+        reverse=True,
+    )
+    return pairs[:top] if top else pairs
@@ -0,0 +1,220 @@
+# combined_generation.py
+# SEO optimization + engagement plan from one Azure OpenAI request
+#
+# The two AI features send nearly the same page context in two prompts. Here
+# the page (name, keyword, content) is sent once and the model answers both
+# task lists in one flat JSON object; the field names of the two results don't
+# overlap, so repair, missing-field follow-ups and streaming work per field as
+# usual. split_combined() turns the answer back into the exact dicts
+# generate_seo_optimization / generate_engagement_boost_plan return.
+
+import time
+
+from ai_optimizer import SEO_OUTPUT, SEO_SCHEMA, build_seo_messages, generate_seo_optimization, seo_fallback
+from engagement_plan import (
+    ENGAGEMENT_OUTPUT,
+    ENGAGEMENT_SCHEMA,
+    SIMULATED_TRAFFIC_PATTERN,
+    build_engagement_messages,
+    engagement_fallback,
+    generate_engagement_boost_plan,
+)
+from json_stream import stream_chat_events
+from llm_cache import cached_generate, cached_stream
+from openai_helper import estimate_tokens, get_azure_openai_client
+from structured_output import (
+    create_chat,
+    finish_structured,
+    output_stats,
+    request_kwargs,
+    response_text,
+    response_tokens,
+)
+
+
+# bump when the prompt or the expected JSON changes (invalidates cached responses)
+COMBINED_PROMPT_VERSION = "1"
+# one request, one temperature: between the SEO (0.6) and engagement (0.7) settings
+COMBINED_TEMPERATURE = 0.65
+COMBINED_SYSTEM_PROMPT = "You are an SEO expert and growth strategist. You answer with JSON only."
+
+COMBINED_SCHEMA = {
+    "type": "object",
+    "properties": {**SEO_SCHEMA["properties"], **ENGAGEMENT_SCHEMA["properties"]},
+    "required": SEO_SCHEMA["required"] + ENGAGEMENT_SCHEMA["required"],
+    "additionalProperties": False
+}
+
+
+def combined_fallback(error: str, raw_text: str = "") -> dict:
+    """Empty combined result with an error (split_combined turns it into both fallbacks)."""
+    return {**seo_fallback(error, raw_text), **engagement_fallback(error, raw_text)}
+
+
+COMBINED_OUTPUT = {
+    "name": "seo_and_engagement",
+    "schema": COMBINED_SCHEMA,
+    "fallback": combined_fallback,
+    "error": "Model did not return valid JSON"
+}
+
+
+def build_combined_messages(page: dict) -> list[dict]:
+    """Chat messages for both tasks of one page, with the page context sent once."""
+    page_name = page.get("page_name", "")
+    primary_keyword = page.get("primary_keyword", "")
+    content = page.get("content", "")
+
+    prompt = f"""
+You work for DreamIT, an IT consulting services company: as SEO expert and conversion copywriter, and as
+digital marketing + SEO growth strategist (goal: more engagement, organic traffic and conversions).
+
+PAGE DETAILS:
+- Page Name: {page_name}
+- Primary Keyword: {primary_keyword}
+
+Existing Content:
+{content}
+
+SIMULATED TRAFFIC DATA:
+{SIMULATED_TRAFFIC_PATTERN}
+
+SEO TASKS:
+1) Rewrite a better SEO-friendly Title (max 65 characters).
+2) Write a better Meta Description (120-160 characters).
+3) Write a strong Intro paragraph (70-90 words).
+4) Suggest 8 long-tail keywords relevant to the page.
+5) Generate 3 high-converting CTAs (short).
+
+ENGAGEMENT TASKS:
+6) Suggest 8 content topics users are likely searching for (related to this service/blog).
+7) Suggest 10 blog post titles with emotional triggers (fear of missing out, urgency, curiosity, benefits).
+8) Recommend a posting schedule for 2 weeks (day + time slot). Use the traffic pattern.
+9) Suggest 5 engagement hooks (for intro lines / LinkedIn post opening).
+10) Suggest 3 short conversion CTAs.
+
+Return ONLY valid JSON (no explanation, no extra text) in this exact format:
+{{
+  "optimized_title": "",
+  "optimized_meta_description": "",
+  "optimized_intro": "",
+  "long_tail_keywords": [],
+  "ctas": [],
+  "search_topics": [],
+  "emotional_blog_titles": [],
+  "two_week_posting_schedule": [
+    {{
+      "day": "",
+      "time": "",
+      "content_type": "",
+      "title_idea": ""
+    }}
+  ],
+  "engagement_hooks": [],
+  "conversion_ctas": []
+}}
+"""
+
+    return [
+        {"role": "system", "content": COMBINED_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _part(result: dict, output: dict) -> dict:
+    """The fields of one task, in the shape its own generate function returns."""
+    if "error" in result:
+        return output["fallback"](result["error"], result.get("raw_response", ""))
+
+    keys = list(output["schema"]["properties"])
+    missing = [k for k in result.get("missing_fields", []) if k in keys]
+    if len(missing) == len(keys):
+        # nothing of this half came back
+        return output["fallback"](output["error"])
+    part = {k: result[k] for k in keys}
+    if missing:
+        part["missing_fields"] = missing
+    return part
+
+
+def split_combined(result: dict) -> tuple:
+    """Combined result -> (SEO optimization dict, engagement plan dict)."""
+    return _part(result, SEO_OUTPUT), _part(result, ENGAGEMENT_OUTPUT)
+
+
+def generate_combined(page: dict, force: bool = False) -> tuple:
+    """
+    generate_seo_optimization() and generate_engagement_boost_plan() for one
+    page in a single request. Returns (seo_result, engagement_plan).
+    """
+
+    client, deployment = get_azure_openai_client()
+    messages = build_combined_messages(page)
+
+    def generate():
+        response = create_chat(client, request_kwargs(deployment, COMBINED_TEMPERATURE, messages, COMBINED_OUTPUT))
+        text = response_text(response)
+        return finish_structured(
+            client, deployment, COMBINED_TEMPERATURE, messages, text, response_tokens(response, messages, text),
+            COMBINED_OUTPUT
+        )
+
+    result = cached_generate("combined", messages, deployment, COMBINED_TEMPERATURE, COMBINED_PROMPT_VERSION,
+                             generate, force=force)
+    return split_combined(result)
+
+
+def stream_combined(page: dict, force: bool = False):
+    """
+    Streaming version of generate_combined: yields ("item", key, value) and
+    ("field", key, value) for the fields of both results as the model writes
+    them, then ("result", dict) with the combined result (see split_combined).
+    """
+
+    client, deployment = get_azure_openai_client()
+    messages = build_combined_messages(page)
+
+    def stream():
+        return stream_chat_events(client, request_kwargs(deployment, COMBINED_TEMPERATURE, messages, COMBINED_OUTPUT))
+
+    def parse(raw_text: str, tokens: int) -> dict:
+        return finish_structured(client, deployment, COMBINED_TEMPERATURE, messages, raw_text, tokens, COMBINED_OUTPUT)
+
+    return cached_stream("combined", messages, deployment, COMBINED_TEMPERATURE, COMBINED_PROMPT_VERSION, stream,
+                         parse, force=force)
+
+
+def _timed(generate) -> dict:
+    tokens = output_stats.snapshot()["tokens"]
+    started = time.perf_counter()
+    generate()
+    return {
+        "seconds": round(time.perf_counter() - started, 3),
+        "tokens": output_stats.snapshot()["tokens"] - tokens,
+    }
+
+
+def measure_combined_savings(page: dict) -> dict:
+    """
+    Generate one page both ways (two requests vs one, cache skipped) and
+    compare tokens billed (incl. follow-ups) and wall time. Token counts come
+    from the process-wide output_stats, so run it while nothing else generates.
+    """
+    seo = _timed(lambda: generate_seo_optimization(page, force=True))
+    engagement = _timed(lambda: generate_engagement_boost_plan(page, force=True))
+    combined = _timed(lambda: generate_combined(page, force=True))
+
+    separate_tokens = seo["tokens"] + engagement["tokens"]
+    separate_seconds = round(seo["seconds"] + engagement["seconds"], 3)
+    return {
+        "page_id": page.get("page_id"),
+        "separate_input_tokens": (estimate_tokens(build_seo_messages(page))
+                                  + estimate_tokens(build_engagement_messages(page))),
+        "combined_input_tokens": estimate_tokens(build_combined_messages(page)),
+        "separate_tokens": separate_tokens,
+        "combined_tokens": combined["tokens"],
+        "token_savings": round(1 - combined["tokens"] / separate_tokens, 4) if separate_tokens else 0.0,
+        "separate_seconds": separate_seconds,
+        "combined_seconds": combined["seconds"],
+        "latency_savings": round(1 - combined["seconds"] / separate_seconds, 4) if separate_seconds else 0.0,
+    }
@@ -0,0 +1,199 @@
+# embedding_cache.py
+# Persistent on-disk embedding cache shared across processes and runs
+#
+# Vectors live in a memory-mapped float32 matrix (vectors.f32); the index
+# (content hash -> row, last use) is a small SQLite file next to it. When the
+# cache is full, the least recently used rows are reused.
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+_DIGEST_SIZE = 20  # sha1
+
+
+def content_key(text: str, namespace: str = "") -> bytes:
+    """Cache key for a text: sha1 of namespace (model / backend) + text."""
+    return hashlib.sha1(f"{namespace}\0{text}".encode("utf-8")).digest()
+
+
+class EmbeddingStore:
+    """
+    Size-bounded embedding cache in a directory.
+    Safe to share between processes: SQLite serializes writers, and each row
+    carries its owner key so a reader never returns a row that was reused
+    under it.
+    """
+
+    def __init__(self, path: str, dim: int, max_rows: int = 500_000):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+
+        # one connection per store, shared by threads (Streamlit runs sessions in threads)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(
+            os.path.join(path, "index.sqlite"), timeout=60, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key BLOB PRIMARY KEY, row INTEGER UNIQUE, last_used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+
+        # first process to open the cache fixes its shape
+        self._db.execute("BEGIN IMMEDIATE")
+        meta = dict(self._db.execute("SELECT name, value FROM meta").fetchall())
+        if not meta:
+            meta = {"dim": dim, "max_rows": max_rows}
+            self._db.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+        self._db.execute("COMMIT")
+
+        if meta["dim"] != dim:
+            raise ValueError(f"Embedding cache at {path} has dim {meta['dim']}, expected {dim}")
+
+        self.dim = meta["dim"]
+        self.max_rows = meta["max_rows"]
+
+        self._vectors = self._open_memmap("vectors.f32", np.float32, (self.max_rows, self.dim))
+        self._owners = self._open_memmap("owners.bin", np.uint8, (self.max_rows, _DIGEST_SIZE))
+
+    def _open_memmap(self, name: str, dtype, shape: tuple) -> np.memmap:
+        file = os.path.join(self.path, name)
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if not os.path.exists(file) or os.path.getsize(file) < size:
+            # sparse file of the full size; rows are filled as they are used
+            with open(file, "ab") as f:
+                f.truncate(size)
+        return np.memmap(file, dtype=dtype, mode="r+", shape=shape)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _rows(self, keys: list[bytes]) -> dict:
+        """key -> row for the keys present in the index."""
+        rows = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            rows.update(self._db.execute(f"SELECT key, row FROM entries WHERE key IN ({marks})", chunk).fetchall())
+        return rows
+
+    def get_many(self, keys: list[bytes]) -> tuple[np.ndarray, list[int]]:
+        """
+        Look up many keys.
+        Returns (matrix with found rows filled, indices of keys that were missing).
+        """
+        with self._lock:
+            return self._get_many(keys)
+
+    def _get_many(self, keys: list[bytes]) -> tuple[np.ndarray, list[int]]:
+        out = np.zeros((len(keys), self.dim), dtype=np.float32)
+        rows = self._rows(keys)
+
+        missing = []
+        used = []
+        for i, key in enumerate(keys):
+            row = rows.get(key)
+            if row is not None and self._owners[row].tobytes() == key:
+                out[i] = self._vectors[row]
+                # re-check: row may have been reused while copying
+                if self._owners[row].tobytes() == key:
+                    used.append(key)
+                    continue
+            missing.append(i)
+
+        if used:
+            now = time.time()
+            self._db.execute("BEGIN")
+            self._db.executemany("UPDATE entries SET last_used = ? WHERE key = ?", [(now, k) for k in used])
+            self._db.execute("COMMIT")
+
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        return out, missing
+
+    def put_many(self, keys: list[bytes], vectors: np.ndarray):
+        """Store vectors, evicting least recently used rows when the cache is full."""
+        with self._lock:
+            self._put_many(keys, vectors)
+
+    def _put_many(self, keys: list[bytes], vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        items = dict(zip(keys, vectors))  # dedupe
+        if not items:
+            return
+        items = list(items.items())[-self.max_rows:]
+
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            keys = [k for k, _ in items]
+            existing = self._rows(keys)
+            new_keys = [k for k in keys if k not in existing]
+
+            # rows 0..count-1 are always in use (evicted rows are reused at once),
+            # so fresh rows start at count; after that, take the least recently used
+            count = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            fresh = min(len(new_keys), self.max_rows - count)
+            rows = list(range(count, count + fresh))
+
+            need = len(new_keys) - fresh
+            if need > 0:
+                taken = set(existing.values())
+                victims = self._db.execute(
+                    "SELECT key, row FROM entries ORDER BY last_used LIMIT ?", (need + len(taken),)
+                ).fetchall()
+                victims = [(k, r) for k, r in victims if r not in taken][:need]
+                self._db.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _ in victims])
+                rows += [r for _, r in victims]
+
+            now = time.time()
+            assigned = dict(existing)
+            assigned.update(zip(new_keys, rows))
+            for key, vector in items:
+                row = assigned[key]
+                self._owners[row] = 0  # invalidate while the row is being rewritten
+                self._vectors[row] = vector
+                self._owners[row] = np.frombuffer(key, dtype=np.uint8)
+            self._vectors.flush()
+            self._owners.flush()
+
+            self._db.executemany(
+                "INSERT OR REPLACE INTO entries (key, row, last_used) VALUES (?, ?, ?)",
+                [(k, assigned[k], now) for k in keys],
+            )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def get_or_compute(self, texts: list[str], compute, namespace: str = "") -> np.ndarray:
+        """
+        Embeddings for texts, calling compute(missing_texts) only for texts not cached yet.
+        """
+        keys = [content_key(t, namespace) for t in texts]
+        out, missing = self.get_many(keys)
+        if missing:
+            # same text can appear more than once; compute it once
+            unique = list(dict.fromkeys(texts[i] for i in missing))
+            computed = dict(zip(unique, np.asarray(compute(unique), dtype=np.float32)))
+            for i in missing:
+                out[i] = computed[texts[i]]
+            self.put_many([content_key(t, namespace) for t in unique], [computed[t] for t in unique])
+        return out
+
+    def stats(self) -> dict:
+        return {"rows": len(self), "max_rows": self.max_rows, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._vectors.flush()
+            self._owners.flush()
+            self._db.close()
@@ -0,0 +1,236 @@
+# embedding_service.py
+# Local embedding service: one process owns the model, workers send texts over a Unix socket
+#
+# Requests from all connections are merged into micro-batches (up to
+# SERVICE_MAX_BATCH texts, or whatever arrived within SERVICE_MAX_WAIT_MS),
+# so many Streamlit sessions / batch workers share one copy of the weights and
+# get batched throughput. Start it with:  python embedding_service.py
+# and set EMBEDDING_SERVICE_SOCKET in the workers (keyword_engine picks it up).
+# Only serve() loads the model stack; the client needs numpy alone.
+#
+# Wire format (all integers big-endian):
+#   request:  u32 length + UTF-8 JSON list of texts
+#   response: u8 status, u32 rows, u32 dim + rows*dim float32 (little-endian)
+#             status 1 = error, followed by u32 length + UTF-8 message
+
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SERVICE_MAX_BATCH = int(os.getenv("SERVICE_MAX_BATCH", "256"))
+SERVICE_MAX_WAIT_MS = float(os.getenv("SERVICE_MAX_WAIT_MS", "5"))
+DEFAULT_SOCKET = os.getenv("EMBEDDING_SERVICE_SOCKET", "/tmp/dreamit-embeddings.sock")
+
+# texts per request sent by the client (larger calls are split)
+CLIENT_CHUNK_SIZE = 4096
+
+_HEADER = struct.Struct(">BII")
+_LENGTH = struct.Struct(">I")
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("Embedding service connection closed")
+        buf += chunk
+    return bytes(buf)
+
+
+# -----------------------------
+# Server
+# -----------------------------
+class MicroBatcher:
+    """
+    Collects embedding requests from many threads and runs them through
+    embed(texts) together. Duplicate texts in a batch are embedded once.
+    """
+
+    def __init__(self, embed, max_batch: int = SERVICE_MAX_BATCH, max_wait_ms: float = SERVICE_MAX_WAIT_MS):
+        self.embed = embed
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.texts = 0
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, texts: list[str]) -> np.ndarray:
+        request = {"texts": texts, "done": threading.Event(), "result": None, "error": None}
+        self._queue.put(request)
+        request["done"].wait()
+        if request["error"] is not None:
+            raise request["error"]
+        return request["result"]
+
+    def _collect(self) -> list[dict]:
+        batch = [self._queue.get()]
+        size = len(batch[0]["texts"])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request["texts"])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                unique = list(dict.fromkeys(t for r in batch for t in r["texts"]))
+                vectors = np.asarray(self.embed(unique), dtype=np.float32)
+                row = {t: i for i, t in enumerate(unique)}
+                for request in batch:
+                    request["result"] = vectors[[row[t] for t in request["texts"]]]
+                self.batches += 1
+                self.texts += len(unique)
+            except Exception as e:
+                for request in batch:
+                    request["error"] = e
+            finally:
+                for request in batch:
+                    request["done"].set()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def _send_error(self, error: Exception):
+        message = f"{type(error).__name__}: {error}".encode("utf-8")
+        self.request.sendall(_HEADER.pack(1, 0, 0) + _LENGTH.pack(len(message)) + message)
+
+    def handle(self):
+        sock = self.request
+        while True:
+            try:
+                (length,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+                payload = _recv_exact(sock, length)
+            except ConnectionError:
+                return
+
+            try:
+                # malformed request: the client gets an error, the connection stays usable
+                texts = json.loads(payload.decode("utf-8"))
+                if not isinstance(texts, list):
+                    raise ValueError("Expected a JSON list of texts")
+            except ValueError as e:  # includes JSONDecodeError / UnicodeDecodeError
+                self._send_error(e)
+                continue
+
+            try:
+                vectors = self.server.batcher.submit([str(t) for t in texts]) if texts else np.zeros((0, 0))
+                vectors = np.ascontiguousarray(vectors, dtype="<f4")
+                sock.sendall(_HEADER.pack(0, *vectors.shape) + vectors.tobytes())
+            except Exception as e:
+                self._send_error(e)
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    # many workers connect at once when a batch job starts
+    request_queue_size = 1024
+
+    def __init__(self, socket_path: str, batcher: MicroBatcher):
+        if os.path.exists(socket_path):
+            _remove_stale_socket(socket_path)
+        self.batcher = batcher
+        super().__init__(socket_path, _Handler)
+
+
+def _remove_stale_socket(socket_path: str):
+    """Remove a socket file left by a previous run; refuse if a server still answers on it."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.remove(socket_path)  # nobody listening: stale
+        return
+    finally:
+        probe.close()
+    raise OSError(f"An embedding service is already running on {socket_path}")
+
+
+def serve(socket_path: str = DEFAULT_SOCKET, max_batch: int = SERVICE_MAX_BATCH, max_wait_ms: float = SERVICE_MAX_WAIT_MS):
+    """Load the model once and serve embeddings until interrupted."""
+    from keyword_engine import embed_with_backend, load_local_embedder
+
+    backend = load_local_embedder()
+    batcher = MicroBatcher(lambda texts: embed_with_backend(backend, texts), max_batch, max_wait_ms)
+    with EmbeddingServer(socket_path, batcher) as server:
+        logger.info("Embedding service listening on %s", socket_path)
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(socket_path)
+
+
+# -----------------------------
+# Client
+# -----------------------------
+class EmbeddingClient:
+    """Thread-safe client (one connection per thread, reconnects once on failure)."""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, timeout: float = 120):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _request(self, texts: list[str]) -> np.ndarray:
+        payload = json.dumps(texts).encode("utf-8")
+        sock = self._connection()
+        sock.sendall(_LENGTH.pack(len(payload)) + payload)
+
+        status, rows, dim = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+        if status != 0:
+            (length,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+            raise RuntimeError(f"Embedding service error: {_recv_exact(sock, length).decode('utf-8')}")
+        data = _recv_exact(sock, rows * dim * 4)
+        return np.frombuffer(data, dtype="<f4").reshape(rows, dim).astype(np.float32)
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        texts = [str(t) for t in texts]
+        parts = []
+        for start in range(0, len(texts), CLIENT_CHUNK_SIZE):
+            chunk = texts[start:start + CLIENT_CHUNK_SIZE]
+            try:
+                parts.append(self._request(chunk))
+            except (ConnectionError, OSError):
+                # service restarted / idle connection dropped: retry on a new one
+                self._close()
+                parts.append(self._request(chunk))
+        return np.vstack(parts) if parts else np.zeros((0, 0), dtype=np.float32)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    serve()
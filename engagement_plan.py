@@ -1,9 +1,16 @@
 # engagement_plan.py
 # AI Powered Engagement Boost Plan
 
-import json
-import re
+from json_stream import stream_chat_events
+from llm_cache import cached_generate, cached_stream
 from openai_helper import get_azure_openai_client
+from structured_output import (
+    create_chat,
+    finish_structured,
+    request_kwargs,
+    response_text,
+    response_tokens,
+)
 
 
 # Simulated traffic data pattern (as required in assignment)
@@ -16,32 +23,44 @@ SIMULATED_TRAFFIC_PATTERN = {
 }
 
 
-def _extract_json(text: str) -> str:
-    """Extract JSON safely from model output."""
-    text = text.strip()
-    text = text.replace("```json", "").replace("```", "").strip()
-
-    if text.startswith("{") and text.endswith("}"):
-        return text
-
-    match = re.search(r"\{.*\}", text, re.DOTALL)
-    if match:
-        return match.group(0)
-
-    return text
-
-
-def generate_engagement_boost_plan(page: dict) -> dict:
-    """
-    Generates engagement strategy:
-    - content topics
-    - emotional blog titles
-    - posting schedule
-    - hooks & CTAs
-    """
+# bump when the prompt or the expected JSON changes (invalidates cached responses)
+ENGAGEMENT_PROMPT_VERSION = "2"
+ENGAGEMENT_TEMPERATURE = 0.7
+ENGAGEMENT_SYSTEM_PROMPT = "You generate actionable engagement and SEO strategies."
+
+# expected output (also sent as the response schema when OPENAI_RESPONSE_FORMAT=json_schema)
+_STRINGS = {"type": "array", "items": {"type": "string"}}
+ENGAGEMENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "search_topics": _STRINGS,
+        "emotional_blog_titles": _STRINGS,
+        "two_week_posting_schedule": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "day": {"type": "string"},
+                    "time": {"type": "string"},
+                    "content_type": {"type": "string"},
+                    "title_idea": {"type": "string"}
+                },
+                "required": ["day", "time", "content_type", "title_idea"],
+                "additionalProperties": False
+            }
+        },
+        "engagement_hooks": _STRINGS,
+        "conversion_ctas": _STRINGS
+    },
+    "required": [
+        "search_topics", "emotional_blog_titles", "two_week_posting_schedule", "engagement_hooks", "conversion_ctas"
+    ],
+    "additionalProperties": False
+}
 
-    client, deployment = get_azure_openai_client()
 
+def build_engagement_messages(page: dict) -> list[dict]:
+    """Chat messages for one page's engagement plan request."""
     page_name = page.get("page_name", "")
     primary_keyword = page.get("primary_keyword", "")
     content = page.get("content", "")
@@ -87,27 +106,75 @@ Return ONLY valid JSON in this exact format:
 }}
 """
 
-    response = client.chat.completions.create(
-        model=deployment,
-        temperature=0.7,
-        messages=[
-            {"role": "system", "content": "You generate actionable engagement and SEO strategies."},
-            {"role": "user", "content": prompt}
-        ]
-    )
-
-    raw_text = response.choices[0].message.content or ""
-    raw_text = _extract_json(raw_text)
-
-    try:
-        return json.loads(raw_text)
-    except json.JSONDecodeError:
-        return {
-            "search_topics": [],
-            "emotional_blog_titles": [],
-            "two_week_posting_schedule": [],
-            "engagement_hooks": [],
-            "conversion_ctas": [],
-            "error": "Model returned invalid JSON",
-            "raw_response": raw_text
-        }
+    return [
+        {"role": "system", "content": ENGAGEMENT_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def engagement_fallback(error: str, raw_text: str = "") -> dict:
+    """Empty plan with an error, so Streamlit doesn't crash."""
+    return {
+        "search_topics": [],
+        "emotional_blog_titles": [],
+        "two_week_posting_schedule": [],
+        "engagement_hooks": [],
+        "conversion_ctas": [],
+        "error": error,
+        "raw_response": raw_text
+    }
+
+
+ENGAGEMENT_OUTPUT = {
+    "name": "engagement_plan",
+    "schema": ENGAGEMENT_SCHEMA,
+    "fallback": engagement_fallback,
+    "error": "Model returned invalid JSON"
+}
+
+
+def generate_engagement_boost_plan(page: dict, force: bool = False) -> dict:
+    """
+    Generates engagement strategy:
+    - content topics
+    - emotional blog titles
+    - posting schedule
+    - hooks & CTAs
+    """
+
+    client, deployment = get_azure_openai_client()
+    messages = build_engagement_messages(page)
+
+    def generate():
+        response = create_chat(client, request_kwargs(deployment, ENGAGEMENT_TEMPERATURE, messages, ENGAGEMENT_OUTPUT))
+        text = response_text(response)
+        # repairs what it can and asks again only for missing fields
+        return finish_structured(
+            client, deployment, ENGAGEMENT_TEMPERATURE, messages, text, response_tokens(response, messages, text),
+            ENGAGEMENT_OUTPUT
+        )
+
+    # cached per page + prompt; force=True regenerates
+    return cached_generate("engagement", messages, deployment, ENGAGEMENT_TEMPERATURE, ENGAGEMENT_PROMPT_VERSION, generate, force=force)
+
+
+def stream_engagement_boost_plan(page: dict, force: bool = False):
+    """
+    Streaming version of generate_engagement_boost_plan: yields fields as soon
+    as the model has written them (search topics, each schedule entry...):
+      ("item", key, value)   one list element
+      ("field", key, value)  a complete field
+    and finally ("result", dict), the dict generate_engagement_boost_plan returns.
+    """
+
+    client, deployment = get_azure_openai_client()
+    messages = build_engagement_messages(page)
+
+    def stream():
+        return stream_chat_events(client, request_kwargs(deployment, ENGAGEMENT_TEMPERATURE, messages, ENGAGEMENT_OUTPUT))
+
+    def parse(raw_text: str, tokens: int) -> dict:
+        return finish_structured(client, deployment, ENGAGEMENT_TEMPERATURE, messages, raw_text, tokens, ENGAGEMENT_OUTPUT)
+
+    return cached_stream("engagement", messages, deployment, ENGAGEMENT_TEMPERATURE, ENGAGEMENT_PROMPT_VERSION, stream,
+                         parse, force=force)
@@ -0,0 +1,210 @@
+# incremental_audit.py
+# Paragraph-level incremental re-audit for pages that are edited a little at a time
+#
+# Each paragraph's partial statistics (words, keyword hits, sentence/syllable
+# counts, CTA hits) are cached by content hash. Re-auditing an edited page only
+# scans the paragraphs that changed, then merges everything into the same
+# dict audit_page() returns.
+
+import hashlib
+import re
+from collections import OrderedDict
+
+from phrase_matcher import compile_phrases, is_whole_word
+from readability import chunk_counts, merge_chunk_counts
+from scoring import compute_seo_score
+from seo_audit import (
+    audit_phrases,
+    clean_text,
+    engagement_from_scan,
+    headings_audit,
+    keyword_density_from_scan,
+    meta_quality,
+    readability_from_counts,
+    word_count,
+)
+
+# blank line(s) between paragraphs
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def split_paragraphs(content: str) -> list[str]:
+    return PARAGRAPH_BREAK.split(content)
+
+
+def paragraph_hash(paragraph: str) -> str:
+    return hashlib.sha1(paragraph.encode("utf-8")).hexdigest()
+
+
+def paragraph_stats(paragraph: str, phrases: tuple) -> dict:
+    """
+    Partial audit statistics for one paragraph.
+    Keyword hits are stored as whole-word match positions (not counts), so
+    overlapping matches can be resolved again after merging.
+    """
+    text = clean_text(paragraph)
+    matcher = compile_phrases(phrases)
+
+    found = set()
+    starts = {}
+    for phrase, start, end in matcher.iter_matches(text):
+        found.add(phrase)
+        if is_whole_word(text, start, end):
+            starts.setdefault(phrase, []).append(start)
+
+    return {
+        "hash": paragraph_hash(paragraph),
+        "clean": text,
+        "words": word_count(text),
+        "found": found,
+        "starts": starts,
+        "readability": chunk_counts(paragraph),
+    }
+
+
+def _neighbours(parts: list[dict], index: int, step: int, size: int) -> list[dict]:
+    """
+    Paragraphs from parts[index] towards step (-1 or 1) until they cover size
+    characters of the joined text (or the page ends). Returned in page order.
+    """
+    taken = []
+    length = -1
+    while 0 <= index < len(parts) and length < size:
+        taken.append(parts[index])
+        length += len(parts[index]["clean"]) + 1
+        index += step
+    return taken if step > 0 else taken[::-1]
+
+
+def _join_matches(matcher, before: list[str], after: list[str], max_len: int):
+    """
+    Matches that start in before[-1] and cross the space joining it to after[0].
+    before / after are cleaned paragraphs on each side of the join, enough of
+    them to cover max_len characters, so phrases over short paragraphs are found.
+    Yields (phrase, start_in_left, whole_word).
+    """
+    # one extra character per side for the whole-word check
+    tail = " ".join(before)[-(max_len + 1):]
+    window = tail + " " + " ".join(after)[:max_len + 1]
+    join = len(tail)
+    first = join - len(before[-1])
+    offset = len(before[-1]) - join
+
+    for phrase, start, end in matcher.iter_matches(window):
+        if first <= start <= join < end:
+            yield phrase, offset + start, is_whole_word(window, start, end)
+
+
+class IncrementalAuditor:
+    """
+    Keeps per-paragraph statistics between audits of the same (or similar) pages.
+    Use one instance per editor session / worker.
+    """
+
+    def __init__(self, max_paragraphs: int = 10_000):
+        # max cached entries (paragraphs and paragraph joins)
+        self.max_paragraphs = max_paragraphs
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, key, compute):
+        value = self._cache.get(key)
+        if value is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return value
+
+        self.misses += 1
+        value = compute()
+        self._cache[key] = value
+        if len(self._cache) > self.max_paragraphs:
+            self._cache.popitem(last=False)
+        return value
+
+    def _stats(self, paragraph: str, phrases: tuple) -> dict:
+        key = (paragraph_hash(paragraph), phrases)
+        return self._cached(key, lambda: paragraph_stats(paragraph, phrases))
+
+    def _join(self, before: list[dict], after: list[dict], phrases: tuple, matcher, max_len: int) -> list:
+        # joins between unchanged paragraphs are cached as well
+        key = (tuple(p["hash"] for p in before), tuple(p["hash"] for p in after), phrases)
+        return self._cached(key, lambda: list(_join_matches(
+            matcher, [p["clean"] for p in before], [p["clean"] for p in after], max_len
+        )))
+
+    def _merged_scan(self, paragraphs: list[dict], phrases: tuple) -> tuple[dict, str]:
+        """
+        Merge paragraph stats into the same scan dict PhraseMatcher.scan()
+        returns for the whole cleaned content.
+        """
+        matcher = compile_phrases(phrases)
+        max_len = max((len(p) for p in matcher.phrases), default=0)
+
+        parts = [p for p in paragraphs if p["clean"]]
+
+        words = 0
+        found = set()
+        positions = {}
+        offset = 0
+        for i, part in enumerate(parts):
+            words += part["words"]
+            found |= part["found"]
+            for phrase, starts in part["starts"].items():
+                positions.setdefault(phrase, []).extend(offset + s for s in starts)
+
+            if i + 1 < len(parts):
+                before = _neighbours(parts, i, -1, max_len + 1)
+                after = _neighbours(parts, i + 1, 1, max_len + 1)
+                for phrase, start, whole in self._join(before, after, phrases, matcher, max_len):
+                    found.add(phrase)
+                    if whole:
+                        positions.setdefault(phrase, []).append(offset + start)
+
+            offset += len(part["clean"]) + 1
+
+        # regex findall semantics: leftmost, non-overlapping
+        counts = {}
+        for phrase in matcher.phrases:
+            count = 0
+            last_end = 0
+            for start in sorted(positions.get(phrase, [])):
+                if start >= last_end:
+                    count += 1
+                    last_end = start + len(phrase)
+            counts[phrase] = count
+
+        content_clean = " ".join(p["clean"] for p in parts)
+        return {"word_count": words, "counts": counts, "found": found}, content_clean
+
+    def audit_page(self, page: dict) -> dict:
+        """
+        Same result as seo_audit.audit_page(page), recomputing only new paragraphs.
+        """
+        content = page.get("content", "")
+        title = page.get("title", "")
+        meta = page.get("meta_description", "")
+        headings = page.get("headings", {})
+        keywords = page.get("target_keywords", [])
+        cta = page.get("cta", "")
+
+        phrases = audit_phrases(keywords)
+        paragraphs = [self._stats(p, phrases) for p in split_paragraphs(content)]
+
+        scan, content_clean = self._merged_scan(paragraphs, phrases)
+        counts = merge_chunk_counts([p["readability"] for p in paragraphs], text_nonempty=len(content) > 0)
+
+        audit = {}
+
+        audit["keyword_density"] = keyword_density_from_scan(scan, keywords, content_clean)
+        audit["meta_quality"] = meta_quality(title, meta)
+        audit["headings_audit"] = headings_audit(headings)
+        audit["readability"] = readability_from_counts(counts)
+        audit["engagement"] = engagement_from_scan(scan, cta)
+
+        return audit
+
+    def audit_and_score(self, page: dict) -> tuple[dict, dict]:
+        """Incremental audit + compute_seo_score for an edited page."""
+        audit = self.audit_page(page)
+        return audit, compute_seo_score(page, audit)
@@ -0,0 +1,218 @@
+# json_repair.py
+# Tolerant JSON parser for model output that is almost, but not quite, JSON
+#
+# Accepts what models commonly get wrong: text or code fences around the
+# object, trailing / missing commas, smart or single quotes, raw newlines in
+# strings, Python literals, unquoted keys, and output cut off part-way. Open
+# strings, lists and objects at the cut are closed; a list element or value
+# that was cut off is dropped, and the top-level key it belonged to is
+# reported so the caller can ask for that field again.
+
+import json
+import re
+
+_NUMBER = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+_INTEGER = re.compile(r"-?\d+")
+_WORD = re.compile(r"[A-Za-z_]\w*")
+_LITERALS = {"true": True, "false": False, "null": None, "True": True, "False": False, "None": None}
+
+# opening quote -> closing quotes
+_QUOTES = {'"': '"', "“": "”\"", "”": "”\"", "„": "“”\"", "'": "'", "‘": "’'", "’": "’'"}
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+
+
+class _Incomplete(Exception):
+    """The text ended inside a value."""
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+        self.truncated = False
+        self.truncated_key = None
+
+    def _ws(self):
+        text, n = self.text, len(self.text)
+        while self.pos < n and text[self.pos].isspace():
+            self.pos += 1
+
+    def _eof(self) -> bool:
+        return self.pos >= len(self.text)
+
+    def _closes_here(self, pos: int) -> bool:
+        """A non-standard closing quote only counts if a delimiter (or the end) follows."""
+        rest = self.text[pos:].lstrip()
+        return not rest or rest[0] in ",:}]\n"
+
+    def string(self) -> str:
+        text, n = self.text, len(self.text)
+        quote = text[self.pos]
+        closers = _QUOTES[quote]
+        self.pos += 1
+        out = []
+        while self.pos < n:
+            c = text[self.pos]
+            if c == "\\":
+                if self.pos + 1 >= n:
+                    raise _Incomplete
+                e = text[self.pos + 1]
+                if e == "u":
+                    digits = text[self.pos + 2:self.pos + 6]
+                    if len(digits) < 4:
+                        raise _Incomplete
+                    try:
+                        out.append(chr(int(digits, 16)))
+                    except ValueError:
+                        out.append(digits)
+                    self.pos += 6
+                    continue
+                out.append(_ESCAPES.get(e, e))
+                self.pos += 2
+                continue
+            if c in closers and (quote == '"' or self._closes_here(self.pos + 1)):
+                self.pos += 1
+                # join 🚀 style surrogate pairs
+                return "".join(out).encode("utf-16", "surrogatepass").decode("utf-16", "replace")
+            out.append(c)
+            self.pos += 1
+        raise _Incomplete
+
+    def key(self) -> str:
+        if self.text[self.pos] in _QUOTES:
+            return self.string()
+        end = self.text.find(":", self.pos)
+        if end == -1:
+            raise _Incomplete
+        key = self.text[self.pos:end].strip()
+        self.pos = end
+        return key
+
+    def value(self, depth: int):
+        text = self.text
+        c = text[self.pos]
+        if c == "{":
+            return self.object(depth)
+        if c == "[":
+            return self.array(depth)
+        if c in _QUOTES:
+            return self.string()
+
+        match = _NUMBER.match(text, self.pos)
+        if match:
+            if match.end() == len(text):
+                raise _Incomplete  # may have been cut mid-number
+            self.pos = match.end()
+            number = match.group()
+            return int(number) if _INTEGER.fullmatch(number) else float(number)
+
+        match = _WORD.match(text, self.pos)
+        if match and match.group() in _LITERALS:
+            self.pos = match.end()
+            return _LITERALS[match.group()]
+        if match and match.end() == len(text) and any(lit.startswith(match.group()) for lit in _LITERALS):
+            raise _Incomplete
+
+        # unquoted text: up to the next delimiter
+        end = self.pos
+        while end < len(text) and text[end] not in ",}]\n":
+            end += 1
+        if end == len(text):
+            raise _Incomplete
+        value = text[self.pos:end].strip()
+        self.pos = end
+        return value
+
+    def object(self, depth: int) -> dict:
+        self.pos += 1
+        obj = {}
+        while True:
+            self._ws()
+            if self._eof():
+                self.truncated = True
+                return obj
+            c = self.text[self.pos]
+            if c in "}]":  # "]" closes a mismatched bracket
+                self.pos += 1
+                return obj
+            if c == ",":
+                self.pos += 1
+                continue
+
+            try:
+                key = self.key()
+            except _Incomplete:
+                self.truncated = True
+                return obj
+            self._ws()
+            if not self._eof() and self.text[self.pos] in ":=":
+                self.pos += 1
+                self._ws()
+            if self._eof():
+                self.truncated = True
+                return obj
+
+            try:
+                value = self.value(depth + 1)
+            except _Incomplete:
+                self.truncated = True
+                if depth == 1:
+                    self.truncated_key = key
+                return obj
+            obj[key] = value
+            if self.truncated:
+                # a list / object value cut off part-way: keep what was complete
+                if depth == 1:
+                    self.truncated_key = key
+                return obj
+
+    def array(self, depth: int) -> list:
+        self.pos += 1
+        arr = []
+        while True:
+            self._ws()
+            if self._eof():
+                self.truncated = True
+                return arr
+            c = self.text[self.pos]
+            if c in "]}":
+                self.pos += 1
+                return arr
+            if c == ",":
+                self.pos += 1
+                continue
+
+            try:
+                value = self.value(depth + 1)
+            except _Incomplete:
+                self.truncated = True
+                return arr
+            if self.truncated:
+                return arr  # the element was cut off: drop it
+            arr.append(value)
+
+
+def repair_json(text: str) -> tuple:
+    """
+    Best-effort parse of the first JSON object in text.
+    Returns (value, info): value is None when there is no object at all;
+    info = {"repaired": the text was not valid JSON as-is,
+            "truncated": the text ended inside the object,
+            "truncated_key": top-level key whose value was cut off (or None)}.
+    """
+    info = {"repaired": False, "truncated": False, "truncated_key": None}
+    start = text.find("{")
+    if start == -1:
+        return None, info
+
+    try:
+        value, _ = json.JSONDecoder().raw_decode(text, start)
+        return value, info
+    except json.JSONDecodeError:
+        pass
+
+    parser = _Parser(text)
+    parser.pos = start
+    value = parser.object(1)
+    info.update(repaired=True, truncated=parser.truncated, truncated_key=parser.truncated_key)
+    return value, info
@@ -0,0 +1,157 @@
+# json_stream.py
+# Incremental JSON parsing of streamed model output: fields are usable as soon as they are complete
+#
+# The model answers with one JSON object. IncrementalJSONParser is fed the text
+# as it streams in and reports each top-level field the moment its value is
+# closed, and each element of a top-level list as soon as it is complete
+# (so the first CTA shows up before the last one is written). Text around the
+# object (```json fences, chatter) is ignored.
+
+import json
+
+from openai_helper import count_tokens, estimate_tokens
+from structured_output import create_chat
+
+
+class IncrementalJSONParser:
+    """
+    feed(chunk) -> new events:
+      ("item", key, value)   one complete element of the list at key
+      ("field", key, value)  the complete value of key
+    Values that don't parse (malformed output) are skipped; `fields` holds
+    everything parsed so far and `text` the raw output.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.fields = {}
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect = "key"  # top level: key -> colon -> value -> after
+        self._key = None
+        self._value_start = None
+        self._array = False
+        self._item_start = None
+
+    def _emit_field(self, raw: str, events: list):
+        self._expect = "after"
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        self.fields[self._key] = value
+        events.append(("field", self._key, value))
+
+    def _emit_item(self, raw: str, events: list):
+        self._item_start = None
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        events.append(("item", self._key, value))
+
+    def feed(self, chunk: str) -> list[tuple]:
+        self.text += chunk
+        text = self.text
+        events = []
+
+        for i in range(self._pos, len(text)):
+            if self.done:
+                break
+            c = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        if self._expect == "key":
+                            self._key = json.loads(text[self._string_start:i + 1])
+                            self._expect = "colon"
+                        elif self._expect == "value":
+                            self._emit_field(text[self._value_start:i + 1], events)
+                continue
+
+            if c.isspace():
+                continue
+            if self._depth == 0:
+                if c == "{":
+                    self._depth = 1
+                continue
+            if self._depth == 1 and self._expect == "colon":
+                if c == ":":
+                    self._expect = "value"
+                    self._value_start = None
+                continue
+
+            # first character of a top-level value / of a list element
+            if self._depth == 1 and self._expect == "value" and self._value_start is None:
+                self._value_start = i
+                self._array = c == "["
+                self._item_start = None
+            elif self._depth == 2 and self._array and self._item_start is None and c not in ",]":
+                self._item_start = i
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                if self._depth == 2 and self._array and c == "]" and self._item_start is not None:
+                    self._emit_item(text[self._item_start:i], events)
+                self._depth -= 1
+                if self._depth == 1 and self._expect == "value":
+                    self._emit_field(text[self._value_start:i + 1], events)
+                elif self._depth == 0:
+                    if self._expect == "value" and self._value_start is not None:
+                        self._emit_field(text[self._value_start:i], events)
+                    self.done = True
+            elif c == ",":
+                if self._depth == 1:
+                    if self._expect == "value" and self._value_start is not None:
+                        self._emit_field(text[self._value_start:i], events)
+                    self._expect = "key"
+                elif self._depth == 2 and self._array and self._item_start is not None:
+                    self._emit_item(text[self._item_start:i], events)
+
+        self._pos = len(text)
+        return events
+
+
+def replay_events(result: dict):
+    """The events a stream would have produced for an already complete result."""
+    for key, value in result.items():
+        if isinstance(value, list):
+            for item in value:
+                yield ("item", key, item)
+        yield ("field", key, value)
+
+
+def stream_chat_events(client, kwargs: dict):
+    """
+    Stream a chat completion (structured_output.request_kwargs) through
+    IncrementalJSONParser. Yields parser events, then ("done", raw_text, tokens)
+    once the stream ends (tokens estimated unless the service reports usage).
+    """
+    stream = create_chat(client, {**kwargs, "stream": True})
+    parser = IncrementalJSONParser()
+    tokens = None
+    for chunk in stream:
+        if getattr(chunk, "usage", None) is not None:
+            tokens = chunk.usage.total_tokens
+        if not chunk.choices:
+            continue  # Azure sends content-filter results without choices
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield from parser.feed(delta)
+    if tokens is None:
+        tokens = estimate_tokens(kwargs["messages"]) + count_tokens(parser.text)
+    yield ("done", parser.text, tokens)
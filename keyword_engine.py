@@ -1,12 +1,238 @@
 # keyword_engine.py
 # Keyword Strategy Engine using KeyBERT + simulated trending keywords + clustering
 
-from keybert import KeyBERT
+import atexit
+import os
+import threading
+from functools import lru_cache
 
+import numpy as np
+from dotenv import load_dotenv
+
+from embedding_cache import EmbeddingStore
+from phrase_matcher import PhraseMatcher
+
+load_dotenv()
 
-# load model once (very important)
 # "all-MiniLM-L6-v2" is lightweight + fast
-kw_model = KeyBERT(model="all-MiniLM-L6-v2")
+KEYBERT_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# candidate phrase settings (same for single and batch extraction)
+KEYPHRASE_NGRAM_RANGE = (1, 3)  # unigrams to trigrams
+STOP_WORDS = "english"
+
+# texts per forward pass when embedding in bulk
+EMBED_BATCH_SIZE = 256
+
+# Embedding backend: "torch" (sentence-transformers) or "onnx" (int8-quantized,
+# onnxruntime on CPU; export the model once with onnx_backend.export_onnx_model)
+KEYBERT_BACKEND = os.getenv("KEYBERT_BACKEND", "torch").lower()
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join("models", f"{KEYBERT_MODEL_NAME}-int8"))
+
+# Shared embedding service (embedding_service.py): when set, this process
+# doesn't load the model and sends embedding requests to the Unix socket
+EMBEDDING_SERVICE_SOCKET = os.getenv("EMBEDDING_SERVICE_SOCKET")
+
+# Extraction engine for keyword_strategy_for_page: "keybert" (MiniLM embeddings)
+# or "tfidf" (statistical_keywords.py: corpus TF-IDF, no neural model).
+# The TF-IDF table is loaded from TFIDF_MODEL_PATH, or built from pages_data once.
+KEYWORD_ENGINE = os.getenv("KEYWORD_ENGINE", "keybert").lower()
+TFIDF_MODEL_PATH = os.getenv("TFIDF_MODEL_PATH")
+
+# Long pages: the model only sees a few hundred tokens, so pages longer than
+# LONG_DOC_MIN_WORDS are embedded as overlapping windows (0 disables this)
+LONG_DOC_WINDOW_WORDS = 180
+LONG_DOC_OVERLAP_WORDS = 40
+LONG_DOC_MIN_WORDS = int(os.getenv("LONG_DOC_MIN_WORDS", "400"))
+
+# On-disk embedding cache shared across processes / runs (disabled if not set)
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR")
+EMBEDDING_CACHE_MAX_ROWS = int(os.getenv("EMBEDDING_CACHE_MAX_ROWS", "500000"))
+
+# Site-wide related-keyword index (keyword_index.py; disabled if not set)
+KEYWORD_INDEX_DIR = os.getenv("KEYWORD_INDEX_DIR")
+
+# Real trend data (trend_store.py; the simulated lists below are used if not set)
+TREND_STORE_DIR = os.getenv("TREND_STORE_DIR")
+TRENDING_LIMIT = 5
+
+# Long-tail queries mined from search-query logs (query_log_miner.py; the
+# rule-based templates are used if not set)
+QUERY_LOG_INDEX_DIR = os.getenv("QUERY_LOG_INDEX_DIR")
+LONG_TAIL_LIMIT = 6
+
+# Clustering / page category: "substring" (term rules) or "semantic" (nearest
+# seed-term centroid, see semantic_clusters.py; below the threshold -> "Other")
+CLUSTER_MODE = os.getenv("CLUSTER_MODE", "substring").lower()
+SEMANTIC_CLUSTER_THRESHOLD = float(os.getenv("SEMANTIC_CLUSTER_THRESHOLD", "0.35"))
+
+# Model is loaded lazily on first use (once per process), so importing this
+# module doesn't pull in torch / sentence-transformers for audit-only workers.
+# KeyBERT (and with it torch) is only imported for the torch backend; the other
+# backends embed directly and score candidates with extract_keywords_batch.
+_kw_model = None
+_kw_model_lock = threading.Lock()
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def load_local_kw_model():
+    """A new KeyBERT model (sentence-transformers / torch) running in this process."""
+    from keybert import KeyBERT
+    return KeyBERT(model=KEYBERT_MODEL_NAME)
+
+
+def load_local_embedder():
+    """A new embedding backend for KEYBERT_BACKEND running in this process (has .embed(texts))."""
+    if KEYBERT_BACKEND == "onnx":
+        from onnx_backend import OnnxEmbedder
+        return OnnxEmbedder(ONNX_MODEL_DIR)
+    return load_local_kw_model().model
+
+
+def _uses_keybert() -> bool:
+    return KEYBERT_BACKEND == "torch" and not EMBEDDING_SERVICE_SOCKET
+
+
+def get_kw_model():
+    """Return the shared KeyBERT model (torch backend), loading it on first call (thread-safe)."""
+    global _kw_model
+    if _kw_model is None:
+        with _kw_model_lock:
+            if _kw_model is None:
+                _kw_model = load_local_kw_model()
+    return _kw_model
+
+
+def get_embedder():
+    """Return the shared embedding backend, loading it on first call (thread-safe)."""
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                if EMBEDDING_SERVICE_SOCKET:
+                    from embedding_service import EmbeddingClient
+                    _embedder = EmbeddingClient(EMBEDDING_SERVICE_SOCKET)
+                elif KEYBERT_BACKEND == "torch":
+                    _embedder = get_kw_model().model
+                else:
+                    _embedder = load_local_embedder()
+    return _embedder
+
+
+def embedding_namespace() -> str:
+    """Cache namespace: vectors from different backends are not mixed."""
+    if KEYBERT_BACKEND == "onnx":
+        return f"{KEYBERT_MODEL_NAME}:onnx-int8"
+    return KEYBERT_MODEL_NAME
+
+
+_embedding_store = None
+_embedding_store_lock = threading.Lock()
+
+
+def get_embedding_store():
+    """Shared EmbeddingStore, or None when EMBEDDING_CACHE_DIR is not set."""
+    global _embedding_store
+    if EMBEDDING_CACHE_DIR and _embedding_store is None:
+        with _embedding_store_lock:
+            if _embedding_store is None:
+                dim = _embed_with_model(["dimension probe"]).shape[1]
+                _embedding_store = EmbeddingStore(EMBEDDING_CACHE_DIR, dim=dim, max_rows=EMBEDDING_CACHE_MAX_ROWS)
+    return _embedding_store
+
+
+_tfidf_model = None
+_tfidf_model_lock = threading.Lock()
+
+
+def get_tfidf_model():
+    """Shared TfidfKeywordModel (loaded from TFIDF_MODEL_PATH or built from the site pages)."""
+    global _tfidf_model
+    if _tfidf_model is None:
+        with _tfidf_model_lock:
+            if _tfidf_model is None:
+                from statistical_keywords import TfidfKeywordModel
+                if TFIDF_MODEL_PATH and os.path.exists(TFIDF_MODEL_PATH):
+                    _tfidf_model = TfidfKeywordModel.load(TFIDF_MODEL_PATH)
+                else:
+                    from pages_data import dreamit_pages
+                    _tfidf_model = TfidfKeywordModel.fit([p.get("content", "") for p in dreamit_pages])
+                    if TFIDF_MODEL_PATH:
+                        _tfidf_model.save(TFIDF_MODEL_PATH)
+    return _tfidf_model
+
+
+_trend_store = None
+_trend_store_lock = threading.Lock()
+
+
+def get_trend_store():
+    """Shared TrendStore, or None when TREND_STORE_DIR is not set."""
+    global _trend_store
+    if TREND_STORE_DIR and _trend_store is None:
+        with _trend_store_lock:
+            if _trend_store is None:
+                from trend_store import TrendStore
+                _trend_store = TrendStore(TREND_STORE_DIR)
+    return _trend_store
+
+
+_query_miner = None
+_query_miner_lock = threading.Lock()
+
+
+def get_query_miner():
+    """Shared QueryLogMiner index, or None when QUERY_LOG_INDEX_DIR is not set."""
+    global _query_miner
+    if QUERY_LOG_INDEX_DIR and _query_miner is None:
+        with _query_miner_lock:
+            if _query_miner is None:
+                from query_log_miner import QueryLogMiner
+                _query_miner = QueryLogMiner.load(QUERY_LOG_INDEX_DIR)
+    return _query_miner
+
+
+_keyword_index = None
+_keyword_index_lock = threading.Lock()
+
+
+def get_keyword_index():
+    """Shared KeywordIndex, or None when KEYWORD_INDEX_DIR is not set."""
+    global _keyword_index
+    if KEYWORD_INDEX_DIR and _keyword_index is None:
+        with _keyword_index_lock:
+            if _keyword_index is None:
+                from keyword_index import KeywordIndex
+                _keyword_index = KeywordIndex(KEYWORD_INDEX_DIR)
+                # maybe_save() is throttled: write what is left when the process ends
+                atexit.register(_keyword_index.flush)
+    return _keyword_index
+
+
+def flush_keyword_index():
+    """Save pending keyword-index changes (call when a batch of pages is done)."""
+    if _keyword_index is not None:
+        _keyword_index.flush()
+
+
+def related_keywords(keyword: str, k: int = 10):
+    """
+    Keywords extracted anywhere on the site that are similar to keyword.
+    Returns [{"keyword", "similarity", "pages"}, ...] ([] when the index is off).
+    """
+    index = get_keyword_index()
+    if index is None:
+        return []
+    return index.query(keyword, k=k)
+
+
+def warm_up():
+    """
+    Load the model and run one tiny extraction, so the first real request
+    doesn't pay the load time. Call it at worker / app startup if needed.
+    """
+    extract_keywords_keybert("power bi dashboard services", top_n=1)
 
 
 # Simulated trending keywords (you can expand this list)
@@ -78,22 +304,191 @@ def extract_keywords_keybert(text: str, top_n: int = 10):
     if not text or len(text.strip()) == 0:
         return []
 
-    keywords = kw_model.extract_keywords(
+    if not _uses_keybert():
+        # same scoring as KeyBERT (candidate vs document cosine), without loading torch
+        return extract_keywords_batch([text], top_n=top_n)[0]
+
+    options = {}
+    if get_embedding_store() is not None:
+        # look document + candidate embeddings up in the cache first
+        from sklearn.feature_extraction.text import CountVectorizer
+        try:
+            count = CountVectorizer(ngram_range=KEYPHRASE_NGRAM_RANGE, stop_words=STOP_WORDS).fit([text])
+        except ValueError:
+            return []
+        options["doc_embeddings"] = embed_texts([text])
+        options["word_embeddings"] = embed_texts(list(count.get_feature_names_out()))
+
+    keywords = get_kw_model().extract_keywords(
         text,
-        keyphrase_ngram_range=(1, 3),  # unigrams to trigrams
-        stop_words="english",
-        top_n=top_n
+        keyphrase_ngram_range=KEYPHRASE_NGRAM_RANGE,
+        stop_words=STOP_WORDS,
+        top_n=top_n,
+        **options
     )
 
     # Convert into clean format
     return [{"keyword": kw, "score": round(score, 4)} for kw, score in keywords]
 
 
-def guess_page_category(page: dict):
+def embed_with_backend(backend, texts: list[str]) -> np.ndarray:
+    """Embed texts with an embedding backend, in EMBED_BATCH_SIZE batches when possible."""
+    encoder = getattr(backend, "embedding_model", None)
+    if hasattr(encoder, "encode"):
+        # sentence-transformers: use a bigger batch than the KeyBERT default
+        vectors = encoder.encode(list(texts), batch_size=EMBED_BATCH_SIZE, show_progress_bar=False)
+    else:
+        vectors = backend.embed(list(texts))
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def _embed_with_model(texts: list[str]) -> np.ndarray:
+    return embed_with_backend(get_embedder(), texts)
+
+
+def embed_texts(texts: list[str]) -> np.ndarray:
     """
-    Decide the category of the page to give trending keywords.
-    Uses primary_keyword or page_id.
+    Embed many texts with the shared model in large batches.
+    Texts already in the embedding cache are not sent to the model.
+    Returns a (len(texts), dim) float32 matrix.
+    """
+    store = get_embedding_store()
+    if store is None:
+        return _embed_with_model(texts)
+    return store.get_or_compute(list(texts), _embed_with_model, namespace=embedding_namespace())
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def extract_keywords_batch(texts: list[str], top_n: int = 10, batch_size: int = 64, embed=None):
+    """
+    KeyBERT-style extraction for many documents at once.
+    Each group of batch_size documents shares one candidate vocabulary:
+    documents and the deduplicated candidate phrases are embedded in bulk,
+    then every document is scored with one matrix product.
+    embed(texts) -> matrix defaults to embed_texts (the shared backend).
+    Returns one list per text, same format as extract_keywords_keybert.
+    """
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    embed = embed or embed_texts
+    results = [[] for _ in texts]
+    if top_n < 1:
+        return results
+    todo = [i for i, text in enumerate(texts) if text and len(text.strip()) > 0]
+
+    for start in range(0, len(todo), batch_size):
+        group = todo[start:start + batch_size]
+        docs = [texts[i] for i in group]
+
+        try:
+            count = CountVectorizer(ngram_range=KEYPHRASE_NGRAM_RANGE, stop_words=STOP_WORDS).fit(docs)
+        except ValueError:
+            # only stop words in the whole group
+            continue
+
+        words = count.get_feature_names_out()
+        doc_terms = count.transform(docs).tocsr()
+
+        doc_embeddings = _normalize(embed(docs))
+        word_embeddings = _normalize(embed(list(words)))
+
+        # cosine similarity of every doc against the shared vocabulary
+        similarity = doc_embeddings @ word_embeddings.T
+
+        for row, i in enumerate(group):
+            candidates = doc_terms[row].indices
+            if len(candidates) == 0:
+                continue
+            scores = similarity[row, candidates]
+            best = np.argsort(scores)[-top_n:][::-1]
+            results[i] = [
+                {"keyword": str(words[candidates[j]]), "score": round(float(scores[j]), 4)}
+                for j in best
+            ]
+
+    return results
+
+
+def split_windows(
+    text: str, window_words: int = LONG_DOC_WINDOW_WORDS, overlap_words: int = LONG_DOC_OVERLAP_WORDS
+) -> list[str]:
+    """Overlapping word windows covering the whole text (one window if it is short)."""
+    words = text.split()
+    if len(words) <= window_words:
+        return [" ".join(words)]
+    step = window_words - overlap_words
+    return [" ".join(words[s:s + window_words]) for s in range(0, len(words) - overlap_words, step)]
+
+
+def extract_keywords_long_batch(texts: list[str], top_n: int = 10):
     """
+    Keyword extraction for long documents.
+    Every document is split into overlapping windows; the windows of all
+    documents are embedded in one batch and pooled (length-weighted mean)
+    into a document vector. A candidate's score is the average of its
+    similarity to the pooled document and to the best window it occurs in.
+    Returns one list per text, same format as extract_keywords_keybert.
+    """
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    results = [[] for _ in texts]
+    if top_n < 1:
+        return results
+    todo = [i for i, text in enumerate(texts) if text and len(text.strip()) > 0]
+    windows = {i: split_windows(texts[i]) for i in todo}
+
+    # candidates per document; the union is embedded once
+    vocab = {}
+    for i in todo:
+        try:
+            count = CountVectorizer(ngram_range=KEYPHRASE_NGRAM_RANGE, stop_words=STOP_WORDS).fit(windows[i])
+        except ValueError:
+            # only stop words
+            continue
+        vocab[i] = (count.get_feature_names_out(), count.transform(windows[i]).tocsc())
+    if not vocab:
+        return results
+
+    docs = list(vocab)
+    flat_windows = [w for i in docs for w in windows[i]]
+    window_embeddings = _normalize(embed_texts(flat_windows))
+
+    candidates = list(dict.fromkeys(str(w) for i in docs for w in vocab[i][0]))
+    candidate_row = {c: row for row, c in enumerate(candidates)}
+    candidate_embeddings = _normalize(embed_texts(candidates))
+
+    start = 0
+    for i in docs:
+        words, presence = vocab[i]
+        vectors = window_embeddings[start:start + len(windows[i])]
+        start += len(windows[i])
+
+        lengths = np.array([len(w.split()) for w in windows[i]], dtype=np.float32)
+        doc_vector = _normalize((vectors * lengths[:, None]).sum(axis=0, keepdims=True))[0]
+
+        cands = candidate_embeddings[[candidate_row[str(w)] for w in words]]
+        doc_sim = cands @ doc_vector
+
+        # best window similarity, only over windows that contain the candidate
+        window_sim = np.where(presence.toarray() > 0, vectors @ cands.T, -np.inf).max(axis=0)
+
+        scores = (doc_sim + window_sim) / 2
+        best = np.argsort(scores)[-top_n:][::-1]
+        results[i] = [{"keyword": str(words[j]), "score": round(float(scores[j]), 4)} for j in best]
+
+    return results
+
+
+def extract_keywords_long(text: str, top_n: int = 10):
+    """Windowed extraction for one long document (see extract_keywords_long_batch)."""
+    return extract_keywords_long_batch([text], top_n=top_n)[0]
+
+
+def _rule_page_category(page: dict):
     primary = (page.get("primary_keyword", "") or "").lower()
     pid = (page.get("page_id", "") or "").lower()
 
@@ -104,17 +499,65 @@ def guess_page_category(page: dict):
     return "data_analytics"
 
 
-def get_trending_keywords_for_page(page: dict):
+def guess_page_categories(pages: list[dict], mode: str = None):
+    """
+    Category of many pages at once.
+    Semantic mode embeds every primary keyword in one batch and compares it
+    with the TRENDING_KEYWORDS category centroids; pages below the threshold
+    (or without a primary keyword) keep the rule-based category.
+    """
+    categories = [_rule_page_category(page) for page in pages]
+    if (mode or CLUSTER_MODE) != "semantic":
+        return categories
+
+    from semantic_clusters import semantic_assign
+
+    todo = [i for i, page in enumerate(pages) if (page.get("primary_keyword", "") or "").strip()]
+    texts = [pages[i]["primary_keyword"].strip() for i in todo]
+    for i, (name, _) in zip(todo, semantic_assign(texts, TRENDING_KEYWORDS, SEMANTIC_CLUSTER_THRESHOLD)):
+        if name != "Other":
+            categories[i] = name
+    return categories
+
+
+def guess_page_category(page: dict, mode: str = None):
     """
-    Returns simulated trending long-tail keywords relevant to the page.
+    Decide the category of the page to give trending keywords.
+    Uses primary_keyword or page_id (or embeddings in semantic mode).
     """
-    cat = guess_page_category(page)
-    return TRENDING_KEYWORDS.get(cat, [])
+    return guess_page_categories([page], mode=mode)[0]
+
+
+def get_trending_keywords_for_pages(pages: list[dict]):
+    """
+    Trending keywords for many pages: from the trend store (keywords sharing
+    tokens with the primary keyword, highest momentum first) when one is
+    configured, otherwise the simulated lists of each page's category
+    (categories of all fallback pages are guessed in one batch).
+    """
+    results = [None] * len(pages)
+    store = get_trend_store()
+    if store is not None and len(store):
+        for i, page in enumerate(pages):
+            trending = store.trending_for(page.get("primary_keyword", "") or "", limit=TRENDING_LIMIT)
+            if trending:
+                results[i] = [t["keyword"] for t in trending]
+
+    todo = [i for i, trending in enumerate(results) if trending is None]
+    for i, cat in zip(todo, guess_page_categories([pages[i] for i in todo])):
+        results[i] = TRENDING_KEYWORDS.get(cat, [])
+    return results
+
+
+def get_trending_keywords_for_page(page: dict):
+    """Returns trending keywords relevant to the page (see get_trending_keywords_for_pages)."""
+    return get_trending_keywords_for_pages([page])[0]
 
 
 def generate_long_tail_keywords(primary_keyword: str):
     """
-    Generates long-tail keyword suggestions (rule-based).
+    Generates long-tail keyword suggestions: real queries containing the
+    primary keyword from the query-log index when configured, otherwise rule-based.
     (This is allowed even without AI model; later you can also use GPT for better output.)
     """
     pk = primary_keyword.strip()
@@ -122,6 +565,12 @@ def generate_long_tail_keywords(primary_keyword: str):
     if not pk:
         return []
 
+    miner = get_query_miner()
+    if miner is not None:
+        mined = miner.long_tail(pk, limit=LONG_TAIL_LIMIT)
+        if mined:
+            return [m["query"] for m in mined]
+
     return [
         f"best {pk} for small business",
         f"{pk} cost in 2026",
@@ -132,46 +581,124 @@ def generate_long_tail_keywords(primary_keyword: str):
     ]
 
 
-def cluster_keywords(extracted_keywords: list[dict]):
+class ClusterIndex:
     """
-    Places keywords into clusters (Power BI / AI Integration / Data Analytics).
-    Simple rule-based matching. Works great for beginner assignment.
+    Cluster definitions compiled into one phrase automaton.
+    Assigns a keyword in a single pass over its characters, whatever the
+    number of clusters and terms. Same rule as the original loop: the first
+    cluster (in definition order) with a term contained in the keyword wins.
     """
-    clusters = {
-        "Power BI Services": [],
-        "AI Integration": [],
-        "Data Analytics": [],
-        "Other": []
-    }
 
-    for item in extracted_keywords:
-        kw = item["keyword"].lower()
-
-        matched = False
-        for cluster_name, terms in KEYWORD_CLUSTERS.items():
-            if any(term in kw for term in terms):
-                clusters[cluster_name].append(item)
-                matched = True
+    def __init__(self, clusters: dict):
+        self.names = list(clusters)
+
+        # term -> first cluster that lists it
+        self._term_cluster = {}
+        # an empty term is contained in every keyword
+        self._always = len(self.names)
+        for idx, terms in enumerate(clusters.values()):
+            for term in terms:
+                if term:
+                    self._term_cluster.setdefault(term, idx)
+                else:
+                    self._always = min(self._always, idx)
+
+        self._matcher = PhraseMatcher(self._term_cluster)
+
+    def assign(self, keyword: str) -> str:
+        best = self._always
+        for term, _, _ in self._matcher.iter_matches(keyword.lower()):
+            best = min(best, self._term_cluster[term])
+            if best == 0:
                 break
+        return self.names[best] if best < len(self.names) else "Other"
+
+    def assign_many(self, keywords: list[str]) -> list[str]:
+        """Cluster name per keyword; repeated keywords are only matched once."""
+        assigned = {}
+        for kw in keywords:
+            if kw not in assigned:
+                assigned[kw] = self.assign(kw)
+        return [assigned[kw] for kw in keywords]
+
+
+@lru_cache(maxsize=32)
+def _compile_clusters(frozen: tuple) -> ClusterIndex:
+    return ClusterIndex(dict(frozen))
+
 
-        if not matched:
-            clusters["Other"].append(item)
+def compile_clusters(clusters: dict = None) -> ClusterIndex:
+    """Build (or reuse) the ClusterIndex for a cluster dict (default: KEYWORD_CLUSTERS)."""
+    clusters = KEYWORD_CLUSTERS if clusters is None else clusters
+    return _compile_clusters(tuple((name, tuple(terms)) for name, terms in clusters.items()))
 
-    return clusters
+
+def assign_clusters(keywords: list[str], clusters: dict = None, mode: str = None) -> list[str]:
+    """
+    Cluster name (or "Other") for every keyword string.
+    Substring mode compiles the cluster definitions once for the whole batch;
+    semantic mode embeds the batch and scores it against the cluster centroids.
+    """
+    clusters = KEYWORD_CLUSTERS if clusters is None else clusters
+    if (mode or CLUSTER_MODE) == "semantic":
+        from semantic_clusters import semantic_assign
+        return [name for name, _ in semantic_assign(list(keywords), clusters, SEMANTIC_CLUSTER_THRESHOLD)]
+    return compile_clusters(clusters).assign_many(keywords)
 
 
-def keyword_strategy_for_page(page: dict, top_n: int = 10):
+def _group_by_cluster(items: list[dict], cluster_names: list[str], assigned: list[str]) -> dict:
+    grouped = {name: [] for name in cluster_names}
+    grouped["Other"] = []
+    for item, name in zip(items, assigned):
+        grouped[name].append(item)
+    return grouped
+
+
+def cluster_keywords(extracted_keywords: list[dict], clusters: dict = None, mode: str = None):
+    """
+    Places keywords into clusters (Power BI / AI Integration / Data Analytics).
+    Simple rule-based matching: first cluster with a term found in the keyword,
+    otherwise "Other". mode="semantic" uses embedding similarity instead.
+    """
+    return cluster_keywords_batch([extracted_keywords], clusters=clusters, mode=mode)[0]
+
+
+def cluster_keywords_batch(keyword_lists: list[list[dict]], clusters: dict = None, mode: str = None):
+    """cluster_keywords() for many pages, assigning all their keywords in one batch."""
+    clusters = KEYWORD_CLUSTERS if clusters is None else clusters
+    assigned = assign_clusters([item["keyword"] for items in keyword_lists for item in items], clusters, mode)
+
+    results = []
+    start = 0
+    for items in keyword_lists:
+        results.append(_group_by_cluster(items, list(clusters), assigned[start:start + len(items)]))
+        start += len(items)
+    return results
+
+
+def keyword_strategy_for_page(page: dict, top_n: int = 10, engine: str = None):
     """
     Main function:
-    - Extract keywords using KeyBERT
+    - Extract keywords using KeyBERT (or TF-IDF with engine="tfidf")
     - Suggest trending keywords
     - Suggest long-tail keywords
     - Create keyword clusters
     """
     content = page.get("content", "")
 
-    # KeyBERT extraction
-    extracted = extract_keywords_keybert(content, top_n=top_n)
+    # KeyBERT extraction (windowed for long pages), or the statistical engine
+    if (engine or KEYWORD_ENGINE) == "tfidf":
+        extracted = get_tfidf_model().extract(content, top_n=top_n)
+    elif LONG_DOC_MIN_WORDS and len(content.split()) > LONG_DOC_MIN_WORDS:
+        extracted = extract_keywords_long(content, top_n=top_n)
+    else:
+        extracted = extract_keywords_keybert(content, top_n=top_n)
+
+    # remember the keywords site-wide (related-keyword lookup)
+    index = get_keyword_index()
+    if index is not None and page.get("page_id"):
+        index.add_page(page["page_id"], extracted)
+        index.maybe_save()
 
     # clustering
     clusters = cluster_keywords(extracted)
@@ -189,3 +716,48 @@ def keyword_strategy_for_page(page: dict, top_n: int = 10):
         "trending_keywords": trending,
         "long_tail_keywords": long_tail
     }
+
+
+def _extract_for_pages(contents: list[str], top_n: int, engine: str = None) -> list[list[dict]]:
+    """Extracted keywords of many pages, batched per engine (windowed batch for long pages)."""
+    if (engine or KEYWORD_ENGINE) == "tfidf":
+        return get_tfidf_model().extract_batch(contents, top_n=top_n)
+
+    extracted = [[] for _ in contents]
+    long_pages = [bool(LONG_DOC_MIN_WORDS) and len(c.split()) > LONG_DOC_MIN_WORDS for c in contents]
+    for is_long, extract in ((True, extract_keywords_long_batch), (False, extract_keywords_batch)):
+        todo = [i for i, long_page in enumerate(long_pages) if long_page == is_long]
+        if todo:
+            for i, keywords in zip(todo, extract([contents[i] for i in todo], top_n=top_n)):
+                extracted[i] = keywords
+    return extracted
+
+
+def keyword_strategy_for_pages(pages: list[dict], top_n: int = 10, engine: str = None):
+    """
+    keyword_strategy_for_page() for many pages: keywords are extracted,
+    clustered and categorized in batches; the keyword index is saved once at the end.
+    """
+    try:
+        extracted = _extract_for_pages([page.get("content", "") for page in pages], top_n, engine)
+
+        index = get_keyword_index()
+        if index is not None:
+            for page, keywords in zip(pages, extracted):
+                if page.get("page_id"):
+                    index.add_page(page["page_id"], keywords)
+
+        clusters = cluster_keywords_batch(extracted)
+        trending = get_trending_keywords_for_pages(pages)
+
+        return [
+            {
+                "extracted_keywords": keywords,
+                "clusters": page_clusters,
+                "trending_keywords": page_trending,
+                "long_tail_keywords": generate_long_tail_keywords(page.get("primary_keyword", "")),
+            }
+            for page, keywords, page_clusters, page_trending in zip(pages, extracted, clusters, trending)
+        ]
+    finally:
+        flush_keyword_index()
@@ -0,0 +1,310 @@
+# keyword_index.py
+# Approximate nearest-neighbour (IVF) index over every keyword extracted across the site
+#
+# Keyword vectors are unit-normalized and grouped into inverted lists around
+# k-means centroids; a query only scans the lists of its nearest centroids.
+# Each keyword keeps back-references to the pages it was extracted from, so a
+# page can be re-indexed (or dropped) when its content changes.
+#
+# The index file has a single writer: one process owns KEYWORD_INDEX_DIR and
+# saves it (throttled while pages are added, flush() at the end of a batch and
+# at interpreter exit). Two processes adding pages to the same directory
+# overwrite each other's saves.
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from keyword_engine import embed_texts
+
+INDEX_FILE = "keyword_index.npz"
+
+# below this many keywords a query just scans everything (already ~1 ms)
+TRAIN_MIN_KEYWORDS = 4096
+# inverted lists scanned per query
+DEFAULT_NPROBE = 16
+# rows per step when assigning vectors to centroids
+ASSIGN_CHUNK_SIZE = 65536
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK_SIZE):
+        chunk = vectors[start:start + ASSIGN_CHUNK_SIZE]
+        labels[start:start + len(chunk)] = (chunk @ centroids.T).argmax(axis=1)
+    return labels
+
+
+def spherical_kmeans(vectors: np.ndarray, k: int, iters: int = 8, seed: int = 0) -> np.ndarray:
+    """k unit centroids for unit vectors (trained on a sample of at most 64 points per centroid)."""
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), min(len(vectors), k * 64), replace=False)]
+    centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+
+    for _ in range(iters):
+        labels = _nearest(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=k)
+        # re-seed empty lists with random points
+        empty = np.flatnonzero(counts == 0)
+        sums[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+        centroids = _unit(sums)
+    return centroids
+
+
+class KeywordIndex:
+    """
+    Persistent keyword ANN index with page back-references.
+    add_page() replaces everything a page contributed; keywords no page
+    refers to any more are tombstoned and dropped at the next rebuild.
+    Thread-safe (one lock per index).
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._lock = threading.RLock()
+
+        self.keywords = []       # id -> keyword
+        self._ids = {}           # keyword -> id (dead ones too, so they can be revived)
+        self._vectors = np.zeros((0, 0), dtype=np.float32)  # grows by doubling; first len(keywords) rows used
+        self._alive = np.zeros(0, dtype=bool)
+        self._assign = np.zeros(0, dtype=np.int32)          # inverted list per id (-1: not trained yet)
+        self._centroids = None
+        self._lists = {}         # list -> np.ndarray of ids (built lazily)
+        self._trained_on = 0
+
+        self._pages = {}         # page_id -> {keyword: score}
+        self._refs = {}          # id -> set of page_ids
+
+        self._dirty = False
+        self._saved_at = 0.0  # the first change is saved right away
+
+        if path and os.path.exists(os.path.join(path, INDEX_FILE)):
+            self._load()
+
+    def __len__(self) -> int:
+        return int(self._alive.sum())
+
+    # -----------------------------
+    # Updates
+    # -----------------------------
+    def _append(self, keywords: list[str], vectors: np.ndarray):
+        n = len(self.keywords)
+        need = n + len(keywords)
+        if need > len(self._vectors) or self._vectors.shape[1] != vectors.shape[1]:
+            capacity = max(need, 2 * len(self._vectors), 1024)
+            grown = np.zeros((capacity, vectors.shape[1]), dtype=np.float32)
+            if n:
+                grown[:n] = self._vectors[:n]
+            self._vectors = grown
+            self._alive = np.concatenate([self._alive, np.zeros(capacity - len(self._alive), dtype=bool)])
+            self._assign = np.concatenate([self._assign, np.full(capacity - len(self._assign), -1, dtype=np.int32)])
+
+        self._vectors[n:need] = vectors
+        self._alive[n:need] = True
+        if self._centroids is not None:
+            self._assign[n:need] = _nearest(vectors, self._centroids)
+            self._lists.clear()
+
+        for i, kw in enumerate(keywords):
+            self._ids[kw] = n + i
+        self.keywords.extend(keywords)
+
+    def _remove_page(self, page_id: str):
+        for kw in self._pages.pop(page_id, {}):
+            kid = self._ids[kw]
+            refs = self._refs.get(kid)
+            if refs is None:
+                continue
+            refs.discard(page_id)
+            if not refs:
+                del self._refs[kid]
+                self._alive[kid] = False
+
+    def add_page(self, page_id: str, keywords: list[dict]):
+        """
+        (Re-)index a page's extracted keywords ([{"keyword", "score"}, ...]).
+        Only keywords never seen before are embedded.
+        """
+        with self._lock:
+            self._remove_page(page_id)
+
+            scores = {item["keyword"]: item.get("score", 0.0) for item in keywords if item.get("keyword")}
+            new = [kw for kw in scores if kw not in self._ids]
+            if new:
+                self._append(new, _unit(embed_texts(new)))
+
+            for kw in scores:
+                kid = self._ids[kw]
+                self._alive[kid] = True
+                self._refs.setdefault(kid, set()).add(page_id)
+            self._pages[page_id] = scores
+
+            self._dirty = True
+            self._maybe_rebuild()
+
+    def remove_page(self, page_id: str):
+        with self._lock:
+            self._remove_page(page_id)
+            self._dirty = True
+
+    def _maybe_rebuild(self):
+        alive = len(self)
+        if alive < TRAIN_MIN_KEYWORDS:
+            return
+        # retrain when the index has grown 4x, or when half of it is tombstones
+        if alive >= 4 * self._trained_on or len(self.keywords) > 2 * alive:
+            self.rebuild()
+
+    def rebuild(self):
+        """Drop tombstones and retrain the inverted lists (about sqrt(n) of them)."""
+        with self._lock:
+            keep = np.flatnonzero(self._alive[:len(self.keywords)])
+            remap = {int(old): new for new, old in enumerate(keep)}
+
+            self.keywords = [self.keywords[i] for i in keep]
+            self._ids = {kw: i for i, kw in enumerate(self.keywords)}
+            self._refs = {remap[kid]: refs for kid, refs in self._refs.items()}
+            self._vectors = self._vectors[keep].copy()
+            self._alive = np.ones(len(keep), dtype=bool)
+            self._lists.clear()
+
+            if len(keep) < TRAIN_MIN_KEYWORDS:
+                self._centroids = None
+                self._assign = np.full(len(keep), -1, dtype=np.int32)
+                self._trained_on = 0
+            else:
+                nlist = int(min(4096, max(16, np.sqrt(len(keep)))))
+                self._centroids = spherical_kmeans(self._vectors, nlist)
+                self._assign = _nearest(self._vectors, self._centroids)
+                self._trained_on = len(keep)
+            self._dirty = True
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def _list(self, list_id: int) -> np.ndarray:
+        ids = self._lists.get(list_id)
+        if ids is None:
+            if not self._lists:
+                # build every list in one pass
+                n = len(self.keywords)
+                order = np.argsort(self._assign[:n], kind="stable")
+                bounds = np.searchsorted(self._assign[:n][order], np.arange(len(self._centroids) + 1))
+                for i in range(len(self._centroids)):
+                    self._lists[i] = order[bounds[i]:bounds[i + 1]]
+            ids = self._lists[list_id]
+        return ids
+
+    def _candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        if self._centroids is None:
+            return np.arange(len(self.keywords))
+        nprobe = min(nprobe, len(self._centroids))
+        probe = np.argpartition(self._centroids @ query, -nprobe)[-nprobe:]
+        return np.concatenate([self._list(int(i)) for i in probe])
+
+    def query(self, text: str, k: int = 10, nprobe: int = DEFAULT_NPROBE) -> list[dict]:
+        """
+        Keywords most similar to text, with the pages they come from.
+        Keywords already in the index are not re-embedded.
+        Returns [{"keyword", "similarity", "pages"}, ...], best first.
+        """
+        if k < 1:
+            return []
+        with self._lock:
+            kid = self._ids.get(text)
+            if kid is not None:
+                query = self._vectors[kid]
+            elif not self.keywords:
+                return []
+            else:
+                query = _unit(embed_texts([text]))[0]
+
+            ids = self._candidates(query, nprobe)
+            ids = ids[self._alive[ids]]
+            if kid is not None:
+                ids = ids[ids != kid]
+            if len(ids) == 0:
+                return []
+
+            sims = self._vectors[ids] @ query
+            top = np.argpartition(sims, -min(k, len(ids)))[-k:]
+            top = top[np.argsort(sims[top])[::-1]]
+
+            results = []
+            for i in top:
+                keyword = self.keywords[ids[i]]
+                pages = sorted(self._refs[int(ids[i])], key=lambda p: -self._pages[p][keyword])
+                results.append({"keyword": keyword, "similarity": round(float(sims[i]), 4), "pages": pages})
+            return results
+
+    def pages_for(self, keyword: str) -> list[str]:
+        with self._lock:
+            kid = self._ids.get(keyword)
+            return sorted(self._refs.get(kid, ())) if kid is not None else []
+
+    def stats(self) -> dict:
+        return {
+            "keywords": len(self),
+            "tombstones": len(self.keywords) - len(self),
+            "pages": len(self._pages),
+            "lists": 0 if self._centroids is None else len(self._centroids),
+        }
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def save(self):
+        """Write the index to path (one file, replaced atomically)."""
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            n = len(self.keywords)
+            target = os.path.join(self.path, INDEX_FILE)
+            tmp = f"{target}.{os.getpid()}.tmp.npz"
+            np.savez(
+                tmp,
+                keywords=np.array(self.keywords, dtype=str),
+                vectors=self._vectors[:n],
+                alive=self._alive[:n],
+                assign=self._assign[:n],
+                centroids=self._centroids if self._centroids is not None else np.zeros((0, 0), dtype=np.float32),
+                trained_on=np.array(self._trained_on),
+                pages=np.array(json.dumps(self._pages)),
+            )
+            os.replace(tmp, target)
+            self._dirty = False
+            self._saved_at = time.time()
+
+    def maybe_save(self, interval: float = 30.0):
+        """Save if something changed and the last save is older than interval seconds."""
+        if self.path and self._dirty and time.time() - self._saved_at >= interval:
+            self.save()
+
+    def flush(self):
+        """Save now if anything changed since the last save (end of a batch / exit)."""
+        if self.path and self._dirty:
+            self.save()
+
+    def _load(self):
+        data = np.load(os.path.join(self.path, INDEX_FILE), allow_pickle=False)
+        self.keywords = [str(kw) for kw in data["keywords"]]
+        self._ids = {kw: i for i, kw in enumerate(self.keywords)}
+        self._vectors = data["vectors"].astype(np.float32)
+        self._alive = data["alive"].astype(bool)
+        self._assign = data["assign"].astype(np.int32)
+        self._centroids = data["centroids"] if data["centroids"].size else None
+        self._trained_on = int(data["trained_on"])
+
+        self._pages = json.loads(str(data["pages"]))
+        for page_id, scores in self._pages.items():
+            for kw in scores:
+                self._refs.setdefault(self._ids[kw], set()).add(page_id)
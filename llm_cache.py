@@ -0,0 +1,186 @@
+# llm_cache.py
+# Persistent LLM response cache (SQLite): the same prompt is not sent to Azure twice
+#
+# Entries are keyed by a hash of deployment, temperature, prompt-template
+# version and the full messages, so any change to the page or the prompt is a
+# new entry. Entries expire after a TTL; above max_entries the least recently
+# used ones are dropped. Failed or incomplete generations are never stored.
+# Counters are per process.
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+from json_stream import replay_events
+
+load_dotenv()
+
+# empty LLM_CACHE_PATH disables the cache
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join("cache", "llm_responses.sqlite"))
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "168"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+
+def cacheable(result) -> bool:
+    """Only complete results are stored (no "error", no "missing_fields")."""
+    return isinstance(result, dict) and "error" not in result and "missing_fields" not in result
+
+
+def cache_key(messages: list[dict], deployment: str, temperature: float, template_version: str) -> str:
+    payload = json.dumps(
+        {"deployment": deployment, "temperature": temperature, "version": template_version, "messages": messages},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """SQLite-backed response cache with TTL and LRU eviction (thread-safe)."""
+
+    def __init__(self, path: str, ttl_seconds: float = LLM_CACHE_TTL_HOURS * 3600,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.counters = {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "expired": 0, "evictions": 0}
+
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, task TEXT, value TEXT, created REAL, last_used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get(self, key: str) -> dict:
+        """Cached result, or None (missing or expired)."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.counters["expired"] += 1
+                row = None
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.counters["hits"] += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, task: str, value: dict):
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                    (key, task, json.dumps(value, ensure_ascii=False), now, now),
+                )
+                self.counters["expired"] += self._db.execute(
+                    "DELETE FROM responses WHERE created < ?", (now - self.ttl,)
+                ).rowcount
+                extra = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+                if extra > 0:
+                    self._db.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                        (extra,),
+                    )
+                    self.counters["evictions"] += extra
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self.counters["stores"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": len(self),
+            "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_llm_cache():
+    """Shared LLMCache, or None when LLM_CACHE_PATH is empty."""
+    if not LLM_CACHE_PATH:
+        return None
+    return LLMCache(LLM_CACHE_PATH)
+
+
+def cached_generate(task: str, messages: list[dict], deployment: str, temperature: float,
+                    template_version: str, generate, force: bool = False) -> dict:
+    """
+    Cached result for this request, else generate() (and store it if it is
+    complete). force=True skips the lookup but still stores the new result.
+    """
+    cache = get_llm_cache()
+    if cache is None:
+        return generate()
+
+    key = cache_key(messages, deployment, temperature, template_version)
+    if force:
+        cache.counters["bypassed"] += 1
+    else:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+
+    result = generate()
+    if cacheable(result):
+        cache.put(key, task, result)
+    return result
+
+
+def cached_stream(task: str, messages: list[dict], deployment: str, temperature: float,
+                  template_version: str, stream, parse, force: bool = False):
+    """
+    Streaming counterpart of cached_generate. stream() yields json_stream
+    events ending with ("done", raw_text, tokens); parse(raw_text, tokens)
+    builds the result.
+    Yields ("item" / "field", ...) events, then ("result", dict).
+    A cached result is replayed at once.
+    """
+    cache = get_llm_cache()
+    key = cache_key(messages, deployment, temperature, template_version) if cache is not None else None
+    if cache is not None:
+        if force:
+            cache.counters["bypassed"] += 1
+        else:
+            hit = cache.get(key)
+            if hit is not None:
+                yield from replay_events(hit)
+                yield ("result", hit)
+                return
+
+    result = None
+    for event in stream():
+        if event[0] == "done":
+            result = parse(*event[1:])
+        else:
+            yield event
+
+    if cache is not None and cacheable(result):
+        cache.put(key, task, result)
+    yield ("result", result)
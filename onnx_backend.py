@@ -0,0 +1,193 @@
+# onnx_backend.py
+# Int8-quantized ONNX Runtime embedding backend for keyword extraction (CPU only, no torch at run time)
+#
+# export_onnx_model() is a one-off step on a machine with torch + transformers:
+# it exports the MiniLM encoder to ONNX and applies dynamic int8 quantization.
+# Workers then only need onnxruntime + tokenizers (KEYBERT_BACKEND=onnx): with
+# this backend keyword_engine scores candidates itself and never imports
+# keybert / sentence-transformers.
+
+import json
+import os
+import time
+
+import numpy as np
+
+from keyword_engine import EMBED_BATCH_SIZE, KEYBERT_MODEL_NAME, KEYPHRASE_NGRAM_RANGE, STOP_WORDS, extract_keywords_batch
+
+MODEL_FILE = "model_int8.onnx"
+CONFIG_FILE = "onnx_config.json"
+TOKENIZER_FILE = "tokenizer.json"
+
+# all-MiniLM-L6-v2 settings in sentence-transformers (max_seq_length, Normalize layer)
+MAX_SEQ_LENGTH = 256
+
+
+def export_onnx_model(out_dir: str, model_name: str = KEYBERT_MODEL_NAME, max_length: int = MAX_SEQ_LENGTH) -> str:
+    """
+    Export the sentence-transformers encoder to ONNX and quantize its weights to int8.
+    Writes model_int8.onnx, tokenizer.json and onnx_config.json into out_dir.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(out_dir, exist_ok=True)
+    hub_name = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+    tokenizer = AutoTokenizer.from_pretrained(hub_name)
+    model = AutoModel.from_pretrained(hub_name).eval()
+    tokenizer.save_pretrained(out_dir)
+
+    sample = tokenizer(["power bi dashboard services"], return_tensors="pt")
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    axes = {name: {0: "batch", 1: "sequence"} for name in names}
+    axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = os.path.join(out_dir, "model_fp32.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in names),
+            fp32_path,
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=axes,
+            opset_version=14,
+        )
+
+    model_path = os.path.join(out_dir, MODEL_FILE)
+    quantize_dynamic(fp32_path, model_path, weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+
+    config = {
+        "model_name": model_name,
+        "max_length": max_length,
+        "pad_token": tokenizer.pad_token,
+        "pad_id": tokenizer.pad_token_id,
+        "normalize": True,
+    }
+    with open(os.path.join(out_dir, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+
+    return model_path
+
+
+class OnnxEmbedder:
+    """
+    Embedding backend running the quantized encoder with onnxruntime.
+    Mean pooling + L2 normalization, same as the sentence-transformers model.
+    """
+
+    def __init__(self, model_dir: str, batch_size: int = EMBED_BATCH_SIZE, threads: int = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_path = os.path.join(model_dir, MODEL_FILE)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"No ONNX model in {model_dir}; create it once with onnx_backend.export_onnx_model()"
+            )
+
+        with open(os.path.join(model_dir, CONFIG_FILE), "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(self.config["max_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_id"], pad_token=self.config["pad_token"])
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self.session.get_inputs()}
+
+        self.batch_size = batch_size
+
+    def _embed_batch(self, texts: list[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feed = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": mask,
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        hidden = self.session.run(None, {k: v for k, v in feed.items() if k in self._inputs})[0]
+
+        # mean over real tokens only
+        weights = mask[:, :, None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+        if self.config.get("normalize", True):
+            pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled.astype(np.float32)
+
+    def embed(self, documents: list[str], verbose: bool = False) -> np.ndarray:
+        documents = list(documents)
+        if not documents:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        # batch texts of similar length together so little time is spent on padding
+        order = sorted(range(len(documents)), key=lambda i: len(documents[i]))
+        out = None
+        for start in range(0, len(order), self.batch_size):
+            idx = order[start:start + self.batch_size]
+            vectors = self._embed_batch([documents[i] for i in idx])
+            if out is None:
+                out = np.zeros((len(documents), vectors.shape[1]), dtype=np.float32)
+            out[idx] = vectors
+        return out
+
+
+def _overlap(a: list[dict], b: list[dict]) -> float:
+    if not a and not b:
+        return 1.0
+    return len({x["keyword"] for x in a} & {x["keyword"] for x in b}) / max(len(a), len(b))
+
+
+def parity_report(texts: list[str], model_dir: str, top_n: int = 10) -> dict:
+    """
+    Compare the ONNX backend with the sentence-transformers one on the same texts:
+    top-N keyword overlap per text, embedding cosine similarity and timing.
+    Needs torch + keybert for the reference side.
+    """
+    from keybert import KeyBERT
+
+    texts = [t for t in texts if t and t.strip()]
+    reference = KeyBERT(model=KEYBERT_MODEL_NAME)
+    candidate = OnnxEmbedder(model_dir)
+
+    timings = {}
+    embeddings = {}
+    for name, embedder in (("reference", reference.model), ("onnx", candidate)):
+        embedder.embed(texts[:1])  # warm up (session / thread pools)
+        started = time.perf_counter()
+        embeddings[name] = np.asarray(embedder.embed(texts), dtype=np.float32)
+        timings[name] = time.perf_counter() - started
+
+    keywords = {
+        "reference": [
+            [{"keyword": kw, "score": score} for kw, score in reference.extract_keywords(
+                t, keyphrase_ngram_range=KEYPHRASE_NGRAM_RANGE, stop_words=STOP_WORDS, top_n=top_n
+            )]
+            for t in texts
+        ],
+        # batch_size=1: one candidate vocabulary per text, like KeyBERT
+        "onnx": extract_keywords_batch(texts, top_n=top_n, batch_size=1, embed=candidate.embed),
+    }
+
+    a = embeddings["reference"] / np.linalg.norm(embeddings["reference"], axis=1, keepdims=True)
+    b = embeddings["onnx"] / np.linalg.norm(embeddings["onnx"], axis=1, keepdims=True)
+    cosine = (a * b).sum(axis=1)
+    overlap = [_overlap(r, o) for r, o in zip(keywords["reference"], keywords["onnx"])]
+
+    return {
+        "texts": len(texts),
+        "top_n": top_n,
+        "mean_keyword_overlap": round(float(np.mean(overlap)), 4) if overlap else 0,
+        "min_keyword_overlap": round(float(np.min(overlap)), 4) if overlap else 0,
+        "mean_embedding_cosine": round(float(cosine.mean()), 4) if len(cosine) else 0,
+        "reference_embed_seconds": round(timings["reference"], 3),
+        "onnx_embed_seconds": round(timings["onnx"], 3),
+        "speedup": round(timings["reference"] / timings["onnx"], 2) if timings["onnx"] else 0,
+    }
@@ -5,7 +5,7 @@ from functools import lru_cache
 from dotenv import load_dotenv
 from azure.identity import ClientSecretCredential
 from azure.keyvault.secrets import SecretClient
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI, AzureOpenAI
 
 
 # ✅ Load variables from .env
@@ -16,6 +16,16 @@ CLIENT_ID = os.getenv("CLIENT_ID")
 CLIENT_SECRET = os.getenv("CLIENT_SECRET")
 KEY_VAULT_URL = os.getenv("KEY_VAULT_URL")
 
+# Optional direct settings (skip Key Vault), e.g. to point at a local mock endpoint
+AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
+AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
+AZURE_OPENAI_DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT")
+
+OPENAI_API_VERSION = os.getenv("OPENAI_API_VERSION", "2024-02-15-preview")
+
+# token estimate without tiktoken
+CHARS_PER_TOKEN = 4
+
 
 def get_kv_secret_client():
     """Authenticate and create Key Vault Secret client."""
@@ -35,7 +45,16 @@ def fetch_openai_secrets():
     """
     Fetch Azure OpenAI / AI Foundry secrets from Key Vault.
     Secret names are provided in assignment.
+    AZURE_OPENAI_ENDPOINT / _API_KEY / _DEPLOYMENT take precedence when all set.
     """
+    if all([AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_API_KEY, AZURE_OPENAI_DEPLOYMENT]):
+        return {
+            "deployment_name": AZURE_OPENAI_DEPLOYMENT,
+            "model_name": AZURE_OPENAI_DEPLOYMENT,
+            "api_key": AZURE_OPENAI_API_KEY,
+            "endpoint": AZURE_OPENAI_ENDPOINT
+        }
+
     client = get_kv_secret_client()
 
     deployment_name = client.get_secret("interview-openai-deployment-name").value
@@ -59,7 +78,46 @@ def get_azure_openai_client():
     client = AzureOpenAI(
         api_key=secrets["api_key"],
         azure_endpoint=secrets["endpoint"],
-        api_version="2024-02-15-preview"
+        api_version=OPENAI_API_VERSION
     )
 
     return client, secrets["deployment_name"]
+
+
+def get_async_azure_openai_client(max_retries: int = 0):
+    """
+    Create an AsyncAzureOpenAI client (not cached: it is bound to the running event loop).
+    SDK retries are off by default so the caller's scheduler sees every 429.
+    """
+    secrets = fetch_openai_secrets()
+
+    client = AsyncAzureOpenAI(
+        api_key=secrets["api_key"],
+        azure_endpoint=secrets["endpoint"],
+        api_version=OPENAI_API_VERSION,
+        max_retries=max_retries
+    )
+
+    return client, secrets["deployment_name"]
+
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in text (tiktoken if installed, else a character estimate)."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def estimate_tokens(messages: list[dict], output_tokens: int = 0) -> int:
+    """Pre-flight estimate of what a chat request counts against TPM."""
+    return sum(count_tokens(m.get("content") or "") + 4 for m in messages) + 3 + output_tokens
@@ -0,0 +1,140 @@
+# phrase_matcher.py
+# Aho-Corasick phrase automaton used by the SEO audit (one pass over the content)
+
+from collections import deque
+from functools import lru_cache
+
+
+def is_word_char(ch: str) -> bool:
+    """Same definition as regex \\w for str patterns."""
+    return ch.isalnum() or ch == "_"
+
+
+def _is_boundary(text: str, pos: int) -> bool:
+    """True if regex \\b would match at position pos of text."""
+    before = pos > 0 and is_word_char(text[pos - 1])
+    after = pos < len(text) and is_word_char(text[pos])
+    return before != after
+
+
+def is_whole_word(text: str, start: int, end: int) -> bool:
+    """True if text[start:end] has a regex \\b on both sides."""
+    return _is_boundary(text, start) and _is_boundary(text, end)
+
+
+class PhraseMatcher:
+    """
+    Character-level Aho-Corasick automaton over a fixed set of phrases.
+    Build it once per phrase set (see compile_phrases) and scan many texts.
+    """
+
+    def __init__(self, phrases):
+        # unique, non-empty phrases in first-seen order
+        self.phrases = list(dict.fromkeys(p for p in phrases if p))
+
+        # node 0 is the root
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for pid, phrase in enumerate(self.phrases):
+            node = 0
+            for ch in phrase:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(pid)
+
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        # depth-1 nodes fail to the root; deeper nodes are filled breadth-first
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, text: str) -> dict:
+        """
+        Single pass over text. Returns:
+        - word_count: number of \\w+ runs (same as seo_audit.word_count)
+        - counts: phrase -> non-overlapping whole-word count
+                  (same as len(re.findall(rf"\\b{re.escape(phrase)}\\b", text)))
+        - found: set of phrases that occur anywhere as a plain substring
+        """
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        phrases = self.phrases
+
+        counts = [0] * len(phrases)
+        last_end = [0] * len(phrases)
+        found = set()
+
+        words = 0
+        in_word = False
+        node = 0
+
+        for i, ch in enumerate(text):
+            # word counting (same pass)
+            if is_word_char(ch):
+                if not in_word:
+                    words += 1
+                    in_word = True
+            else:
+                in_word = False
+
+            # automaton step
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+
+            for pid in out[node]:
+                end = i + 1
+                start = end - len(phrases[pid])
+                found.add(pid)
+                # regex findall semantics: leftmost, non-overlapping, \b on both ends
+                if start >= last_end[pid] and is_whole_word(text, start, end):
+                    counts[pid] += 1
+                    last_end[pid] = end
+
+        return {
+            "word_count": words,
+            "counts": {p: counts[pid] for pid, p in enumerate(phrases)},
+            "found": {phrases[pid] for pid in found},
+        }
+
+    def iter_matches(self, text: str):
+        """
+        Yield (phrase, start, end) for every substring occurrence, overlaps included.
+        Used when matches from several texts have to be merged later.
+        """
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        phrases = self.phrases
+
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for pid in out[node]:
+                yield phrases[pid], i + 1 - len(phrases[pid]), i + 1
+
+
+@lru_cache(maxsize=256)
+def compile_phrases(phrases: tuple) -> PhraseMatcher:
+    """Build (or reuse) the automaton for a phrase set."""
+    return PhraseMatcher(phrases)
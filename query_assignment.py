@@ -0,0 +1,226 @@
+# query_assignment.py
+# Query-to-page assignment: which page should rank for each search query (BM25)
+#
+# Pages are indexed once into a sparse term x page matrix of BM25 weights
+# (title, headings, content and target keywords, with per-field weights).
+# Queries are scored in chunks as one sparse product each, spread over a
+# process pool (batch_audit.map_chunks), so millions of queries stream through with
+# flat memory. Queries no page answers well are the coverage gaps.
+
+import re
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+from batch_audit import map_chunks
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# term frequency multipliers per field (BM25F-style: one length norm over the weighted fields)
+FIELD_WEIGHTS = {"title": 3.0, "headings": 2.0, "target_keywords": 3.0, "content": 1.0}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# a query counts as answered when its best page contains at least this share of its terms
+MIN_MATCHED = 0.5
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in TOKEN_PATTERN.findall(str(text).lower()) if t not in ENGLISH_STOP_WORDS]
+
+
+def page_fields(page: dict) -> dict:
+    """The indexed text of a page, per field."""
+    headings = page.get("headings", {}) or {}
+    heading_text = []
+    for level in ("h1", "h2", "h3"):
+        value = headings.get(level) or []
+        heading_text.extend([value] if isinstance(value, str) else value)
+
+    keywords = list(page.get("target_keywords", []) or [])
+    if page.get("primary_keyword"):
+        keywords.append(page["primary_keyword"])
+
+    return {
+        "title": page.get("title", "") or "",
+        "headings": " ".join(heading_text),
+        "target_keywords": " ".join(keywords),
+        "content": page.get("content", "") or "",
+    }
+
+
+class PageIndex:
+    """
+    Inverted index over pages with BM25 weights precomputed per (term, page),
+    so a query's score for every page is the sum of its terms' rows.
+    """
+
+    def __init__(self, pages: list[dict], field_weights: dict = None, k1: float = BM25_K1, b: float = BM25_B):
+        field_weights = field_weights or FIELD_WEIGHTS
+        self.page_ids = [p.get("page_id", str(i)) for i, p in enumerate(pages)]
+        self.vocab = {}
+
+        rows, cols, tfs = [], [], []
+        lengths = np.zeros(len(pages))
+        for col, page in enumerate(pages):
+            counts = Counter()
+            for field, text in page_fields(page).items():
+                weight = field_weights.get(field, 0.0)
+                if weight:
+                    for token in tokenize(text):
+                        counts[token] += weight
+            lengths[col] = sum(counts.values())
+            for token, tf in counts.items():
+                rows.append(self.vocab.setdefault(token, len(self.vocab)))
+                cols.append(col)
+                tfs.append(tf)
+
+        n = len(pages)
+        rows, cols, tfs = np.array(rows, dtype=np.int32), np.array(cols, dtype=np.int32), np.array(tfs)
+        df = np.bincount(rows, minlength=len(self.vocab))
+        idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+        avgdl = lengths.mean() if n else 1.0
+        norm = k1 * (1 - b + b * lengths[cols] / max(avgdl, 1e-12))
+        weights = idf[rows] * tfs * (k1 + 1) / (tfs + norm)
+
+        self.weights = sparse.csr_matrix((weights, (rows, cols)), shape=(len(self.vocab), n), dtype=np.float32)
+        self.present = self.weights.copy()
+        self.present.data[:] = 1
+
+    def __len__(self) -> int:
+        return len(self.page_ids)
+
+    def _query_matrix(self, queries: list[str]) -> tuple:
+        """Query x term matrix (unique in-vocabulary terms) + number of terms per query."""
+        indptr, indices, sizes = [0], [], []
+        for query in queries:
+            tokens = set(tokenize(query))
+            sizes.append(len(tokens))
+            indices.extend(self.vocab[t] for t in tokens if t in self.vocab)
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=np.float32)
+        matrix = sparse.csr_matrix((data, indices, indptr), shape=(len(queries), len(self.vocab)))
+        return matrix, np.array(sizes)
+
+    def assign(self, queries: list[str]) -> list[dict]:
+        """
+        Best page per query: [{"query", "page_id", "score", "matched"}, ...]
+        matched is the share of the query's terms found on that page.
+        page_id is None (score 0) when no page contains any query term.
+        """
+        queries = [str(q) for q in queries]
+        if not queries:
+            return []
+        matrix, sizes = self._query_matrix(queries)
+        scores = (matrix @ self.weights).tocsr()
+        scores.sort_indices()
+
+        # row-wise argmax over the non-zeros (ties go to the earlier page)
+        best_page = np.full(len(queries), -1)
+        best_score = np.zeros(len(queries))
+        counts = np.diff(scores.indptr)
+        if scores.nnz:
+            row_of = np.repeat(np.arange(len(queries)), counts)
+            nonempty = np.flatnonzero(counts)
+            row_max = np.zeros(len(queries))
+            row_max[nonempty] = np.maximum.reduceat(scores.data, scores.indptr[nonempty])
+            hits = np.flatnonzero(scores.data == row_max[row_of])
+            rows, first = np.unique(row_of[hits], return_index=True)
+            best_page[rows] = scores.indices[hits[first]]
+            best_score[rows] = row_max[rows]
+
+        matched = np.zeros(len(queries))
+        answered = np.flatnonzero(best_page >= 0)
+        if len(answered):
+            found = (matrix[answered] @ self.present).tocsr()
+            matched[answered] = np.asarray(found[np.arange(len(answered)), best_page[answered]]).ravel()
+            matched[answered] /= sizes[answered]
+
+        return [
+            {
+                "query": query,
+                "page_id": self.page_ids[page] if page >= 0 else None,
+                "score": round(float(score), 4),
+                "matched": round(float(share), 4),
+            }
+            for query, page, score, share in zip(queries, best_page.tolist(), best_score, matched)
+        ]
+
+
+# -----------------------------
+# Parallel batch assignment
+# -----------------------------
+_worker_index = None
+
+
+def _init_worker(index: PageIndex):
+    global _worker_index
+    _worker_index = index
+
+
+def _assign_chunk(queries: list[str]) -> list[dict]:
+    """Worker entry point: one chunk of queries per task (index sent once per process)."""
+    return _worker_index.assign(queries)
+
+
+def iter_assignments(queries, pages: list[dict] = None, index: PageIndex = None, workers: int = None,
+                     chunk_size: int = 20_000, max_pending: int = None):
+    """
+    Yield PageIndex.assign() results for any iterable of queries, in input order.
+    The index is built from pages (default: dreamit_pages) unless given.
+
+    - workers: number of processes (default: all cores). workers=1 runs in-process.
+    - chunk_size: queries sent to a worker per task.
+    - max_pending: chunks in flight at once (default: 2 x workers), keeps memory flat.
+    """
+    if index is None:
+        if pages is None:
+            from pages_data import dreamit_pages as pages
+        index = PageIndex(pages)
+
+    yield from map_chunks(_assign_chunk, queries, workers=workers, chunk_size=chunk_size, max_pending=max_pending,
+                          initializer=_init_worker, initargs=(index,))
+
+
+def assign_queries(queries, pages: list[dict] = None, **options) -> list[dict]:
+    """Best page + BM25 score for every query. See iter_assignments for options."""
+    return list(iter_assignments(queries, pages=pages, **options))
+
+
+def is_answered(assignment: dict, min_score: float = 0.0, min_matched: float = MIN_MATCHED) -> bool:
+    return (
+        assignment["page_id"] is not None
+        and assignment["score"] > min_score
+        and assignment["matched"] >= min_matched
+    )
+
+
+def coverage_gaps(assignments, min_score: float = 0.0, min_matched: float = MIN_MATCHED, top: int = 100) -> dict:
+    """
+    Coverage summary over assignments (any iterable, consumed once):
+    share of queries answered, queries per page, and the first `top` gaps
+    (queries whose best page is missing, scores <= min_score or contains
+    fewer than min_matched of the query's terms).
+    """
+    total = answered = 0
+    per_page = Counter()
+    gaps = []
+    for a in assignments:
+        total += 1
+        if is_answered(a, min_score, min_matched):
+            answered += 1
+            per_page[a["page_id"]] += 1
+        elif len(gaps) < top:
+            gaps.append(a)
+
+    return {
+        "queries": total,
+        "answered": answered,
+        "coverage": round(answered / total, 4) if total else 0.0,
+        "gap_count": total - answered,
+        "per_page": dict(per_page.most_common()),
+        "gaps": gaps,
+    }
@@ -0,0 +1,198 @@
+# query_log_miner.py
+# Long-tail keyword mining from local search-query logs (CSV / JSONL: query, impressions, clicks)
+#
+# Logs are streamed in chunks and aggregated per normalized query. Memory is
+# bounded: optionally only queries containing one of the head terms are kept,
+# and when more than `capacity` distinct queries are held the low-volume half
+# is dropped. build() numbers queries by descending impressions and writes a
+# token index, so a lookup walks one postings list and stops early.
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from phrase_matcher import PhraseMatcher, is_whole_word
+
+INDEX_FILE = "query_index.npz"
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(str(query).lower().split())
+
+
+def _read_chunks(path: str, chunksize: int):
+    if path.endswith((".jsonl", ".json")):
+        return pd.read_json(path, lines=True, chunksize=chunksize)
+    return pd.read_csv(path, chunksize=chunksize)
+
+
+class QueryLogMiner:
+    """
+    Streaming aggregation + head-term index over query logs.
+    ingest() as many files as needed, then build() (or load() a built index)
+    and call long_tail(head).
+    """
+
+    def __init__(self, heads: list[str] = None, capacity: int = 2_000_000):
+        self.capacity = capacity
+        self._stats = {}  # query -> [impressions, clicks]
+        self.pruned = 0   # distinct queries dropped to stay under capacity
+
+        heads = [normalize_query(h) for h in (heads or []) if h and h.strip()]
+        self._heads = PhraseMatcher(heads) if heads else None
+
+        # built index
+        self.queries = np.zeros(0, dtype=str)
+        self.impressions = np.zeros(0, dtype=np.int64)
+        self.clicks = np.zeros(0, dtype=np.int64)
+        self._tokens = {}
+        self._token_indptr = np.zeros(1, dtype=np.int64)
+        self._token_ids = np.zeros(0, dtype=np.int32)
+        self._cache = {}
+
+    def _has_head(self, query: str) -> bool:
+        for _, start, end in self._heads.iter_matches(query):
+            if is_whole_word(query, start, end):
+                return True
+        return False
+
+    def ingest(self, path: str, chunksize: int = 500_000, query_col: str = "query",
+               impressions_col: str = "impressions", clicks_col: str = "clicks") -> int:
+        """Stream one log file into the aggregates. Returns rows read."""
+        rows = 0
+        for chunk in _read_chunks(path, chunksize):
+            rows += len(chunk)
+            frame = pd.DataFrame({
+                "query": chunk[query_col].astype(str).map(normalize_query),
+                "impressions": pd.to_numeric(chunk.get(impressions_col, 0), errors="coerce"),
+                "clicks": pd.to_numeric(chunk.get(clicks_col, 0), errors="coerce"),
+            }).fillna(0)
+            grouped = frame.groupby("query", sort=False)[["impressions", "clicks"]].sum()
+
+            stats = self._stats
+            for query, impressions, clicks in zip(grouped.index, grouped["impressions"], grouped["clicks"]):
+                entry = stats.get(query)
+                if entry is None:
+                    if not query or (self._heads is not None and not self._has_head(query)):
+                        continue
+                    stats[query] = [int(impressions), int(clicks)]
+                else:
+                    entry[0] += int(impressions)
+                    entry[1] += int(clicks)
+
+            if len(stats) > self.capacity:
+                self._prune()
+        return rows
+
+    def _prune(self):
+        """Keep the capacity // 2 queries with the most impressions."""
+        keep = self.capacity // 2
+        impressions = np.fromiter((v[0] for v in self._stats.values()), dtype=np.int64, count=len(self._stats))
+        threshold = np.partition(impressions, len(impressions) - keep)[len(impressions) - keep]
+        before = len(self._stats)
+        self._stats = {q: v for q, v in self._stats.items() if v[0] >= threshold}
+        self.pruned += before - len(self._stats)
+
+    def build(self):
+        """Number queries by descending impressions and build the token index."""
+        queries = list(self._stats)
+        impressions = np.array([self._stats[q][0] for q in queries], dtype=np.int64)
+        clicks = np.array([self._stats[q][1] for q in queries], dtype=np.int64)
+        order = np.argsort(-impressions, kind="stable")
+
+        self.queries = np.array(queries, dtype=str)[order] if queries else np.zeros(0, dtype=str)
+        self.impressions = impressions[order]
+        self.clicks = clicks[order]
+
+        postings = {}
+        for qid, query in enumerate(self.queries):
+            for token in set(TOKEN_PATTERN.findall(query)):
+                postings.setdefault(token, []).append(qid)
+        self._tokens = {token: i for i, token in enumerate(postings)}
+        self._token_indptr = np.cumsum([0] + [len(ids) for ids in postings.values()]).astype(np.int64)
+        self._token_ids = np.fromiter((q for ids in postings.values() for q in ids), dtype=np.int32,
+                                      count=int(self._token_indptr[-1]))
+        self._cache.clear()
+
+    def _posting(self, token: str) -> np.ndarray:
+        i = self._tokens.get(token)
+        if i is None:
+            return np.zeros(0, dtype=np.int32)
+        return self._token_ids[self._token_indptr[i]:self._token_indptr[i + 1]]
+
+    def long_tail(self, head: str, limit: int = 10, min_extra_words: int = 1) -> list[dict]:
+        """
+        Top real queries containing head as a phrase (whole words) with at
+        least min_extra_words more words, by impressions.
+        Returns [{"query", "impressions", "clicks", "ctr"}, ...].
+        """
+        head = normalize_query(head)
+        key = (head, limit, min_extra_words)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        tokens = set(TOKEN_PATTERN.findall(head))
+        results = []
+        if tokens:
+            # the rarest token's postings hold every match, already in
+            # impression order: walk them and stop once limit is reached
+            candidates = min((self._posting(t) for t in tokens), key=len)
+            head_words = len(head.split())
+            for qid in candidates:
+                query = str(self.queries[qid])
+                if len(query.split()) < head_words + min_extra_words:
+                    continue
+                start = query.find(head)
+                while start != -1 and not is_whole_word(query, start, start + len(head)):
+                    start = query.find(head, start + 1)
+                if start == -1:
+                    continue
+                impressions, clicks = int(self.impressions[qid]), int(self.clicks[qid])
+                results.append({
+                    "query": query,
+                    "impressions": impressions,
+                    "clicks": clicks,
+                    "ctr": round(clicks / impressions, 4) if impressions else 0.0,
+                })
+                if len(results) == limit:
+                    break
+
+        if len(self._cache) >= 10_000:
+            self._cache.clear()
+        self._cache[key] = results
+        return results
+
+    def stats(self) -> dict:
+        return {"queries": len(self._stats), "indexed": len(self.queries), "pruned": self.pruned}
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        target = os.path.join(path, INDEX_FILE)
+        tmp = f"{target}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp,
+            queries=self.queries,
+            impressions=self.impressions,
+            clicks=self.clicks,
+            tokens=np.array(list(self._tokens), dtype=str),
+            token_indptr=self._token_indptr,
+            token_ids=self._token_ids,
+        )
+        os.replace(tmp, target)
+
+    @classmethod
+    def load(cls, path: str) -> "QueryLogMiner":
+        """A built index (lookups only; ingest() starts new aggregates)."""
+        data = np.load(os.path.join(path, INDEX_FILE), allow_pickle=False)
+        miner = cls()
+        miner.queries = data["queries"]
+        miner.impressions = data["impressions"]
+        miner.clicks = data["clicks"]
+        miner._tokens = {str(t): i for i, t in enumerate(data["tokens"])}
+        miner._token_indptr = data["token_indptr"]
+        miner._token_ids = data["token_ids"]
+        return miner
@@ -0,0 +1,201 @@
+# readability.py
+# Readability formulas computed from one tokenization pass (textstat compatible counts)
+#
+# Words and sentences are split exactly like textstat (same punctuation and
+# sentence regexes), and syllables come from textstat's own per-word lookup
+# (CMU dictionary, pyphen for unknown words), memoized in a bounded LRU
+# lexicon. The scores are therefore identical to textstat's (see
+# compare_with_textstat), so the bands in the scoring rubric see the same values.
+
+import re
+from functools import lru_cache
+
+import textstat
+
+# max distinct words kept in the syllable lexicon
+SYLLABLE_LEXICON_SIZE = 50_000
+
+_NONCONTRACTION_APOSTROPHE = re.compile(r"'(?!(?:[tsd]|ve|ll|re))")
+_PUNCTUATION = re.compile(r"[^\w\s']")
+_SENTENCE = re.compile(r"\b[^.!?]+[.!?]*")
+_TERMINATOR = re.compile(r"[.!?]")
+# blank line(s) between paragraphs (chunks shared across a batch)
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def words_of(text: str) -> list[str]:
+    """Same word list as textstat (punctuation removed, contractions kept)."""
+    text = _NONCONTRACTION_APOSTROPHE.sub("", text)
+    text = _PUNCTUATION.sub("", text)
+    return text.split()
+
+
+@lru_cache(maxsize=SYLLABLE_LEXICON_SIZE)
+def syllable_count(word: str) -> int:
+    """
+    Syllables of one lowercase word, exactly as textstat counts them.
+    Cached, so each distinct word is only looked up once per process.
+    """
+    return textstat.syllable_count(word)
+
+
+def chunk_counts(text: str) -> dict:
+    """
+    Counts for one chunk of a document (e.g. a paragraph).
+    Sentence segments are kept separately, because a sentence without
+    final punctuation continues into the next chunk (see merge_chunk_counts).
+    """
+    words = words_of(text)
+
+    syllables = 0
+    polysyllables = 0
+    for w in words:
+        n = syllable_count(w.lower())
+        syllables += n
+        if n >= 3:
+            polysyllables += 1
+
+    matches = list(_SENTENCE.finditer(text))
+    first_terminator = _TERMINATOR.search(text)
+
+    return {
+        "words": len(words),
+        "syllables": syllables,
+        "polysyllables": polysyllables,
+        # words per sentence segment, in order
+        "segments": [len(words_of(m.group())) for m in matches],
+        # first segment continues a sentence left open by the previous chunk
+        "joins_left": bool(matches) and (first_terminator is None or first_terminator.start() > matches[0].start()),
+        # last segment has no final punctuation yet
+        "ends_open": bool(matches) and not _TERMINATOR.match(matches[-1].group()[-1]),
+        "has_terminator": first_terminator is not None,
+    }
+
+
+def merge_chunk_counts(chunks: list[dict], text_nonempty: bool = True) -> dict:
+    """
+    Combine chunk_counts() of consecutive chunks into the counts of the whole text.
+    Gives the same result as text_counts() on the joined text, as long as
+    chunks were split on whitespace.
+    """
+    words = syllables = polysyllables = 0
+    long_segments = 0
+    open_words = None  # words of a sentence still waiting for its punctuation
+
+    for chunk in chunks:
+        words += chunk["words"]
+        syllables += chunk["syllables"]
+        polysyllables += chunk["polysyllables"]
+
+        segments = list(chunk["segments"])
+
+        if open_words is not None:
+            if segments and chunk["joins_left"]:
+                segments[0] += open_words
+            elif segments or chunk["has_terminator"]:
+                # open sentence ends here
+                if open_words > 2:
+                    long_segments += 1
+            else:
+                # nothing in this chunk, sentence stays open
+                continue
+            open_words = None
+
+        if chunk["ends_open"]:
+            open_words = segments.pop()
+
+        # textstat ignores "sentences" of 2 words or less
+        long_segments += sum(1 for n in segments if n > 2)
+
+    if open_words is not None and open_words > 2:
+        long_segments += 1
+
+    return {
+        "words": words,
+        "sentences": max(1, long_segments) if text_nonempty else 0,
+        "syllables": syllables,
+        "polysyllables": polysyllables,
+    }
+
+
+def text_counts(text: str) -> dict:
+    """
+    Tokenize once and return the shared counts every formula uses.
+    """
+    return merge_chunk_counts([chunk_counts(text)], text_nonempty=len(text) > 0)
+
+
+def scores_from_counts(counts: dict) -> dict:
+    """
+    All readability formulas from shared counts.
+    """
+    words = counts["words"]
+    sentences = counts["sentences"]
+
+    words_per_sentence = words / sentences if sentences else 0.0
+    syllables_per_word = counts["syllables"] / words if words else 0.0
+
+    if words_per_sentence == 0 or syllables_per_word == 0:
+        flesch = 0.0
+        grade = 0.0
+    else:
+        flesch = 206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word
+        grade = 0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59
+
+    # SMOG needs at least 3 sentences
+    if sentences >= 3:
+        smog = 1.043 * (30 * counts["polysyllables"] / sentences) ** 0.5 + 3.1291
+    else:
+        smog = 0.0
+
+    return {
+        "flesch_reading_ease": flesch,
+        "flesch_kincaid_grade": grade,
+        "smog_index": smog,
+        "words_per_sentence": words_per_sentence,
+        "syllables_per_word": syllables_per_word,
+    }
+
+
+def readability_scores(text: str) -> dict:
+    """Readability formulas for one document."""
+    return scores_from_counts(text_counts(text))
+
+
+def readability_scores_batch(texts) -> list[dict]:
+    """
+    Readability formulas for many documents.
+    Documents are split into paragraphs and each distinct paragraph of the
+    batch is tokenized and counted once (shared boilerplate, repeated pages);
+    syllables of each distinct word come from the shared lexicon.
+    """
+    paragraphs = {}
+    results = []
+    for text in texts:
+        chunks = []
+        for paragraph in _PARAGRAPH_BREAK.split(text):
+            counts = paragraphs.get(paragraph)
+            if counts is None:
+                counts = paragraphs[paragraph] = chunk_counts(paragraph)
+            chunks.append(counts)
+        results.append(scores_from_counts(merge_chunk_counts(chunks, text_nonempty=len(text) > 0)))
+    return results
+
+
+def compare_with_textstat(texts) -> dict:
+    """
+    Parity check against textstat.
+    Returns the max absolute difference for each formula over texts.
+    """
+    max_flesch = 0.0
+    max_grade = 0.0
+    for text in texts:
+        ours = readability_scores(text)
+        max_flesch = max(max_flesch, abs(ours["flesch_reading_ease"] - textstat.flesch_reading_ease(text)))
+        max_grade = max(max_grade, abs(ours["flesch_kincaid_grade"] - textstat.flesch_kincaid_grade(text)))
+
+    return {
+        "documents": len(texts),
+        "max_flesch_reading_ease_diff": round(max_flesch, 2),
+        "max_flesch_kincaid_grade_diff": round(max_grade, 2),
+    }
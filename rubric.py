@@ -0,0 +1,375 @@
+# rubric.py
+# Declarative SEO scoring rubric (JSON / YAML) compiled into a table-driven evaluator
+#
+# A rubric lists criteria. Each criterion has parts; each part maps one metric
+# (a column of scoring.audit_metrics) to points through ordered bands, first
+# match wins. This is the only place the scoring thresholds live:
+# scoring.compute_seo_score and scoring_frame.compute_seo_scores_frame both
+# evaluate the active rubric (DEFAULT_RUBRIC, or the file at SEO_RUBRIC_PATH).
+
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# optional .json / .yaml rubric that replaces DEFAULT_RUBRIC everywhere
+SEO_RUBRIC_PATH = os.getenv("SEO_RUBRIC_PATH")
+
+# metric -> value used when it is missing
+METRIC_DEFAULTS = {
+    "flesch_reading_ease": 0,
+    "flesch_kincaid_grade": 999,
+    "total_words": 0,
+    "primary_keyword_density": 0,
+    "title_length": 0,
+    "primary_keyword_in_title": False,
+    "meta_description_length": 0,
+    "link_count": 0,
+    "cta_present": False,
+}
+
+DEFAULT_RUBRIC = {
+    "max_total": 100,
+    "criteria": [
+        {
+            "name": "readability",
+            "out_of": 20,
+            "reason": "Flesch={flesch_reading_ease}, Grade={flesch_kincaid_grade}",
+            "parts": [
+                {
+                    "metric": "flesch_reading_ease",
+                    "bands": [
+                        {"min": 60, "points": 10},
+                        {"min": 45, "points": 6},
+                        {"min": 30, "points": 3},
+                    ],
+                    "default": {"points": 1},
+                },
+                {
+                    "metric": "flesch_kincaid_grade",
+                    "bands": [
+                        {"max": 9, "points": 10},
+                        {"max": 12, "points": 6},
+                        {"max": 16, "points": 3},
+                    ],
+                    "default": {"points": 1},
+                },
+            ],
+        },
+        {
+            "name": "keyword_match",
+            "out_of": 20,
+            "zero_when": {"metric": "total_words", "equals": 0, "label": "No content words found"},
+            "parts": [
+                {
+                    "metric": "primary_keyword_density",
+                    "bands": [
+                        {"min": 0.5, "max": 2.5, "points": 20, "label": "Primary keyword density ideal ({value}%)"},
+                        {"min": 0.2, "max": 0.5, "max_exclusive": True, "points": 12,
+                         "label": "Primary keyword density low ({value}%)"},
+                        {"min": 2.5, "min_exclusive": True, "max": 4.0, "points": 12,
+                         "label": "Primary keyword density slightly high ({value}%)"},
+                        {"equals": 0, "points": 0, "label": "Primary keyword not found in content"},
+                    ],
+                    "default": {"points": 6, "label": "Primary keyword density not optimal ({value}%)"},
+                },
+            ],
+        },
+        {
+            "name": "title_appeal",
+            "out_of": 20,
+            "parts": [
+                {
+                    "metric": "title_length",
+                    "bands": [
+                        {"min": 50, "max": 65, "points": 10, "label": "Length good ({value})"},
+                        {"min": 40, "max": 50, "max_exclusive": True, "points": 6, "label": "Length acceptable ({value})"},
+                        {"min": 65, "min_exclusive": True, "max": 80, "points": 6, "label": "Length acceptable ({value})"},
+                    ],
+                    "default": {"points": 2, "label": "Length poor ({value})"},
+                },
+                {
+                    "metric": "primary_keyword_in_title",
+                    "bands": [
+                        {"equals": True, "points": 10, "label": "Primary keyword present"},
+                    ],
+                    "default": {"points": 0, "label": "Primary keyword missing"},
+                },
+            ],
+        },
+        {
+            "name": "meta_length",
+            "out_of": 15,
+            "parts": [
+                {
+                    "metric": "meta_description_length",
+                    "bands": [
+                        {"min": 120, "max": 160, "points": 15, "label": "Meta length ideal ({value})"},
+                        {"min": 100, "max": 120, "max_exclusive": True, "points": 10, "label": "Meta length okay ({value})"},
+                        {"min": 160, "min_exclusive": True, "max": 180, "points": 10, "label": "Meta length okay ({value})"},
+                        {"equals": 0, "points": 0, "label": "Meta description missing"},
+                    ],
+                    "default": {"points": 5, "label": "Meta length poor ({value})"},
+                },
+            ],
+        },
+        {
+            "name": "link_structure",
+            "out_of": 15,
+            "parts": [
+                {
+                    "metric": "link_count",
+                    "bands": [
+                        {"min": 3, "points": 15, "label": "Good links ({value})"},
+                        {"equals": 2, "points": 10, "label": "Some links ({value})"},
+                        {"equals": 1, "points": 6, "label": "Low links ({value})"},
+                    ],
+                    "default": {"points": 3, "label": "No links detected (consider adding internal links)"},
+                },
+            ],
+        },
+        {
+            "name": "cta_presence",
+            "out_of": 10,
+            "parts": [
+                {
+                    "metric": "cta_present",
+                    "bands": [
+                        {"equals": True, "points": 10, "label": "CTA present"},
+                    ],
+                    "default": {"points": 0, "label": "CTA missing"},
+                },
+            ],
+        },
+    ],
+}
+
+
+def load_rubric(path: str) -> dict:
+    """Load a rubric from a .json or .yaml/.yml file."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def save_rubric(rubric: dict, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(rubric, f, indent=2)
+
+
+# -----------------------------
+# Compiling
+# -----------------------------
+def _compile_band(band: dict) -> tuple:
+    """Band dict -> (equals, low, high, low_exclusive, high_exclusive, points, label)."""
+    if "points" not in band:
+        raise ValueError(f"Rubric band is missing 'points': {band}")
+    return (
+        band.get("equals"),
+        band.get("min"),
+        band.get("max"),
+        bool(band.get("min_exclusive", False)),
+        bool(band.get("max_exclusive", False)),
+        band["points"],
+        band.get("label", ""),
+    )
+
+
+def _compile_part(part: dict) -> dict:
+    metric = part.get("metric")
+    if metric not in METRIC_DEFAULTS:
+        raise ValueError(f"Unknown rubric metric: {metric}")
+    default = part.get("default", {"points": 0})
+    return {
+        "metric": metric,
+        "bands": [_compile_band(b) for b in part.get("bands", [])],
+        "default": (default.get("points", 0), default.get("label", "")),
+    }
+
+
+def compile_rubric(rubric: dict) -> dict:
+    """
+    Validate a rubric and turn it into flat tables the evaluators walk.
+    Compile once, then score single pages or whole tables with it.
+    """
+    criteria = rubric.get("criteria")
+    if not criteria:
+        raise ValueError("Rubric has no criteria")
+
+    compiled = []
+    for c in criteria:
+        if "name" not in c or "out_of" not in c:
+            raise ValueError(f"Rubric criterion needs 'name' and 'out_of': {c}")
+        zero = c.get("zero_when")
+        if zero is not None and zero.get("metric") not in METRIC_DEFAULTS:
+            raise ValueError(f"Unknown rubric metric: {zero.get('metric')}")
+        compiled.append({
+            "name": c["name"],
+            "out_of": c["out_of"],
+            "reason": c.get("reason"),
+            "zero_when": (zero["metric"], _compile_band(dict(zero, points=0))) if zero else None,
+            "parts": [_compile_part(p) for p in c.get("parts", [])],
+        })
+
+    return {"max_total": rubric.get("max_total", 100), "criteria": compiled}
+
+
+@lru_cache(maxsize=1)
+def active_rubric() -> dict:
+    """The compiled rubric scoring uses: SEO_RUBRIC_PATH if set, else DEFAULT_RUBRIC."""
+    return compile_rubric(load_rubric(SEO_RUBRIC_PATH) if SEO_RUBRIC_PATH else DEFAULT_RUBRIC)
+
+
+# -----------------------------
+# Single page
+# -----------------------------
+def _band_matches(band: tuple, value) -> bool:
+    equals, low, high, low_ex, high_ex, _, _ = band
+    if equals is not None and value != equals:
+        return False
+    if low is not None and not (value > low if low_ex else value >= low):
+        return False
+    if high is not None and not (value < high if high_ex else value <= high):
+        return False
+    return True
+
+
+def _part_score(part: dict, value) -> tuple[int, str]:
+    for band in part["bands"]:
+        if _band_matches(band, value):
+            return band[5], band[6].format(value=value)
+    points, label = part["default"]
+    return points, label.format(value=value)
+
+
+def _values(metrics: dict) -> dict:
+    return {name: metrics.get(name, default) for name, default in METRIC_DEFAULTS.items()}
+
+
+def _criterion_score(c: dict, values: dict) -> tuple[int, str]:
+    zero = c["zero_when"]
+    if zero is not None and _band_matches(zero[1], values[zero[0]]):
+        return 0, zero[1][6]
+
+    score = 0
+    labels = []
+    for part in c["parts"]:
+        points, label = _part_score(part, values[part["metric"]])
+        score += points
+        if label:
+            labels.append(label)
+    score = int(max(0, min(c["out_of"], score)))
+    return score, c["reason"].format(**values) if c["reason"] else ", ".join(labels)
+
+
+def score_criterion(name: str, metrics: dict, compiled: dict = None) -> tuple[int, str]:
+    """(score, reason) of one criterion; metrics only needs the ones it uses."""
+    compiled = compiled or active_rubric()
+    for c in compiled["criteria"]:
+        if c["name"] == name:
+            return _criterion_score(c, _values(metrics))
+    raise KeyError(f"Rubric has no criterion {name!r}")
+
+
+def score_metrics(metrics: dict, compiled: dict = None) -> dict:
+    """
+    Score one row of audit metrics (scoring.audit_metrics) with a compiled
+    rubric (default: active_rubric()). Returns the compute_seo_score shape.
+    """
+    compiled = compiled or active_rubric()
+    values = _values(metrics)
+
+    total = 0
+    breakdown = {}
+    for c in compiled["criteria"]:
+        score, reason = _criterion_score(c, values)
+        total += score
+        breakdown[c["name"]] = {"score": score, "out_of": c["out_of"], "reason": reason}
+
+    return {
+        "total_score": int(max(0, min(compiled["max_total"], total))),
+        "breakdown": breakdown,
+    }
+
+
+# -----------------------------
+# Batch (vectorized)
+# -----------------------------
+def _band_mask(band: tuple, values: np.ndarray) -> np.ndarray:
+    equals, low, high, low_ex, high_ex, _, _ = band
+    mask = np.ones(len(values), dtype=bool)
+    if equals is not None:
+        mask &= values == equals
+    if low is not None:
+        mask &= (values > low) if low_ex else (values >= low)
+    if high is not None:
+        mask &= (values < high) if high_ex else (values <= high)
+    return mask
+
+
+def score_frame(df: pd.DataFrame, compiled: dict = None) -> pd.DataFrame:
+    """
+    Score a table of audit metrics with a compiled rubric (default: active_rubric()).
+    One column per criterion plus total_score (same index as df).
+    """
+    compiled = compiled or active_rubric()
+    columns = {}
+    for name, default in METRIC_DEFAULTS.items():
+        columns[name] = df[name].fillna(default).to_numpy() if name in df else np.full(len(df), default)
+
+    out = {}
+    for c in compiled["criteria"]:
+        score = np.zeros(len(df), dtype=np.int64)
+        for part in c["parts"]:
+            if not part["bands"]:
+                # np.select needs at least one condition
+                score += part["default"][0]
+                continue
+            values = columns[part["metric"]]
+            score += np.select(
+                [_band_mask(b, values) for b in part["bands"]],
+                [b[5] for b in part["bands"]],
+                default=part["default"][0],
+            ).astype(np.int64)
+        score = np.clip(score, 0, c["out_of"])
+
+        zero = c["zero_when"]
+        if zero is not None:
+            score = np.where(_band_mask(zero[1], columns[zero[0]]), 0, score)
+        out[c["name"]] = score
+
+    result = pd.DataFrame(out, index=df.index)
+    result["total_score"] = np.clip(result.to_numpy().sum(axis=1), 0, compiled["max_total"])
+    return result
+
+
+def what_if(metrics: pd.DataFrame, rubric: dict, baseline: dict = None) -> dict:
+    """
+    Re-score a stored corpus of audit metrics under a new rubric, without re-auditing any text.
+    baseline defaults to the active rubric.
+    Returns per-page before/after totals and a short summary.
+    """
+    before = score_frame(metrics, compile_rubric(baseline) if baseline else active_rubric())["total_score"]
+    after = score_frame(metrics, compile_rubric(rubric))["total_score"]
+
+    pages = pd.DataFrame({"total_before": before, "total_after": after, "delta": after - before})
+    if "page_id" in metrics:
+        pages.insert(0, "page_id", metrics["page_id"])
+
+    return {
+        "pages": pages,
+        "summary": {
+            "pages": len(pages),
+            "pages_changed": int((pages["delta"] != 0).sum()),
+            "mean_before": round(float(before.mean()), 2) if len(pages) else 0,
+            "mean_after": round(float(after.mean()), 2) if len(pages) else 0,
+            "mean_delta": round(float(pages["delta"].mean()), 2) if len(pages) else 0,
+        },
+    }
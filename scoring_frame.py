@@ -0,0 +1,18 @@
+# scoring_frame.py
+# Vectorized SEO Score /100 over a whole table of audit metrics (pandas + NumPy)
+#
+# Same rubric as scoring.py (rubric.active_rubric()), applied to columns instead
+# of one page at a time. Build the input table from scoring.audit_metrics(page, audit) rows.
+
+import pandas as pd
+
+from rubric import score_frame
+
+
+def compute_seo_scores_frame(df: pd.DataFrame, compiled: dict = None) -> pd.DataFrame:
+    """
+    Vectorized compute_seo_score() for a table of audit metrics.
+    Returns one row per input row with every sub-score and total_score
+    (same index as df). Totals match scoring.compute_seo_score exactly.
+    """
+    return score_frame(df, compiled)
@@ -0,0 +1,118 @@
+# semantic_clusters.py
+# Embedding-based cluster / category assignment with centroid matrices cached on disk
+#
+# Each cluster's seed terms are embedded once and averaged into a unit centroid.
+# Keywords (or pages) are then assigned with one cosine-similarity matrix product;
+# anything below the threshold goes to "Other".
+
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from keyword_engine import embed_texts, embedding_namespace
+
+CENTROID_CACHE_DIR = os.getenv("CENTROID_CACHE_DIR", os.path.join("cache", "centroids"))
+
+# keywords embedded + scored per step (bounds the similarity matrix in memory)
+ASSIGN_CHUNK_SIZE = 50_000
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+def groups_digest(groups: dict) -> str:
+    """Stable hash of a {name: [seed terms]} dict and the embedding backend."""
+    payload = json.dumps([embedding_namespace(), list(groups.items())], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class CentroidIndex:
+    """Unit centroid per group; rows of matrix follow names."""
+
+    def __init__(self, names: list[str], matrix: np.ndarray):
+        self.names = list(names)
+        self.matrix = np.asarray(matrix, dtype=np.float32)
+
+    @classmethod
+    def build(cls, groups: dict) -> "CentroidIndex":
+        names = [name for name, terms in groups.items() if any(terms)]
+        terms = [t for name in names for t in groups[name] if t]
+        vectors = _unit(embed_texts(terms)) if terms else np.zeros((0, 0), dtype=np.float32)
+
+        rows = []
+        start = 0
+        for name in names:
+            n = sum(1 for t in groups[name] if t)
+            rows.append(vectors[start:start + n].mean(axis=0))
+            start += n
+        return cls(names, _unit(np.vstack(rows)) if rows else np.zeros((0, 0), dtype=np.float32))
+
+    def scores(self, vectors: np.ndarray) -> np.ndarray:
+        """Cosine similarity of every vector against every centroid."""
+        return _unit(np.asarray(vectors, dtype=np.float32)) @ self.matrix.T
+
+    def assign(self, vectors: np.ndarray, threshold: float) -> list[tuple[str, float]]:
+        """(best group or "Other", similarity) per vector."""
+        if not self.names or len(vectors) == 0:
+            return [("Other", 0.0)] * len(vectors)
+        sims = self.scores(vectors)
+        best = sims.argmax(axis=1)
+        top = sims[np.arange(len(best)), best]
+        return [
+            (self.names[b] if s >= threshold else "Other", round(float(s), 4))
+            for b, s in zip(best, top)
+        ]
+
+
+_centroids = {}
+_centroids_lock = threading.Lock()
+
+
+def load_centroids(groups: dict, cache_dir: str = CENTROID_CACHE_DIR) -> CentroidIndex:
+    """
+    CentroidIndex for groups, from memory, then disk, then built (and saved).
+    The file name is the hash of the seed terms, so editing a group rebuilds it.
+    """
+    digest = groups_digest(groups)
+    index = _centroids.get(digest)
+    if index is not None:
+        return index
+
+    with _centroids_lock:
+        index = _centroids.get(digest)
+        if index is not None:
+            return index
+
+        path = os.path.join(cache_dir, f"centroids-{digest}.npz") if cache_dir else None
+        if path and os.path.exists(path):
+            data = np.load(path, allow_pickle=False)
+            index = CentroidIndex([str(n) for n in data["names"]], data["matrix"])
+        else:
+            index = CentroidIndex.build(groups)
+            if path:
+                os.makedirs(cache_dir, exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.tmp.npz"
+                np.savez(tmp, names=np.array(index.names, dtype=str), matrix=index.matrix)
+                os.replace(tmp, path)
+
+        _centroids[digest] = index
+        return index
+
+
+def semantic_assign(texts: list[str], groups: dict, threshold: float) -> list[tuple[str, float]]:
+    """
+    Assign many texts to the nearest group centroid.
+    Repeated texts are embedded once; work is done in ASSIGN_CHUNK_SIZE slices.
+    """
+    index = load_centroids(groups)
+
+    unique = list(dict.fromkeys(texts))
+    assigned = {}
+    for start in range(0, len(unique), ASSIGN_CHUNK_SIZE):
+        chunk = unique[start:start + ASSIGN_CHUNK_SIZE]
+        assigned.update(zip(chunk, index.assign(embed_texts(chunk), threshold)))
+    return [assigned[t] for t in texts]
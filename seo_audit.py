@@ -1,5 +1,7 @@
 import re
-import textstat
+
+from phrase_matcher import compile_phrases
+from readability import scores_from_counts, text_counts
 
 # CTA phrases (you can add more)
 CTA_PHRASES = [
@@ -15,6 +17,9 @@ CTA_PHRASES = [
     "reach out"
 ]
 
+# Words used for the simple conversational tone check
+CONVERSATIONAL_WORDS = ["you", "your", "we", "us"]
+
 
 def clean_text(text: str) -> str:
     """Lowercase + remove extra spaces."""
@@ -28,18 +33,32 @@ def word_count(text: str) -> int:
     return len(words)
 
 
-def keyword_density(content: str, keywords: list[str]) -> dict:
+def audit_phrases(keywords: list[str]) -> tuple:
+    """All phrases the audit looks for: target keywords, CTA phrases, conversational words."""
+    kw_phrases = tuple(clean_text(kw) for kw in keywords)
+    return kw_phrases + tuple(CTA_PHRASES) + tuple(CONVERSATIONAL_WORDS)
+
+
+def _scan_content(content_clean: str, keywords: list[str]) -> dict:
     """
-    Returns density % for each keyword in the content.
+    One pass of the phrase automaton over cleaned content.
+    Covers target keywords, CTA phrases and conversational words together.
     """
-    content_clean = clean_text(content)
-    total_words = word_count(content_clean)
+    return compile_phrases(audit_phrases(keywords)).scan(content_clean)
+
+
+def keyword_density_from_scan(scan: dict, keywords: list[str], content_clean: str) -> dict:
+    """keyword_density() result from a phrase scan of the cleaned content."""
+    total_words = scan["word_count"]
 
     densities = {}
     for kw in keywords:
         kw_clean = clean_text(kw)
-        # count occurrences of the exact keyword phrase
-        count = len(re.findall(rf"\b{re.escape(kw_clean)}\b", content_clean))
+        if kw_clean:
+            count = scan["counts"][kw_clean]
+        else:
+            # empty keyword is not in the automaton; keep the old regex behaviour
+            count = len(re.findall(rf"\b{re.escape(kw_clean)}\b", content_clean))
         density = (count / total_words * 100) if total_words > 0 else 0
         densities[kw] = {
             "count": count,
@@ -52,6 +71,37 @@ def keyword_density(content: str, keywords: list[str]) -> dict:
     }
 
 
+def engagement_from_scan(scan: dict, cta: str) -> dict:
+    """engagement_audit() result from a phrase scan of the cleaned content."""
+    cta_clean = clean_text(cta)
+
+    # Check CTA phrases inside content + provided CTA field
+    found_phrases = []
+    for phrase in CTA_PHRASES:
+        if phrase in scan["found"] or phrase in cta_clean:
+            found_phrases.append(phrase)
+
+    cta_present = len(found_phrases) > 0
+
+    # Simple tone check: looking for "you/your" (conversational)
+    conversational_score = sum(scan["counts"][w] for w in CONVERSATIONAL_WORDS)
+
+    return {
+        "cta_present": cta_present,
+        "cta_phrases_found": found_phrases,
+        "conversational_score": conversational_score
+    }
+
+
+def keyword_density(content: str, keywords: list[str]) -> dict:
+    """
+    Returns density % for each keyword in the content.
+    """
+    content_clean = clean_text(content)
+    scan = _scan_content(content_clean, keywords)
+    return keyword_density_from_scan(scan, keywords, content_clean)
+
+
 def meta_quality(title: str, meta_description: str) -> dict:
     """
     Simple scoring for SEO meta tags.
@@ -92,13 +142,14 @@ def headings_audit(headings: dict) -> dict:
     }
 
 
-def readability_audit(content: str) -> dict:
+def readability_from_counts(counts: dict) -> dict:
     """
-    Uses textstat for readability scoring.
+    Readability audit from readability.text_counts() style counts.
     """
-    # Some useful metrics
-    flesch = textstat.flesch_reading_ease(content)
-    grade_level = textstat.flesch_kincaid_grade(content)
+    # Some useful metrics (one tokenization for both)
+    scores = scores_from_counts(counts)
+    flesch = scores["flesch_reading_ease"]
+    grade_level = scores["flesch_kincaid_grade"]
 
     # Good readability rules (simple)
     # Higher flesch is easier
@@ -110,31 +161,19 @@ def readability_audit(content: str) -> dict:
     }
 
 
-def engagement_audit(content: str, cta: str = "") -> dict:
+def readability_audit(content: str) -> dict:
     """
-    Engagement indicators: CTA presence, conversational tone hints etc.
+    Readability scoring (readability.py, textstat compatible).
     """
-    content_clean = clean_text(content)
-    cta_clean = clean_text(cta)
+    return readability_from_counts(text_counts(content))
 
-    # Check CTA phrases inside content + provided CTA field
-    found_phrases = []
-    for phrase in CTA_PHRASES:
-        if phrase in content_clean or phrase in cta_clean:
-            found_phrases.append(phrase)
 
-    cta_present = len(found_phrases) > 0
-
-    # Simple tone check: looking for "you/your" (conversational)
-    conversational_score = 0
-    for w in ["you", "your", "we", "us"]:
-        conversational_score += len(re.findall(rf"\b{w}\b", content_clean))
-
-    return {
-        "cta_present": cta_present,
-        "cta_phrases_found": found_phrases,
-        "conversational_score": conversational_score
-    }
+def engagement_audit(content: str, cta: str = "") -> dict:
+    """
+    Engagement indicators: CTA presence, conversational tone hints etc.
+    """
+    scan = _scan_content(clean_text(content), [])
+    return engagement_from_scan(scan, cta)
 
 
 def audit_page(page: dict) -> dict:
@@ -148,12 +187,16 @@ def audit_page(page: dict) -> dict:
     keywords = page.get("target_keywords", [])
     cta = page.get("cta", "")
 
+    # keywords, CTA phrases and tone words all come from one scan
+    content_clean = clean_text(content)
+    scan = _scan_content(content_clean, keywords)
+
     audit = {}
 
-    audit["keyword_density"] = keyword_density(content, keywords)
+    audit["keyword_density"] = keyword_density_from_scan(scan, keywords, content_clean)
     audit["meta_quality"] = meta_quality(title, meta)
     audit["headings_audit"] = headings_audit(headings)
     audit["readability"] = readability_audit(content)
-    audit["engagement"] = engagement_audit(content, cta)
+    audit["engagement"] = engagement_from_scan(scan, cta)
 
     return audit
@@ -0,0 +1,133 @@
+# statistical_keywords.py
+# Fast statistical keyword extraction (TF-IDF over a corpus-wide document-frequency table)
+#
+# No neural model: the corpus is counted once into a sparse document x phrase
+# matrix, its document frequencies become an IDF vector, and pages are scored
+# with sparse operations only. Used for bulk triage of large crawls
+# (KEYWORD_ENGINE=tfidf); compare_engines() measures it against KeyBERT.
+
+import time
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+from keyword_engine import KEYPHRASE_NGRAM_RANGE, STOP_WORDS, extract_keywords_keybert
+
+
+class TfidfKeywordModel:
+    """
+    Candidate vocabulary + IDF from a corpus; extract() scores new pages.
+    Scores are sublinear TF x IDF, L2-normalized per page (0..1).
+    """
+
+    def __init__(self, vectorizer: CountVectorizer, idf: np.ndarray, n_docs: int):
+        self.vectorizer = vectorizer
+        self.idf = idf
+        self.n_docs = n_docs
+        self.terms = vectorizer.get_feature_names_out()
+
+    @classmethod
+    def fit(cls, corpus: list[str], min_df: int = 1, max_df: float = 1.0) -> "TfidfKeywordModel":
+        """Count the corpus once and build the document-frequency table."""
+        vectorizer = CountVectorizer(
+            ngram_range=KEYPHRASE_NGRAM_RANGE, stop_words=STOP_WORDS, min_df=min_df, max_df=max_df, dtype=np.float32
+        )
+        counts = vectorizer.fit_transform([t for t in corpus if t and t.strip()])
+        df = np.bincount(counts.indices, minlength=counts.shape[1])
+        idf = np.log((1 + counts.shape[0]) / (1 + df)).astype(np.float32) + 1
+        return cls(vectorizer, idf, counts.shape[0])
+
+    def save(self, path: str):
+        np.savez(
+            path,
+            terms=np.array(self.terms, dtype=str),
+            idf=self.idf,
+            n_docs=np.array(self.n_docs),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "TfidfKeywordModel":
+        data = np.load(path, allow_pickle=False)
+        terms = [str(t) for t in data["terms"]]
+        vectorizer = CountVectorizer(
+            ngram_range=KEYPHRASE_NGRAM_RANGE,
+            stop_words=STOP_WORDS,
+            vocabulary={t: i for i, t in enumerate(terms)},
+            dtype=np.float32,
+        )
+        return cls(vectorizer, data["idf"], int(data["n_docs"]))
+
+    def transform(self, texts: list[str]) -> sparse.csr_matrix:
+        """Page x phrase TF-IDF matrix (sparse)."""
+        counts = self.vectorizer.transform(texts).tocsr()
+        counts.data = 1 + np.log(counts.data)  # sublinear tf
+        weighted = counts @ sparse.diags(self.idf)
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        return sparse.diags(1 / np.maximum(norms, 1e-12)) @ weighted
+
+    def extract_batch(self, texts: list[str], top_n: int = 10) -> list[list[dict]]:
+        """[{keyword, score}] per text, best first (same shape as extract_keywords_keybert)."""
+        scores = self.transform([t or "" for t in texts]).tocsr()
+        results = []
+        for row in range(scores.shape[0]):
+            lo, hi = scores.indptr[row], scores.indptr[row + 1]
+            values = scores.data[lo:hi]
+            best = np.argsort(values)[::-1][:top_n]
+            results.append([
+                {"keyword": str(self.terms[scores.indices[lo + j]]), "score": round(float(values[j]), 4)}
+                for j in best
+            ])
+        return results
+
+    def extract(self, text: str, top_n: int = 10) -> list[dict]:
+        return self.extract_batch([text], top_n=top_n)[0]
+
+
+def _overlap(a: list[dict], b: list[dict]) -> float:
+    if not a and not b:
+        return 1.0
+    return len({x["keyword"] for x in a} & {x["keyword"] for x in b}) / max(len(a), len(b))
+
+
+def compare_engines(texts: list[str], model: TfidfKeywordModel = None, top_n: int = 10) -> dict:
+    """
+    Harness: run KeyBERT and the TF-IDF engine on the same pages and report
+    top-N keyword overlap and pages/sec for both.
+    If model is None, the TF-IDF table is built from texts (build time reported).
+    """
+    texts = [t for t in texts if t and t.strip()]
+    if not texts:
+        return {
+            "pages": 0,
+            "top_n": top_n,
+            "mean_overlap": 0,
+            "tfidf_build_seconds": 0.0,
+            "tfidf_pages_per_sec": 0,
+            "keybert_pages_per_sec": 0,
+        }
+
+    build_seconds = 0.0
+    if model is None:
+        started = time.perf_counter()
+        model = TfidfKeywordModel.fit(texts)
+        build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    tfidf = model.extract_batch(texts, top_n=top_n)
+    tfidf_seconds = time.perf_counter() - started
+
+    extract_keywords_keybert(texts[0], top_n=1)  # model load is not part of the timing
+    started = time.perf_counter()
+    keybert = [extract_keywords_keybert(t, top_n=top_n) for t in texts]
+    keybert_seconds = time.perf_counter() - started
+
+    overlap = [_overlap(k, t) for k, t in zip(keybert, tfidf)]
+    return {
+        "pages": len(texts),
+        "top_n": top_n,
+        "mean_overlap": round(float(np.mean(overlap)), 4) if overlap else 0,
+        "tfidf_build_seconds": round(build_seconds, 3),
+        "tfidf_pages_per_sec": round(len(texts) / tfidf_seconds, 1) if tfidf_seconds else 0,
+        "keybert_pages_per_sec": round(len(texts) / keybert_seconds, 1) if keybert_seconds else 0,
+    }
@@ -0,0 +1,284 @@
+# structured_output.py
+# JSON-constrained generation: response_format, local repair, follow-ups for missing fields only
+#
+# Requests ask for JSON output (OPENAI_RESPONSE_FORMAT = json_schema,
+# json_object or none); a deployment that rejects response_format is
+# remembered and asked without it from then on. Output that still isn't valid
+# JSON is repaired locally (json_repair), and only the fields that are missing
+# or were cut off are requested again, in a short follow-up - never the whole
+# document. Token use is counted so the wasted-token rate (tokens of
+# responses nothing could be used from) can be reported.
+
+import json
+import os
+import threading
+
+import openai
+from dotenv import load_dotenv
+
+from json_repair import repair_json
+from openai_helper import count_tokens, estimate_tokens
+
+load_dotenv()
+
+OPENAI_RESPONSE_FORMAT = os.getenv("OPENAI_RESPONSE_FORMAT", "json_object")
+
+# follow-up requests for missing fields per generation
+MAX_FOLLOWUPS = int(os.getenv("OPENAI_MAX_FOLLOWUPS", "1"))
+
+_TYPES = {"string": str, "array": list, "object": dict, "boolean": bool, "integer": int, "number": (int, float)}
+_EMPTY = {"string": str, "array": list, "object": dict}
+
+# deployments that rejected response_format
+_unsupported = set()
+
+
+# -----------------------------
+# Requests
+# -----------------------------
+def response_format(deployment: str, name: str, schema: dict) -> dict:
+    """response_format for this deployment, or None."""
+    if OPENAI_RESPONSE_FORMAT == "none" or deployment in _unsupported:
+        return None
+    if OPENAI_RESPONSE_FORMAT == "json_schema":
+        return {"type": "json_schema", "json_schema": {"name": name, "schema": schema, "strict": True}}
+    return {"type": "json_object"}
+
+
+def request_kwargs(deployment: str, temperature: float, messages: list[dict], output: dict, **extra) -> dict:
+    """chat.completions.create() arguments asking for output["schema"]."""
+    kwargs = {"model": deployment, "temperature": temperature, "messages": messages, **extra}
+    fmt = response_format(deployment, output["name"], output["schema"])
+    if fmt is not None:
+        kwargs["response_format"] = fmt
+    return kwargs
+
+
+def _format_rejected(kwargs: dict, error: Exception) -> bool:
+    if "response_format" in kwargs and isinstance(error, openai.BadRequestError) and "response_format" in str(error):
+        _unsupported.add(kwargs["model"])
+        return True
+    return False
+
+
+def _without_format(kwargs: dict) -> dict:
+    return {k: v for k, v in kwargs.items() if k != "response_format"}
+
+
+def create_chat(client, kwargs: dict):
+    """client.chat.completions.create(), retried without response_format if the deployment rejects it."""
+    try:
+        return client.chat.completions.create(**kwargs)
+    except openai.BadRequestError as e:
+        if not _format_rejected(kwargs, e):
+            raise
+        return client.chat.completions.create(**_without_format(kwargs))
+
+
+async def acreate_chat(client, kwargs: dict):
+    """Async create_chat."""
+    try:
+        return await client.chat.completions.create(**kwargs)
+    except openai.BadRequestError as e:
+        if not _format_rejected(kwargs, e):
+            raise
+        return await client.chat.completions.create(**_without_format(kwargs))
+
+
+def response_text(response) -> str:
+    return response.choices[0].message.content or ""
+
+
+def response_tokens(response, messages: list[dict], text: str) -> int:
+    """Tokens billed for a response (usage if reported, else an estimate)."""
+    usage = getattr(response, "usage", None)
+    if usage is not None and usage.total_tokens:
+        return usage.total_tokens
+    return estimate_tokens(messages) + count_tokens(text)
+
+
+# -----------------------------
+# Salvage + follow-ups
+# -----------------------------
+def sub_schema(schema: dict, keys: list[str]) -> dict:
+    return {
+        **schema,
+        "properties": {k: schema["properties"][k] for k in keys},
+        "required": list(keys),
+    }
+
+
+def _usable(value, spec: dict) -> bool:
+    expected = _TYPES.get(spec.get("type"))
+    if expected is not None and not isinstance(value, expected):
+        return False
+    if isinstance(value, (str, list)):
+        return len(value) > 0
+    return True
+
+
+def salvage_json(raw_text: str, schema: dict, tokens: int = 0) -> dict:
+    """
+    Model output -> {"fields": complete usable fields, "partial": fields cut off
+    part-way (what was complete), "missing": fields still needed, ...}.
+    """
+    value, info = repair_json(raw_text or "")
+    fields, partial = {}, {}
+    if isinstance(value, dict):
+        for key, spec in schema["properties"].items():
+            if key in value and _usable(value[key], spec):
+                (partial if key == info["truncated_key"] else fields)[key] = value[key]
+
+    return {
+        "fields": fields,
+        "partial": partial,
+        "missing": [k for k in schema["properties"] if k not in fields],
+        "repaired": info["repaired"],
+        "tokens": tokens,
+        "wasted_tokens": 0 if fields or partial else tokens,
+        "followups": 0,
+        "followup_tokens": 0,
+    }
+
+
+def followup_messages(messages: list[dict], raw_text: str, missing: list[str]) -> list[dict]:
+    """The original conversation + a request for the missing fields only."""
+    followup = list(messages)
+    if raw_text:
+        followup.append({"role": "assistant", "content": raw_text})
+    followup.append({
+        "role": "user",
+        "content": (
+            "The JSON above is incomplete or invalid. Return ONLY valid JSON with just these fields, "
+            f"in the same format as requested: {json.dumps(missing)}"
+        ),
+    })
+    return followup
+
+
+def apply_followup(salvaged: dict, raw_text: str, schema: dict, tokens: int = 0):
+    """Merge a follow-up answer into salvaged (in place)."""
+    extra = salvage_json(raw_text, sub_schema(schema, salvaged["missing"]))
+    found = extra["fields"]
+    salvaged["fields"].update(found)
+    for key, value in extra["partial"].items():
+        salvaged["partial"].setdefault(key, value)
+    salvaged["missing"] = [k for k in salvaged["missing"] if k not in found]
+    salvaged["followups"] += 1
+    salvaged["followup_tokens"] += tokens
+    salvaged["tokens"] += tokens
+    if not found and not extra["partial"]:
+        salvaged["wasted_tokens"] += tokens
+
+
+def finalize(salvaged: dict, output: dict, raw_text: str) -> dict:
+    """
+    Result dict in the schema's field order. Fields that were cut off use
+    their partial value; anything still missing is empty and listed under
+    "missing_fields". Nothing usable at all -> output["fallback"] (with "error").
+    """
+    fields = {**salvaged["partial"], **salvaged["fields"]}
+    output_stats.record(salvaged, failed=not fields)
+    if not fields:
+        return output["fallback"](output["error"], raw_text)
+
+    properties = output["schema"]["properties"]
+    result = {
+        k: fields[k] if k in fields else _EMPTY.get(spec.get("type"), lambda: None)()
+        for k, spec in properties.items()
+    }
+    if salvaged["missing"]:
+        result["missing_fields"] = list(salvaged["missing"])
+    return result
+
+
+def followup_kwargs(deployment: str, temperature: float, messages: list[dict], raw_text: str,
+                    missing: list[str], output: dict) -> dict:
+    """Request arguments for the missing fields only."""
+    return request_kwargs(
+        deployment, temperature, followup_messages(messages, raw_text, missing),
+        {"name": f"{output['name']}_missing", "schema": sub_schema(output["schema"], missing)},
+    )
+
+
+def _merge_response(salvaged: dict, response, kwargs: dict, output: dict):
+    text = response_text(response)
+    apply_followup(salvaged, text, output["schema"], response_tokens(response, kwargs["messages"], text))
+
+
+def finish_structured(client, deployment: str, temperature: float, messages: list[dict], raw_text: str,
+                      tokens: int, output: dict) -> dict:
+    """Salvage raw_text and ask only for what is missing (up to MAX_FOLLOWUPS times)."""
+    salvaged = salvage_json(raw_text, output["schema"], tokens)
+    for _ in range(MAX_FOLLOWUPS):
+        if not salvaged["missing"] or client is None:
+            break
+        kwargs = followup_kwargs(deployment, temperature, messages, raw_text, salvaged["missing"], output)
+        try:
+            response = create_chat(client, kwargs)
+        except openai.OpenAIError:
+            break
+        _merge_response(salvaged, response, kwargs, output)
+    return finalize(salvaged, output, raw_text)
+
+
+async def afinish_structured(send, deployment: str, temperature: float, messages: list[dict], raw_text: str,
+                             tokens: int, output: dict) -> dict:
+    """Async finish_structured: send(kwargs) is awaited and returns a response, or None on failure."""
+    salvaged = salvage_json(raw_text, output["schema"], tokens)
+    for _ in range(MAX_FOLLOWUPS):
+        if not salvaged["missing"]:
+            break
+        kwargs = followup_kwargs(deployment, temperature, messages, raw_text, salvaged["missing"], output)
+        response = await send(kwargs)
+        if response is None:
+            break
+        _merge_response(salvaged, response, kwargs, output)
+    return finalize(salvaged, output, raw_text)
+
+
+# -----------------------------
+# Stats
+# -----------------------------
+class OutputStats:
+    """Process-wide counters of how model output was used (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {
+                "responses": 0,
+                "valid": 0,
+                "repaired": 0,
+                "followups": 0,
+                "incomplete": 0,
+                "failed": 0,
+                "tokens": 0,
+                "followup_tokens": 0,
+                "wasted_tokens": 0,
+            }
+
+    def record(self, salvaged: dict, failed: bool):
+        with self._lock:
+            c = self.counters
+            c["responses"] += 1
+            c["valid"] += not salvaged["repaired"] and not salvaged["followups"] and not failed
+            c["repaired"] += salvaged["repaired"] and not failed
+            c["followups"] += salvaged["followups"]
+            c["incomplete"] += bool(salvaged["missing"]) and not failed
+            c["failed"] += failed
+            c["tokens"] += salvaged["tokens"]
+            c["followup_tokens"] += salvaged["followup_tokens"]
+            c["wasted_tokens"] += salvaged["tokens"] if failed else salvaged["wasted_tokens"]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            c = dict(self.counters)
+        c["wasted_rate"] = round(c["wasted_tokens"] / c["tokens"], 4) if c["tokens"] else 0.0
+        return c
+
+
+output_stats = OutputStats()
@@ -0,0 +1,132 @@
+# cases.py
+# Deterministic inputs for the parity tests (seeded, so the fixtures in
+# fixtures/ stay valid): pages for the audit, documents for readability and
+# page + audit pairs for the scoring rubric. Also a stand-in embedder and an
+# import probe for the tests that must not load the model stack.
+
+import os
+import random
+import subprocess
+import sys
+
+from seo_audit import CTA_PHRASES
+
+WORDS = (
+    "the a we you your us our power bi dashboard data analytics ai integration automation consulting "
+    "services business reporting kpi team cloud migration it's can't won't mr. smith's e.g. 3.5 "
+    "naïve résumé rock'n'roll (crm) 'quoted' idea hour"
+).split()
+KEYWORDS = ["power bi", "data analytics", "ai integration", "kpi", "book a demo", "us", "cloud migration"]
+PUNCTUATION = [".", "!", "?", ",", ";", ""]
+LINKS = ["https://dreamit.example/services", "www.dreamit.example", "/services/power-bi", "/blog/kpi-tips"]
+
+
+def _sentence(rnd: random.Random) -> str:
+    words = []
+    for _ in range(rnd.randint(1, 18)):
+        roll = rnd.random()
+        if roll < 0.08:
+            words.append(rnd.choice(CTA_PHRASES))
+        elif roll < 0.16:
+            words.append(rnd.choice(KEYWORDS))
+        elif roll < 0.18:
+            words.append(rnd.choice(LINKS))
+        else:
+            words.append(rnd.choice(WORDS))
+    return " ".join(words) + rnd.choice(PUNCTUATION)
+
+
+def _content(rnd: random.Random) -> str:
+    paragraphs = [" ".join(_sentence(rnd) for _ in range(rnd.randint(0, 5))) for _ in range(rnd.randint(0, 6))]
+    if rnd.random() < 0.2:
+        # phrases broken over short paragraphs
+        paragraphs += rnd.choice(CTA_PHRASES + KEYWORDS).split()
+        rnd.shuffle(paragraphs)
+    separators = ["\n\n", "\n \n", "\n\n\n", " \n\n", "\n"]
+    return "".join(p + rnd.choice(separators) for p in paragraphs).strip(rnd.choice(["", "\n"]))
+
+
+def audit_pages(n: int = 3000, seed: int = 1) -> list[dict]:
+    """Pages shaped like pages_data.dreamit_pages."""
+    rnd = random.Random(seed)
+    pages = []
+    for i in range(n):
+        pages.append({
+            "page_id": f"page_{i}",
+            "title": " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(0, 14))),
+            "meta_description": " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(0, 30))),
+            "headings": {
+                "h1": rnd.choice(["", " ", "Power BI Services"]),
+                "h2": [f"h2 {j}" for j in range(rnd.randint(0, 4))],
+                "h3": rnd.choice([[], ["a", "b"], "not a list"]),
+            },
+            "target_keywords": rnd.sample(KEYWORDS, rnd.randint(0, 4)),
+            "cta": rnd.choice(["", "Book a demo today", "Contact   Us", "Learn more"]),
+            "content": _content(rnd),
+        })
+    return pages
+
+
+def readability_docs(n: int = 2000, seed: int = 2) -> list[str]:
+    rnd = random.Random(seed)
+    docs = [_content(rnd) for _ in range(n - 4)]
+    return docs + ["", ".", "\n\n", "a b c"]
+
+
+def _metric(rnd: random.Random):
+    # band edges of the default rubric, plus anything in between
+    return rnd.choice([
+        0, 0.2, 0.5, 1, 2, 2.5, 3, 4.0, 9, 12, 16, 30, 40, 45, 50, 60, 65, 80, 100, 120, 160, 180,
+        round(rnd.uniform(-5, 200), 2),
+    ])
+
+
+def scoring_cases(n: int = 20000, seed: int = 3) -> list[tuple[dict, dict]]:
+    """(page, audit) pairs covering every band of every criterion."""
+    rnd = random.Random(seed)
+    cases = []
+    for i in range(n):
+        primary = rnd.choice(["power bi", "Data Analytics", ""])
+        title = "x" * rnd.choice([0, 39, 40, 49, 50, 65, 66, 80, 81]) + rnd.choice(["", " power bi", " DATA ANALYTICS"])
+        densities = {primary: {"count": 1, "density_percent": _metric(rnd)}} if rnd.random() < 0.9 else {}
+        audit = {
+            "keyword_density": {"total_words": rnd.choice([0, 100]), "keyword_density": densities},
+            "meta_quality": {"meta_description_length": int(abs(_metric(rnd)))},
+            "engagement": {"cta_present": rnd.random() < 0.5},
+        }
+        if rnd.random() < 0.95:
+            audit["readability"] = {"flesch_reading_ease": _metric(rnd), "flesch_kincaid_grade": _metric(rnd)}
+        page = {
+            "page_id": f"page_{i}",
+            "title": title,
+            "primary_keyword": primary,
+            "content": " ".join(rnd.choice(["a", "b"] + LINKS) for _ in range(rnd.randint(0, 5))),
+        }
+        cases.append((page, audit))
+    return cases
+
+
+class HashEmbedder:
+    """Deterministic stand-in for the sentence model: sum of per-word random vectors."""
+
+    dim = 64
+
+    def embed(self, texts, verbose: bool = False):
+        import zlib
+
+        import numpy as np
+
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in str(text).split():
+                vectors[row] += np.random.default_rng(zlib.crc32(word.encode("utf-8"))).standard_normal(self.dim)
+        return vectors
+
+
+def modules_loaded_by(script: str, **env) -> set:
+    """Run script in a fresh interpreter; returns the top-level modules it imported."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([os.path.dirname(here), here]), **env}
+    script += "\nimport sys\nprint(' '.join(sorted({m.split('.')[0] for m in sys.modules})))"
+    out = subprocess.run([sys.executable, "-c", script], env=env, check=True, capture_output=True, text=True)
+    return set(out.stdout.split())
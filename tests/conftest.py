@@ -0,0 +1,20 @@
+# conftest.py
+# Shared test setup: the app modules live in the repo root (flat layout)
+
+import json
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(HERE), HERE]
+
+
+@pytest.fixture(scope="session")
+def baseline():
+    """Load a fixture from tests/fixtures (see make_fixtures.py)."""
+    def load(name: str):
+        with open(os.path.join(HERE, "fixtures", name), "r", encoding="utf-8") as f:
+            return json.load(f)
+    return load
@@ -0,0 +1,65 @@
+# make_fixtures.py
+# Regenerate the baseline fixtures for the parity tests
+#
+# The expected values come from the original seo_audit.py / scoring.py (regex
+# audit, textstat readability, if/else scoring), read from git at a given
+# revision, run on the seeded inputs of cases.py. Usage (from the repo root):
+#   python tests/make_fixtures.py <revision of the original modules>
+
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path[:0] = [ROOT, HERE]
+
+import cases
+
+FIXTURES = os.path.join(HERE, "fixtures")
+
+# full compute_seo_score output (with reasons) is stored for this many cases
+FULL_SCORE_CASES = 500
+SCORE_NAMES = ["readability", "keyword_match", "title_appeal", "meta_length", "link_structure", "cta_presence"]
+
+
+def load_module(revision: str, path: str, name: str):
+    source = subprocess.run(
+        ["git", "show", f"{revision}:{path}"], cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    file = os.path.join(tempfile.mkdtemp(), f"{name}.py")
+    with open(file, "w", encoding="utf-8") as f:
+        f.write(source)
+    spec = importlib.util.spec_from_file_location(name, file)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def write(name: str, data):
+    with open(os.path.join(FIXTURES, name), "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+        f.write("\n")
+
+
+def main(revision: str):
+    seo_audit = load_module(revision, "seo_audit.py", "baseline_seo_audit")
+    scoring = load_module(revision, "scoring.py", "baseline_scoring")
+
+    write("baseline_audit.json", [seo_audit.audit_page(page) for page in cases.audit_pages()])
+    write("baseline_readability.json", [seo_audit.readability_audit(doc) for doc in cases.readability_docs()])
+
+    scores = [scoring.compute_seo_score(page, audit) for page, audit in cases.scoring_cases()]
+    write("baseline_scores.json", {
+        "scores": [[s["total_score"]] + [s["breakdown"][n]["score"] for n in SCORE_NAMES] for s in scores],
+        "full": scores[:FULL_SCORE_CASES],
+    })
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python tests/make_fixtures.py <revision>")
+    main(sys.argv[1])
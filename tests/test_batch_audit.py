@@ -0,0 +1,29 @@
+# test_batch_audit.py
+# audit_pages on a process pool gives the same results as one page at a time
+
+import cases
+from batch_audit import audit_pages
+from scoring import compute_seo_score
+from seo_audit import audit_page
+
+
+def _expected(pages):
+    return [(p["page_id"], audit_page(p), compute_seo_score(p, audit_page(p))) for p in pages]
+
+
+def test_parallel_matches_serial():
+    pages = cases.audit_pages(200)
+    assert list(audit_pages(pages, workers=2, chunk_size=16, max_pending=3)) == _expected(pages)
+
+
+def test_unordered_yields_every_page():
+    pages = cases.audit_pages(100)
+    results = list(audit_pages(pages, workers=2, chunk_size=7, ordered=False))
+    assert sorted(results, key=lambda r: int(r[0].split("_")[1])) == _expected(pages)
+
+
+def test_bad_page_is_reported_not_raised():
+    results = list(audit_pages([{"page_id": "bad", "content": None}, *cases.audit_pages(2)], workers=1))
+    assert results[0][0] == "bad"
+    assert "error" in results[0][1] and results[0][1] == results[0][2]
+    assert [r[0] for r in results[1:]] == ["page_0", "page_1"]
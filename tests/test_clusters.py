@@ -0,0 +1,42 @@
+# test_clusters.py
+# Compiled cluster index against the original first-matching-cluster loop
+
+import random
+
+import cases
+from keyword_engine import KEYWORD_CLUSTERS, ClusterIndex, assign_clusters, cluster_keywords
+
+
+def _first_cluster(keyword: str, clusters: dict) -> str:
+    # the original rule: first cluster (in order) with a term contained in the keyword
+    kw = keyword.lower()
+    for name, terms in clusters.items():
+        if any(term in kw for term in terms):
+            return name
+    return "Other"
+
+
+def _keywords(n: int, seed: int) -> list[str]:
+    rnd = random.Random(seed)
+    terms = [t for terms in KEYWORD_CLUSTERS.values() for t in terms]
+    pieces = cases.WORDS + terms + ["Power BI", "KPIs", "email", "paid", "DAX"]
+    return [" ".join(rnd.choice(pieces) for _ in range(rnd.randint(1, 4))) for _ in range(n)]
+
+
+def test_default_clusters_match_original_rule():
+    keywords = _keywords(5000, seed=9)
+    assert assign_clusters(keywords, mode="substring") == [_first_cluster(k, KEYWORD_CLUSTERS) for k in keywords]
+
+
+def test_custom_clusters_with_shared_and_empty_terms():
+    clusters = {"A": ["bi", "power bi"], "B": ["power", ""], "C": ["kpi"]}
+    keywords = _keywords(2000, seed=10)
+    assert ClusterIndex(clusters).assign_many(keywords) == [_first_cluster(k, clusters) for k in keywords]
+    assert ClusterIndex({"A": ["x"]}).assign("kpi") == "Other"
+
+
+def test_cluster_keywords_groups_items():
+    items = [{"keyword": "power bi dashboard", "score": 0.5}, {"keyword": "cloud migration", "score": 0.1}]
+    assert cluster_keywords(items, mode="substring") == {
+        "Power BI Services": [items[0]], "AI Integration": [], "Data Analytics": [], "Other": [items[1]]
+    }
@@ -0,0 +1,64 @@
+# test_combined_generation.py
+# One combined answer split back into the SEO result and the engagement plan
+
+import json
+
+from ai_optimizer import SEO_OUTPUT, build_seo_messages, seo_fallback
+from combined_generation import COMBINED_OUTPUT, build_combined_messages, split_combined
+from engagement_plan import ENGAGEMENT_OUTPUT, build_engagement_messages, engagement_fallback
+from openai_helper import estimate_tokens
+from pages_data import dreamit_pages
+from structured_output import finalize, salvage_json
+
+SEO = {
+    "optimized_title": "T",
+    "optimized_meta_description": "M",
+    "optimized_intro": "I",
+    "long_tail_keywords": ["a"],
+    "ctas": ["c"],
+}
+PLAN = {
+    "search_topics": ["s"],
+    "emotional_blog_titles": ["b"],
+    "two_week_posting_schedule": [{"day": "Mon", "time": "9am", "content_type": "blog", "title_idea": "x"}],
+    "engagement_hooks": ["h"],
+    "conversion_ctas": ["cc"],
+}
+
+
+def _combined(raw: str) -> dict:
+    return finalize(salvage_json(raw, COMBINED_OUTPUT["schema"]), COMBINED_OUTPUT, raw)
+
+
+def test_schema_is_the_union_of_both():
+    fields = list(SEO_OUTPUT["schema"]["properties"]) + list(ENGAGEMENT_OUTPUT["schema"]["properties"])
+    assert list(COMBINED_OUTPUT["schema"]["properties"]) == fields
+
+
+def test_complete_answer_splits_into_both_results():
+    assert split_combined(_combined(json.dumps({**SEO, **PLAN}))) == (SEO, PLAN)
+
+
+def test_missing_fields_stay_with_their_half():
+    partial = {k: v for k, v in PLAN.items() if k != "engagement_hooks"}
+    seo, plan = split_combined(_combined(json.dumps({**SEO, **partial})))
+    assert seo == SEO
+    assert plan["missing_fields"] == ["engagement_hooks"] and plan["engagement_hooks"] == []
+
+
+def test_half_missing_or_error_gives_fallbacks():
+    seo, plan = split_combined(_combined(json.dumps(SEO)))
+    assert seo == SEO
+    assert plan == engagement_fallback(ENGAGEMENT_OUTPUT["error"])
+
+    seo, plan = split_combined(_combined("no json here"))
+    assert seo == seo_fallback(COMBINED_OUTPUT["error"], "no json here")
+    assert plan == engagement_fallback(COMBINED_OUTPUT["error"], "no json here")
+
+
+def test_page_context_is_sent_once():
+    page = dreamit_pages[0]
+    separate = estimate_tokens(build_seo_messages(page)) + estimate_tokens(build_engagement_messages(page))
+    combined = build_combined_messages(page)
+    assert estimate_tokens(combined) < separate
+    assert combined[1]["content"].count(page["content"]) == 1
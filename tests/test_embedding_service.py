@@ -0,0 +1,94 @@
+# test_embedding_service.py
+# Embedding service over a Unix socket: batching, errors, stale sockets, lean clients
+
+import json
+import os
+import socket
+import struct
+import threading
+
+import numpy as np
+import pytest
+
+import cases
+from embedding_service import EmbeddingClient, EmbeddingServer, MicroBatcher, _recv_exact
+
+
+@pytest.fixture
+def server(tmp_path):
+    path = str(tmp_path / "embeddings.sock")
+    server = EmbeddingServer(path, MicroBatcher(cases.HashEmbedder().embed, max_wait_ms=20))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, path
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_gets_the_model_vectors(server):
+    _, path = server
+    texts = ["power bi", "kpi dashboard", "power bi", ""]
+    vectors = EmbeddingClient(path).embed(texts)
+    assert np.array_equal(vectors, cases.HashEmbedder().embed(texts))
+    assert EmbeddingClient(path).embed([]).shape == (0, 0)
+
+
+def test_concurrent_requests_share_batches(server):
+    srv, path = server
+    client = EmbeddingClient(path)
+    results = {}
+
+    def work(i):
+        results[i] = client.embed([f"text {i}", "shared"])
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for i, vectors in results.items():
+        assert np.array_equal(vectors, cases.HashEmbedder().embed([f"text {i}", "shared"]))
+    assert srv.batcher.batches < 16
+
+
+def test_malformed_request_gets_an_error_and_keeps_the_connection(server):
+    _, path = server
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    for payload in (b"{not json", json.dumps({"texts": []}).encode()):
+        sock.sendall(struct.pack(">I", len(payload)) + payload)
+        status, _, _ = struct.unpack(">BII", _recv_exact(sock, 9))
+        (length,) = struct.unpack(">I", _recv_exact(sock, 4))
+        assert status == 1 and _recv_exact(sock, length)
+
+    payload = json.dumps(["ok"]).encode()
+    sock.sendall(struct.pack(">I", len(payload)) + payload)
+    assert struct.unpack(">BII", _recv_exact(sock, 9)) == (0, 1, cases.HashEmbedder.dim)
+    sock.close()
+
+
+def test_stale_socket_is_replaced_live_one_refused(server, tmp_path):
+    _, live = server
+    with pytest.raises(OSError, match="already running"):
+        EmbeddingServer(live, MicroBatcher(cases.HashEmbedder().embed))
+
+    stale = str(tmp_path / "stale.sock")
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(stale)
+    sock.close()
+    assert os.path.exists(stale)
+    replacement = EmbeddingServer(stale, MicroBatcher(cases.HashEmbedder().embed))
+    replacement.server_close()
+
+
+def test_service_workers_do_not_load_keybert_or_torch(server):
+    _, path = server
+    modules = cases.modules_loaded_by(
+        "import keyword_engine\n"
+        "from pages_data import dreamit_pages\n"
+        "keyword_engine.warm_up()\n"
+        "keyword_engine.keyword_strategy_for_pages(dreamit_pages)\n"
+        "assert type(keyword_engine.get_embedder()).__name__ == 'EmbeddingClient'",
+        EMBEDDING_SERVICE_SOCKET=path,
+    )
+    assert "embedding_service" in modules
+    assert not modules & {"keybert", "torch", "sentence_transformers"}
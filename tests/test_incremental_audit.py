@@ -0,0 +1,58 @@
+# test_incremental_audit.py
+# IncrementalAuditor gives the same audit as a full audit_page, before and after edits
+
+import random
+
+import pytest
+
+import cases
+from incremental_audit import IncrementalAuditor, split_paragraphs
+from scoring import compute_seo_score
+from seo_audit import audit_page
+
+
+def _page(content: str, keywords: list[str] = ()) -> dict:
+    return {"content": content, "title": "t", "meta_description": "m", "headings": {},
+            "target_keywords": list(keywords), "cta": ""}
+
+
+@pytest.mark.parametrize("content, keywords", [
+    # phrases broken over three or more short paragraphs
+    ("Please book\n\na\n\ndemo now", ["book a demo"]),
+    ("talk\n\nto\n\nan\n\nexpert", []),
+    ("a\n\nb\n\nc\n\nd\n\ne", ["a b c d e", "b c", "c d e"]),
+    # overlapping matches across a paragraph break
+    ("kpi\n\nkpi kpi\n\nkpi", ["kpi kpi"]),
+    ("power\n\nbi power bi\n\n\n\npower", ["power bi", "bi power"]),
+    ("", ["kpi"]),
+    ("\n\n\n\n", ["kpi"]),
+])
+def test_phrases_across_paragraphs(content, keywords):
+    page = _page(content, keywords)
+    assert IncrementalAuditor().audit_page(page) == audit_page(page)
+
+
+def test_matches_full_audit_on_baseline_pages(baseline):
+    auditor = IncrementalAuditor()
+    pages = cases.audit_pages(1000)
+    for page, audit in zip(pages, baseline("baseline_audit.json")):
+        assert auditor.audit_page(page) == audit, page["page_id"]
+
+
+def test_edits_reuse_cached_paragraphs():
+    rnd = random.Random(4)
+    auditor = IncrementalAuditor()
+    for page in cases.audit_pages(300, seed=5):
+        auditor.audit_page(page)
+        paragraphs = split_paragraphs(page["content"])
+        paragraphs[rnd.randrange(len(paragraphs))] = rnd.choice(["book a", "demo", "", "talk to an expert"])
+        edited = {**page, "content": "\n\n".join(paragraphs)}
+        assert auditor.audit_and_score(edited) == (audit_page(edited), compute_seo_score(edited, audit_page(edited)))
+    assert auditor.hits > 0
+
+
+def test_cache_is_bounded():
+    auditor = IncrementalAuditor(max_paragraphs=50)
+    for page in cases.audit_pages(100, seed=6):
+        auditor.audit_page(page)
+    assert len(auditor._cache) <= 50
@@ -0,0 +1,78 @@
+# test_keyword_engine.py
+# Batched keyword extraction and keyword_strategy_for_pages (no neural model needed)
+
+import pytest
+
+import cases
+import keyword_engine
+from pages_data import dreamit_pages
+
+
+@pytest.fixture
+def embedder(monkeypatch):
+    # non-torch backend: candidates are scored by keyword_engine itself
+    monkeypatch.setattr(keyword_engine, "KEYBERT_BACKEND", "onnx")
+    monkeypatch.setattr(keyword_engine, "EMBEDDING_SERVICE_SOCKET", None)
+    monkeypatch.setattr(keyword_engine, "_embedder", cases.HashEmbedder())
+    return keyword_engine._embedder
+
+
+def _pages():
+    return dreamit_pages + [{"page_id": "empty", "content": ""}, {"page_id": "stop", "content": "the and of"}]
+
+
+def assert_same_keywords(actual: list[dict], expected: list[dict]):
+    # batched matrix products may differ from single ones in the last float bits
+    assert [k["keyword"] for k in actual] == [k["keyword"] for k in expected]
+    assert [k["score"] for k in actual] == pytest.approx([k["score"] for k in expected], abs=2e-4)
+
+
+def assert_same_strategy(actual: dict, expected: dict):
+    assert_same_keywords(actual["extracted_keywords"], expected["extracted_keywords"])
+    assert {name: [k["keyword"] for k in items] for name, items in actual["clusters"].items()} == {
+        name: [k["keyword"] for k in items] for name, items in expected["clusters"].items()
+    }
+    assert actual["trending_keywords"] == expected["trending_keywords"]
+    assert actual["long_tail_keywords"] == expected["long_tail_keywords"]
+
+
+def test_top_n_zero_returns_nothing(embedder):
+    texts = [p["content"] for p in dreamit_pages]
+    assert keyword_engine.extract_keywords_batch(texts, top_n=0) == [[] for _ in texts]
+    assert keyword_engine.extract_keywords_long_batch(texts, top_n=0) == [[] for _ in texts]
+    assert keyword_engine.extract_keywords_keybert(texts[0], top_n=0) == []
+
+
+def test_batch_matches_single_documents(embedder):
+    texts = [p["content"] for p in _pages()]
+    single = [keyword_engine.extract_keywords_batch([t], top_n=5)[0] for t in texts]
+    batch = keyword_engine.extract_keywords_batch(texts, top_n=5, batch_size=3)
+    for actual, expected in zip(batch, single):
+        assert_same_keywords(actual, expected)
+    assert single[-2:] == [[], []]
+    assert all(len(keywords) == 5 for keywords in single[:-2])
+
+
+@pytest.mark.parametrize("engine, long_doc_min_words", [("keybert", 80), ("keybert", 0), ("tfidf", 80)])
+def test_strategy_for_pages_matches_per_page(embedder, monkeypatch, engine, long_doc_min_words):
+    # 80 words: some of the site pages take the windowed long-document path
+    monkeypatch.setattr(keyword_engine, "LONG_DOC_MIN_WORDS", long_doc_min_words)
+    pages = _pages()
+    expected = [keyword_engine.keyword_strategy_for_page(p, top_n=6, engine=engine) for p in pages]
+    actual = keyword_engine.keyword_strategy_for_pages(pages, top_n=6, engine=engine)
+    assert len(actual) == len(expected)
+    for a, e in zip(actual, expected):
+        assert_same_strategy(a, e)
+
+
+def test_onnx_backend_does_not_load_keybert_or_torch():
+    modules = cases.modules_loaded_by(
+        "import cases, keyword_engine, onnx_backend\n"
+        "from pages_data import dreamit_pages\n"
+        "keyword_engine._embedder = cases.HashEmbedder()\n"
+        "keyword_engine.warm_up()\n"
+        "keyword_engine.keyword_strategy_for_pages(dreamit_pages)",
+        KEYBERT_BACKEND="onnx", EMBEDDING_SERVICE_SOCKET="",
+    )
+    assert "keyword_engine" in modules
+    assert not modules & {"keybert", "torch", "sentence_transformers"}
@@ -0,0 +1,83 @@
+# test_keyword_index.py
+# Site-wide keyword index: page back-references, IVF search, persistence
+
+import random
+
+import numpy as np
+import pytest
+
+import cases
+import keyword_index
+from keyword_index import KeywordIndex
+
+WORDS = cases.WORDS + ["etl", "azure", "openai", "chatbot", "agents", "nlp", "insights", "governance"]
+
+
+@pytest.fixture(autouse=True)
+def embedder(monkeypatch):
+    monkeypatch.setattr(keyword_index, "embed_texts", cases.HashEmbedder().embed)
+
+
+def _keywords(rnd: random.Random, n: int) -> list[dict]:
+    return [{"keyword": " ".join(rnd.sample(WORDS, rnd.randint(1, 3))), "score": round(rnd.random(), 4)}
+            for _ in range(n)]
+
+
+def test_query_returns_neighbours_with_pages():
+    index = KeywordIndex()
+    index.add_page("a", [{"keyword": "power bi", "score": 0.9}, {"keyword": "power bi dashboard", "score": 0.5}])
+    index.add_page("b", [{"keyword": "power bi dashboard", "score": 0.8}, {"keyword": "chatbot", "score": 0.4}])
+
+    results = index.query("power bi", k=1)
+    assert [r["keyword"] for r in results] == ["power bi dashboard"]
+    assert results[0]["pages"] == ["b", "a"]  # highest score first
+    assert index.query("power bi", k=0) == []
+    assert KeywordIndex().query("power bi") == []
+
+
+def test_reindexing_a_page_drops_its_old_keywords():
+    index = KeywordIndex()
+    index.add_page("a", [{"keyword": "etl", "score": 1}, {"keyword": "kpi", "score": 1}])
+    index.add_page("b", [{"keyword": "kpi", "score": 1}])
+    index.add_page("a", [{"keyword": "nlp", "score": 1}])
+
+    assert index.pages_for("etl") == [] and index.pages_for("kpi") == ["b"]
+    assert "etl" not in [r["keyword"] for r in index.query("nlp", k=10)]
+    assert index.stats()["tombstones"] == 1
+
+    index.remove_page("b")
+    assert len(index) == 1
+
+
+def test_ivf_search_with_all_lists_is_exact(monkeypatch):
+    monkeypatch.setattr(keyword_index, "TRAIN_MIN_KEYWORDS", 200)
+    rnd = random.Random(7)
+    index = KeywordIndex()
+    for page in range(60):
+        index.add_page(f"p{page}", _keywords(rnd, 10))
+    assert index.stats()["lists"] > 0
+
+    for text in ("power bi", "cloud migration kpi", "etl"):
+        nprobe = index.stats()["lists"]
+        approx = [r["keyword"] for r in index.query(text, k=5, nprobe=nprobe)]
+        alive = [kw for kw in index.keywords if index.pages_for(kw) and kw != text]
+        vectors = keyword_index._unit(cases.HashEmbedder().embed(alive))
+        sims = vectors @ keyword_index._unit(cases.HashEmbedder().embed([text]))[0]
+        exact = [alive[i] for i in np.argsort(sims)[::-1][:5]]
+        assert approx == exact
+
+
+def test_flush_saves_and_reload_matches(tmp_path):
+    path = str(tmp_path / "index")
+    index = KeywordIndex(path)
+    rnd = random.Random(8)
+    index.add_page("a", _keywords(rnd, 20))
+    index.maybe_save()  # the first change is written right away
+    index.add_page("b", _keywords(rnd, 20))
+    index.maybe_save()  # throttled
+    assert KeywordIndex(path).stats()["pages"] == 1
+
+    index.flush()
+    reloaded = KeywordIndex(path)
+    assert reloaded.stats() == index.stats()
+    assert reloaded.query("power bi", k=5) == index.query("power bi", k=5)
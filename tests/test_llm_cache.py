@@ -0,0 +1,117 @@
+# test_llm_cache.py
+# LLM response cache: TTL, LRU eviction, what is stored, and bulk generation hits
+
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import bulk_generation
+import llm_cache
+from llm_cache import LLMCache, cache_key, cacheable, cached_generate
+
+RESULT = {
+    "optimized_title": "T",
+    "optimized_meta_description": "M",
+    "optimized_intro": "I",
+    "long_tail_keywords": ["a", "b"],
+    "ctas": ["c"],
+}
+MESSAGES = [{"role": "user", "content": "page"}]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMCache(str(tmp_path / "llm.sqlite"), ttl_seconds=3600, max_entries=3)
+
+
+def test_empty_cache_stores_and_hits(cache):
+    # an empty cache is falsy (__len__): callers must test "is not None"
+    assert len(cache) == 0 and not cache
+    key = cache_key(MESSAGES, "dep", 0.6, "1")
+    assert cache.get(key) is None
+    cache.put(key, "seo", RESULT)
+    assert cache.get(key) == RESULT
+    assert cache.stats()["entries"] == 1 and cache.stats()["hits"] == 1
+
+
+def test_key_covers_every_input():
+    key = cache_key(MESSAGES, "dep", 0.6, "1")
+    assert key == cache_key([dict(m) for m in MESSAGES], "dep", 0.6, "1")
+    assert len({
+        key,
+        cache_key(MESSAGES, "other", 0.6, "1"),
+        cache_key(MESSAGES, "dep", 0.7, "1"),
+        cache_key(MESSAGES, "dep", 0.6, "2"),
+        cache_key([{"role": "user", "content": "page 2"}], "dep", 0.6, "1"),
+    }) == 5
+
+
+def test_ttl_expires_entries(tmp_path):
+    cache = LLMCache(str(tmp_path / "llm.sqlite"), ttl_seconds=0.05)
+    cache.put("k", "seo", RESULT)
+    time.sleep(0.1)
+    assert cache.get("k") is None
+    assert cache.stats()["expired"] == 1 and len(cache) == 0
+
+
+def test_lru_eviction(cache):
+    for i in range(3):
+        cache.put(f"k{i}", "seo", {"i": i})
+        time.sleep(0.01)
+    cache.get("k0")
+    cache.put("k3", "seo", {"i": 3})
+    assert [k for k in ("k0", "k1", "k2", "k3") if cache.get(k) is not None] == ["k0", "k2", "k3"]
+    assert cache.counters["evictions"] == 1
+
+
+def test_only_complete_results_are_cacheable():
+    assert cacheable(RESULT)
+    assert not cacheable({**RESULT, "missing_fields": ["ctas"]})
+    assert not cacheable({"error": "Model did not return valid JSON"})
+    assert not cacheable(None)
+
+
+def test_cached_generate(cache, monkeypatch):
+    monkeypatch.setattr(llm_cache, "get_llm_cache", lambda: cache)
+    calls = []
+
+    def generate():
+        calls.append(1)
+        return dict(RESULT)
+
+    for force in (False, False, True):
+        assert cached_generate("seo", MESSAGES, "dep", 0.6, "1", generate, force=force) == RESULT
+    assert len(calls) == 2 and cache.counters["bypassed"] == 1
+
+    failed = cached_generate("seo", MESSAGES, "dep", 0.6, "2", lambda: {"error": "x"})
+    assert failed == {"error": "x"} and len(cache) == 1
+
+
+class FakeAsyncClient:
+    """chat.completions.create answering every request with RESULT."""
+
+    def __init__(self):
+        self.requests = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        self.requests += 1
+        message = SimpleNamespace(content=json.dumps(RESULT))
+        usage = SimpleNamespace(total_tokens=100)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")], usage=usage)
+
+
+def test_bulk_generation_hits_a_cache_that_started_empty(tmp_path, monkeypatch):
+    cache = LLMCache(str(tmp_path / "llm.sqlite"))
+    monkeypatch.setattr(bulk_generation, "get_llm_cache", lambda: cache)
+    pages = [{"page_name": f"Page {i}", "primary_keyword": "kpi", "content": f"content {i}"} for i in range(4)]
+    client = FakeAsyncClient()
+
+    first = bulk_generation.generate_bulk(pages, "seo", client=client, deployment="dep")
+    second = bulk_generation.generate_bulk(pages, "seo", client=client, deployment="dep")
+
+    assert first == second == [RESULT] * 4
+    assert client.requests == 4
+    assert cache.stats()["hits"] == 4 and len(cache) == 4
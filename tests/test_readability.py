@@ -0,0 +1,27 @@
+# test_readability.py
+# Built-in readability formulas against the original textstat-based audit
+
+import pytest
+
+import cases
+from readability import readability_scores, readability_scores_batch
+from seo_audit import readability_audit
+
+
+@pytest.fixture(scope="module")
+def docs():
+    return cases.readability_docs()
+
+
+def test_readability_audit_matches_baseline(docs, baseline):
+    expected = baseline("baseline_readability.json")
+    assert len(expected) == len(docs)
+    for doc, audit in zip(docs, expected):
+        assert readability_audit(doc) == audit, doc
+
+
+def test_batch_matches_single(docs):
+    # repeated documents and paragraphs exercise the shared paragraph counts
+    batch = docs[:300] * 2
+    assert readability_scores_batch(batch) == [readability_scores(doc) for doc in batch]
+
@@ -0,0 +1,60 @@
+# test_scoring.py
+# compute_seo_score through the rubric against the original if/else scoring
+
+import copy
+
+import pandas as pd
+import pytest
+
+import cases
+from rubric import DEFAULT_RUBRIC, compile_rubric, load_rubric, save_rubric, score_frame, what_if
+from scoring import audit_metrics, compute_seo_score
+
+NAMES = ["readability", "keyword_match", "title_appeal", "meta_length", "link_structure", "cta_presence"]
+
+
+@pytest.fixture(scope="module")
+def scoring_cases():
+    return cases.scoring_cases()
+
+
+def test_scores_match_baseline(scoring_cases, baseline):
+    expected = baseline("baseline_scores.json")
+    for (page, audit), row in zip(scoring_cases, expected["scores"]):
+        score = compute_seo_score(page, audit)
+        assert [score["total_score"]] + [score["breakdown"][n]["score"] for n in NAMES] == row, page["page_id"]
+
+
+def test_breakdown_and_reasons_match_baseline(scoring_cases, baseline):
+    full = baseline("baseline_scores.json")["full"]
+    for (page, audit), score in zip(scoring_cases, full):
+        assert compute_seo_score(page, audit) == score, page["page_id"]
+
+
+def test_rubric_file_round_trip(scoring_cases, tmp_path):
+    path = str(tmp_path / "rubric.json")
+    save_rubric(DEFAULT_RUBRIC, path)
+    compiled = compile_rubric(load_rubric(path))
+    for page, audit in scoring_cases[:500]:
+        assert compute_seo_score(page, audit, compiled) == compute_seo_score(page, audit)
+
+
+def test_what_if(scoring_cases):
+    metrics = pd.DataFrame([audit_metrics(page, audit) for page, audit in scoring_cases[:1000]])
+    assert what_if(metrics, DEFAULT_RUBRIC)["summary"]["pages_changed"] == 0
+
+    # CTA worth nothing: every page with a CTA loses its 10 points
+    rubric = copy.deepcopy(DEFAULT_RUBRIC)
+    cta = next(c for c in rubric["criteria"] if c["name"] == "cta_presence")
+    cta["parts"][0]["bands"][0]["points"] = 0
+    result = what_if(metrics, rubric)
+    assert (result["pages"]["delta"] == -10 * metrics["cta_present"]).all()
+    assert result["pages"]["page_id"].tolist() == metrics["page_id"].tolist()
+
+
+def test_criterion_without_bands():
+    compiled = compile_rubric({"criteria": [
+        {"name": "flat", "out_of": 5, "parts": [{"metric": "link_count", "default": {"points": 4}}]},
+    ]})
+    df = pd.DataFrame([{"link_count": 0}, {"link_count": 9}])
+    assert score_frame(df, compiled)["total_score"].tolist() == [4, 4]
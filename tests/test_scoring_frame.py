@@ -0,0 +1,31 @@
+# test_scoring_frame.py
+# Vectorized scores over a metrics table against the original per-page scoring
+
+import pandas as pd
+
+import cases
+from scoring import audit_metrics, compute_seo_score
+from scoring_frame import compute_seo_scores_frame
+
+COLUMNS = ["total_score", "readability", "keyword_match", "title_appeal", "meta_length", "link_structure",
+           "cta_presence"]
+
+
+def test_frame_matches_baseline(baseline):
+    df = pd.DataFrame([audit_metrics(page, audit) for page, audit in cases.scoring_cases()])
+    scores = compute_seo_scores_frame(df)
+    assert scores[COLUMNS].to_numpy().tolist() == baseline("baseline_scores.json")["scores"]
+
+
+def test_missing_values_use_metric_defaults():
+    # metrics missing from a row (NaN) score like keys missing from the audit
+    page, audit = cases.scoring_cases(1)[0]
+    df = pd.DataFrame([audit_metrics(page, audit)])
+    df[["flesch_reading_ease", "flesch_kincaid_grade"]] = float("nan")
+    without = {k: v for k, v in audit.items() if k != "readability"}
+    assert compute_seo_scores_frame(df).loc[0, "total_score"] == compute_seo_score(page, without)["total_score"]
+
+
+def test_empty_frame():
+    scores = compute_seo_scores_frame(pd.DataFrame(columns=["page_id"]))
+    assert len(scores) == 0 and "total_score" in scores
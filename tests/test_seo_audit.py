@@ -0,0 +1,32 @@
+# test_seo_audit.py
+# audit_page (single-pass phrase matcher) against the original regex audit
+
+import pytest
+
+import cases
+from phrase_matcher import compile_phrases
+from seo_audit import audit_page, keyword_density
+
+
+@pytest.fixture(scope="module")
+def pages():
+    return cases.audit_pages()
+
+
+def test_audit_page_matches_baseline(pages, baseline):
+    expected = baseline("baseline_audit.json")
+    assert len(expected) == len(pages)
+    for page, audit in zip(pages, expected):
+        assert audit_page(page) == audit, page["page_id"]
+
+
+def test_keyword_counts_are_whole_word_and_non_overlapping():
+    result = keyword_density("kpi kpis kpi-kpi aa aaa", ["kpi", "aa"])
+    assert result["keyword_density"]["kpi"]["count"] == 3
+    assert result["keyword_density"]["aa"]["count"] == 1
+
+
+def test_matcher_reports_overlapping_phrases():
+    matcher = compile_phrases(("book a demo", "a demo", "demo"))
+    found = {phrase for phrase, _, _ in matcher.iter_matches("please book a demo")}
+    assert found == {"book a demo", "a demo", "demo"}
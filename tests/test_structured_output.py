@@ -0,0 +1,82 @@
+# test_structured_output.py
+# JSON salvage, missing-field follow-ups and finalize (empty values for missing fields)
+
+import json
+from types import SimpleNamespace
+
+from ai_optimizer import SEO_OUTPUT
+from engagement_plan import ENGAGEMENT_OUTPUT
+from structured_output import finalize, finish_structured, salvage_json
+
+SEO = {
+    "optimized_title": "Power BI Consulting",
+    "optimized_meta_description": "M",
+    "optimized_intro": "I",
+    "long_tail_keywords": ["a", "b"],
+    "ctas": ["c1", "c2"],
+}
+
+
+class FakeClient:
+    """chat.completions.create answering with the given texts in turn."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        message = SimpleNamespace(content=self.replies.pop(0))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=SimpleNamespace(total_tokens=50))
+
+
+def test_valid_json_is_used_as_is():
+    salvaged = salvage_json(json.dumps(SEO), SEO_OUTPUT["schema"])
+    assert salvaged["missing"] == [] and not salvaged["repaired"]
+    assert finalize(salvaged, SEO_OUTPUT, json.dumps(SEO)) == SEO
+
+
+def test_missing_fields_are_empty_values_not_types():
+    raw = '```json\n{"optimized_title": "T", "ctas": ["a", "b'
+    result = finalize(salvage_json(raw, SEO_OUTPUT["schema"]), SEO_OUTPUT, raw)
+    assert result["optimized_title"] == "T"
+    assert result["ctas"] == ["a"]  # the cut-off item is dropped
+    assert result["long_tail_keywords"] == [] and result["optimized_intro"] == ""
+    assert set(result["missing_fields"]) == {"optimized_meta_description", "optimized_intro",
+                                             "long_tail_keywords", "ctas"}
+
+
+def test_missing_schedule_is_an_empty_list():
+    raw = '{"search_topics": ["x"], "engagement_hooks": ["h"]}'
+    result = finalize(salvage_json(raw, ENGAGEMENT_OUTPUT["schema"]), ENGAGEMENT_OUTPUT, raw)
+    assert result["two_week_posting_schedule"] == []
+    assert all(not isinstance(v, type) for v in result.values())
+
+
+def test_object_and_unknown_types():
+    output = {
+        "name": "x",
+        "schema": {"type": "object", "properties": {"a": {"type": "string"}, "b": {"type": "object"},
+                                                    "c": {"type": "boolean"}}},
+        "fallback": lambda error, raw_text="": {"error": error},
+        "error": "bad",
+    }
+    result = finalize({"fields": {"a": "x"}, "partial": {}, "missing": ["b", "c"], "repaired": False,
+                       "followups": 0, "tokens": 0, "wasted_tokens": 0, "followup_tokens": 0}, output, "")
+    assert result == {"a": "x", "b": {}, "c": None, "missing_fields": ["b", "c"]}
+
+
+def test_nothing_usable_returns_fallback():
+    result = finalize(salvage_json("I cannot help with that.", SEO_OUTPUT["schema"]), SEO_OUTPUT, "raw")
+    assert result["error"] == SEO_OUTPUT["error"] and result["ctas"] == []
+
+
+def test_followup_asks_only_for_missing_fields():
+    first = json.dumps({k: v for k, v in SEO.items() if k != "ctas"})
+    client = FakeClient(json.dumps({"ctas": SEO["ctas"]}))
+    result = finish_structured(client, "dep", 0.6, [{"role": "user", "content": "p"}], first, 100, SEO_OUTPUT)
+    assert result == SEO
+    assert len(client.requests) == 1
+    assert "ctas" in client.requests[0]["messages"][-1]["content"]
+    assert "optimized_title" not in client.requests[0]["messages"][-1]["content"]
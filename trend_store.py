@@ -0,0 +1,296 @@
+# trend_store.py
+# Columnar time-series store for keyword trend exports (keyword, date, volume)
+#
+# CSV exports are ingested in chunks and aggregated to weekly volumes per
+# keyword (three NumPy columns). After each ingest the growth metrics
+# (week-over-week, momentum) and a token / prefix index are precomputed and
+# saved with the data, so dashboard lookups are a few array operations.
+
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+STORE_FILE = "trends.npz"
+MANIFEST_FILE = "manifest.json"
+
+# weeks of history used for the growth metrics
+METRIC_WEEKS = 12
+# the last RECENT_WEEKS of those are "recent" for momentum
+RECENT_WEEKS = 4
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def normalize_keyword(keyword: str) -> str:
+    return " ".join(str(keyword).lower().split())
+
+
+def keyword_tokens(keyword: str) -> list[str]:
+    return [t for t in TOKEN_PATTERN.findall(keyword.lower()) if t not in ENGLISH_STOP_WORDS]
+
+
+def week_of(dates: pd.Series) -> np.ndarray:
+    """Week number (weeks start on Monday) for a column of dates."""
+    days = pd.to_datetime(dates).to_numpy().astype("datetime64[D]").astype(np.int64)
+    return (days + 3) // 7  # 1970-01-01 was a Thursday
+
+
+def week_start(week: int) -> str:
+    return str(np.datetime64(int(week) * 7 - 3, "D"))
+
+
+def _file_digest(path: str) -> str:
+    stat = os.stat(path)
+    return hashlib.sha1(f"{os.path.abspath(path)}\0{stat.st_size}\0{stat.st_mtime_ns}".encode("utf-8")).hexdigest()
+
+
+class TrendStore:
+    """
+    Weekly keyword volumes + precomputed metrics + token / prefix index.
+    Ingestion is additive (volumes of the same keyword and week are summed);
+    a file that was already ingested (same path, size and mtime) is skipped.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.keywords = []
+        self._ids = {}
+        self._kid = np.zeros(0, dtype=np.int32)
+        self._week = np.zeros(0, dtype=np.int32)
+        self._volume = np.zeros(0, dtype=np.float64)
+        self._manifest = {}
+        self.metrics = pd.DataFrame()
+
+        if os.path.exists(os.path.join(path, STORE_FILE)):
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    # -----------------------------
+    # Ingestion
+    # -----------------------------
+    @staticmethod
+    def _weekly(df: pd.DataFrame, keyword_col: str = "keyword", date_col: str = "date",
+                volume_col: str = "volume") -> pd.DataFrame:
+        """Raw rows -> (keyword, week, volume) summed per keyword and week."""
+        df = df[[keyword_col, date_col, volume_col]].dropna(subset=[keyword_col, date_col])
+        return pd.DataFrame({
+            "keyword": df[keyword_col].map(normalize_keyword).to_numpy(),
+            "week": week_of(df[date_col]),
+            "volume": pd.to_numeric(df[volume_col], errors="coerce").fillna(0).to_numpy(),
+        }).groupby(["keyword", "week"], as_index=False, sort=False)["volume"].sum()
+
+    def _merge(self, weekly: pd.DataFrame):
+        for kw in weekly["keyword"].unique():
+            if kw not in self._ids:
+                self._ids[kw] = len(self.keywords)
+                self.keywords.append(kw)
+
+        kid = np.concatenate([self._kid, weekly["keyword"].map(self._ids).to_numpy(dtype=np.int32)])
+        week = np.concatenate([self._week, weekly["week"].to_numpy(dtype=np.int32)])
+        volume = np.concatenate([self._volume, weekly["volume"].to_numpy(dtype=np.float64)])
+
+        # one row per (keyword, week), sorted by keyword then week
+        key = kid.astype(np.int64) << 32 | (week.astype(np.int64) & 0xFFFFFFFF)
+        unique, inverse = np.unique(key, return_inverse=True)
+        self._volume = np.bincount(inverse, weights=volume)
+        self._kid = (unique >> 32).astype(np.int32)
+        self._week = (unique & 0xFFFFFFFF).astype(np.int32)
+
+        self._rebuild()
+
+    def ingest_frame(self, df: pd.DataFrame, **columns) -> int:
+        """Add rows (keyword, date, volume) from a DataFrame. Returns the number of rows."""
+        weekly = self._weekly(df, **columns)
+        if not weekly.empty:
+            self._merge(weekly)
+        return len(df)
+
+    def ingest_csv(self, csv_path: str, chunksize: int = 1_000_000, force: bool = False, **columns) -> int:
+        """
+        Stream a CSV export into the store. Chunks are reduced to weekly
+        aggregates as they are read, so memory is bounded by the number of
+        (keyword, week) pairs, not the file size. Saves when done.
+        """
+        digest = _file_digest(csv_path)
+        if digest in self._manifest and not force:
+            return 0
+
+        rows = 0
+        parts = []
+        usecols = [columns.get(c, c.split("_")[0]) for c in ("keyword_col", "date_col", "volume_col")]
+        for chunk in pd.read_csv(csv_path, usecols=usecols, chunksize=chunksize):
+            rows += len(chunk)
+            parts.append(self._weekly(chunk, **columns))
+
+        if parts:
+            weekly = pd.concat(parts).groupby(["keyword", "week"], as_index=False, sort=False)["volume"].sum()
+            self._merge(weekly)
+
+        self._manifest[digest] = {"file": os.path.abspath(csv_path), "rows": rows}
+        self.save()
+        return rows
+
+    # -----------------------------
+    # Derived data (metrics + index)
+    # -----------------------------
+    def _rebuild(self):
+        n = len(self.keywords)
+        if n == 0:
+            self.metrics = pd.DataFrame()
+            return
+
+        latest = int(self._week.max())
+        first = latest - METRIC_WEEKS + 1
+        recent = (self._week >= first)
+        grid = np.zeros((n, METRIC_WEEKS))
+        np.add.at(grid, (self._kid[recent], self._week[recent] - first), self._volume[recent])
+
+        last, prev = grid[:, -1], grid[:, -2]
+        recent_avg = grid[:, -RECENT_WEEKS:].mean(axis=1)
+        base_avg = grid[:, :-RECENT_WEEKS].mean(axis=1)
+
+        self.metrics = pd.DataFrame({
+            "keyword": self.keywords,
+            "last_week": last,
+            "wow": (last - prev) / np.maximum(prev, 1),
+            "momentum": (recent_avg - base_avg) / np.maximum(base_avg, 1),
+            "volume_recent": grid.sum(axis=1),
+            "volume_total": np.bincount(self._kid, weights=self._volume, minlength=n),
+        })
+        self.latest_week = latest
+
+        # token -> keyword ids (CSR-style arrays)
+        postings = {}
+        for kid, kw in enumerate(self.keywords):
+            for token in set(keyword_tokens(kw)):
+                postings.setdefault(token, []).append(kid)
+        self._tokens = {token: i for i, token in enumerate(postings)}
+        self._token_indptr = np.cumsum([0] + [len(ids) for ids in postings.values()])
+        self._token_ids = np.fromiter((k for ids in postings.values() for k in ids), dtype=np.int32,
+                                      count=int(self._token_indptr[-1]))
+
+        # keywords sorted for prefix search
+        self._sorted = np.argsort(np.array(self.keywords, dtype=str)).astype(np.int32)
+        self._sorted_keywords = np.array(self.keywords, dtype=str)[self._sorted]
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def _posting(self, token: str) -> np.ndarray:
+        i = self._tokens.get(token)
+        if i is None:
+            return np.zeros(0, dtype=np.int32)
+        return self._token_ids[self._token_indptr[i]:self._token_indptr[i + 1]]
+
+    def _rows(self, ids: np.ndarray) -> list[dict]:
+        rows = self.metrics.iloc[ids]
+        return [
+            {
+                "keyword": r.keyword,
+                "last_week": float(r.last_week),
+                "wow": round(float(r.wow), 4),
+                "momentum": round(float(r.momentum), 4),
+                "volume_recent": float(r.volume_recent),
+            }
+            for r in rows.itertuples(index=False)
+        ]
+
+    def trending_for(self, keyword: str, limit: int = 5, min_volume: float = 0) -> list[dict]:
+        """
+        Trending keywords related to keyword (e.g. a page's primary keyword):
+        keywords sharing the most tokens with it first, then highest momentum.
+        """
+        if self.metrics.empty:
+            return []
+        postings = [self._posting(t) for t in set(keyword_tokens(keyword))]
+        postings = [p for p in postings if len(p)]
+        if not postings:
+            return []
+
+        ids, shared = np.unique(np.concatenate(postings), return_counts=True)
+        volume = self.metrics["volume_recent"].to_numpy()[ids]
+        keep = volume >= max(min_volume, np.finfo(float).tiny)
+        ids, shared = ids[keep], shared[keep]
+
+        momentum = self.metrics["momentum"].to_numpy()[ids]
+        order = np.lexsort((-momentum, -shared))[:limit]
+        return self._rows(ids[order])
+
+    def prefix(self, prefix: str, limit: int = 10) -> list[dict]:
+        """Keywords starting with prefix, highest momentum first."""
+        if self.metrics.empty:
+            return []
+        prefix = normalize_keyword(prefix)
+        lo = np.searchsorted(self._sorted_keywords, prefix, side="left")
+        hi = np.searchsorted(self._sorted_keywords, prefix + "\uffff", side="left")
+        ids = self._sorted[lo:hi]
+        momentum = self.metrics["momentum"].to_numpy()[ids]
+        return self._rows(ids[np.argsort(-momentum, kind="stable")[:limit]])
+
+    def history(self, keyword: str) -> list[dict]:
+        """Weekly volumes of one keyword: [{"week_start", "volume"}, ...]."""
+        kid = self._ids.get(normalize_keyword(keyword))
+        if kid is None:
+            return []
+        lo, hi = np.searchsorted(self._kid, [kid, kid + 1])
+        return [{"week_start": week_start(w), "volume": float(v)} for w, v in zip(self._week[lo:hi], self._volume[lo:hi])]
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def save(self):
+        os.makedirs(self.path, exist_ok=True)
+        target = os.path.join(self.path, STORE_FILE)
+        tmp = f"{target}.{os.getpid()}.tmp.npz"
+        derived = {}
+        if not self.metrics.empty:
+            derived = {
+                "m_" + col: self.metrics[col].to_numpy() for col in self.metrics.columns if col != "keyword"
+            }
+            derived.update(
+                latest_week=np.array(self.latest_week),
+                tokens=np.array(list(self._tokens), dtype=str),
+                token_indptr=self._token_indptr,
+                token_ids=self._token_ids,
+                sorted=self._sorted,
+            )
+        np.savez(
+            tmp,
+            keywords=np.array(self.keywords, dtype=str),
+            kid=self._kid,
+            week=self._week,
+            volume=self._volume,
+            **derived,
+        )
+        os.replace(tmp, target)
+        with open(os.path.join(self.path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f, indent=2)
+
+    def _load(self):
+        data = np.load(os.path.join(self.path, STORE_FILE), allow_pickle=False)
+        self.keywords = [str(k) for k in data["keywords"]]
+        self._ids = {kw: i for i, kw in enumerate(self.keywords)}
+        self._kid, self._week, self._volume = data["kid"], data["week"], data["volume"]
+
+        manifest = os.path.join(self.path, MANIFEST_FILE)
+        if os.path.exists(manifest):
+            with open(manifest, "r", encoding="utf-8") as f:
+                self._manifest = json.load(f)
+
+        if "latest_week" in data:
+            metrics = {"keyword": self.keywords}
+            metrics.update({name[2:]: data[name] for name in data.files if name.startswith("m_")})
+            self.metrics = pd.DataFrame(metrics)
+            self.latest_week = int(data["latest_week"])
+            self._tokens = {str(t): i for i, t in enumerate(data["tokens"])}
+            self._token_indptr = data["token_indptr"]
+            self._token_ids = data["token_ids"]
+            self._sorted = data["sorted"]
+            self._sorted_keywords = np.array(self.keywords, dtype=str)[self._sorted]